@@ -0,0 +1,322 @@
+# Standard Library Imports
+import sys
+import os
+import glob
+import json
+import time
+import platform
+import tempfile
+import tracemalloc
+import argparse
+import subprocess
+
+# Third-Party Imports
+import numpy as np
+
+# Local Imports
+sys.path.insert(0, os.path.abspath("./")) # Hacky way to ensure Python can find local modules
+sys.path.insert(0, os.path.abspath("pyslm"))
+from src.output.xml_hdf5_io_2 import XMLWriter
+import src.output.HDF5Util as HDF5Util
+from src.pipeline.pipeline import create_part, create_hatcher, create_segment_styles, create_velocity_profiles, \
+    layer_heights, slice_layer, hatch_next_layer, HatchAngles
+from load_parameters import default_config
+
+'''
+Benchmarks the full slice -> hatch -> XML -> HDF5 path for each part in geometry/ and each scan strategy, reporting
+layers/sec and peak memory for every stage, and flags regressions against a stored baseline.
+
+    python benchmark.py                                     # everything, compared with benchmark_baseline.json
+    python benchmark.py --parts nut.stl --strategies Hatcher
+    python benchmark.py --save-baseline benchmark_baseline.json
+
+Only an evenly spaced subset of each part's layers (--max-layers) is run, so a full pass stays manageable. Layers
+keep their index in the build, and so their hatch angle. Peak memory is measured with tracemalloc in a second pass
+over the same layers, so it doesn't slow down the timed pass. It covers Python and numpy allocations but not those
+made inside C libraries (e.g. clipper, HDF5).
+
+The baseline records the machine it was run on. Timings from another machine aren't comparable, so the comparison is
+skipped (with a note of what differs) unless --ignore-machine is given. Combinations that fail are listed under
+"failed" rather than "results", so they are neither compared nor taken for a measurement.
+
+--startup times how long main.py takes to start (i.e. to import everything it needs) against STARTUP_BUDGET. The UI
+starts a new process for every run, so this is paid on every click.
+'''
+
+# Seconds main.py may take to start, measured as the fastest of --startup-runs runs of `python main.py --help`.
+# Importing pyslm (trimesh, scipy, shapely) accounts for most of it.
+STARTUP_BUDGET = 1.0
+
+# The scan strategies benchmarked, with the config changes that select them (see create_hatcher)
+STRATEGIES = {
+    'Hatcher': {"Scan Strategy": "Default"},
+    'StripeHatcher': {"Scan Strategy": "Striping", "Stripe Width": 5.0, "Stripe Offset": 0.5, "Stripe Overlap": 0.1},
+    'IslandHatcher': {"Scan Strategy": "Island", "Island Width": 5.0, "Island Offset": 0.5, "Island Overlap": 0.1},
+    'BasicIslandHatcherRandomOrder': {"Scan Strategy": "Island Random Order",
+                                      "Island Width": 5.0, "Island Offset": 0.5, "Island Overlap": 0.1},
+}
+
+STAGES = ['slice', 'hatch', 'xml', 'hdf5']
+
+# The settings that identify the machine a run was made on; a baseline is only compared with runs that match them all
+MACHINE_SETTINGS = ['node', 'machine', 'processor', 'cpu_count', 'python']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmarks scan path generation over the parts in geometry/.")
+    parser.add_argument("--parts", nargs="+",
+                        help="File names of the parts in geometry/ to benchmark (default: all of them)")
+    parser.add_argument("--strategies", nargs="+", choices=list(STRATEGIES), default=list(STRATEGIES),
+                        help="Scan strategies to benchmark (default: all of them)")
+    parser.add_argument("--max-layers", type=int, default=20,
+                        help="Number of layers benchmarked per part, spread evenly over its height (default: 20)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory pass")
+    parser.add_argument("--startup", action="store_true",
+                        help="Only measure the startup time of main.py and check it against the budget")
+    parser.add_argument("--startup-runs", type=int, default=5,
+                        help="Number of times main.py is started when measuring its startup time (default: 5)")
+    parser.add_argument("--baseline", default="benchmark_baseline.json",
+                        help="Baseline results to compare with (default: benchmark_baseline.json)")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Relative slowdown or memory growth over the baseline reported as a regression (default: 0.2)")
+    parser.add_argument("--ignore-machine", action="store_true",
+                        help="Compare with the baseline even if it was recorded on a different machine")
+    parser.add_argument("--save-baseline", metavar="FILE", help="Write the results to FILE as the new baseline")
+    parser.add_argument("--output", metavar="FILE", help="Write the results to FILE")
+    return parser.parse_args()
+
+
+def sample_layers(heights: np.ndarray, max_layers: int) -> list:
+    """ Up to max_layers (layer index, z) pairs spread evenly over the build """
+    ids = np.unique(np.linspace(0, len(heights) - 1, min(max_layers, len(heights))).round().astype(int))
+    return [(int(layer_id), heights[layer_id]) for layer_id in ids]
+
+
+class StageMeter():
+    """
+    Runs the stages of each layer, accumulating the time spent in each and, if measure_memory is set, the largest
+    memory peak above the memory in use when the stage started.
+    """
+
+    def __init__(self, measure_memory: bool = False):
+        self.measure_memory = measure_memory
+        self.times = dict.fromkeys(STAGES, 0.0)
+        self.peaks = dict.fromkeys(STAGES, 0)
+        self.counts = dict.fromkeys(STAGES, 0)
+
+    def run(self, stage: str, func, *args):
+        if self.measure_memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        result = func(*args)
+        self.times[stage] += time.perf_counter() - start
+        self.counts[stage] += 1
+
+        if self.measure_memory:
+            self.peaks[stage] = max(self.peaks[stage], tracemalloc.get_traced_memory()[1] - before)
+        return result
+
+
+def run_pass(config: dict, layers: list, meter: StageMeter, work_dir: str):
+    part = create_part(config)
+    hatcher = create_hatcher(config, verbose=False)
+    segStyleList = create_segment_styles(config)
+    vProfileList = create_velocity_profiles(config)
+
+    xmlWriter = XMLWriter(os.path.join(work_dir, 'XMLOutput'))
+    xmlWriter.prepare_output_dir()
+    hdf5Util = HDF5Util.HDF5Util(xmlWriter.out, os.path.join(work_dir, 'HDF5FromSCN.hdf5'))
+
+    # BasicIslandHatcherRandomOrder shuffles its islands with the global random state
+    np.random.seed(0)
+
+    # The angle turns on each sampled layer that is hatched, as if they were the layers of a build (see HatchAngles)
+    angles = HatchAngles(hatcher)
+
+    layerNum = 0
+    for i, (layer_id, z) in enumerate(layers):
+        geom_slice = meter.run('slice', slice_layer, part, z)
+        layer, hatched = meter.run('hatch', hatch_next_layer, hatcher, angles, z, geom_slice, config)
+        angles.add(i, hatched)
+        if layer is None:
+            continue
+
+        layerNum += 1
+        meter.run('xml', xmlWriter.write_layer, layer, layerNum, segStyleList, vProfileList,
+                  config["Contour Default ID"], config["Hatch Default ID"])
+        meter.run('hdf5', hdf5Util.convertLayer, xmlWriter.layer_path(layerNum), layerNum - 1)
+
+    hdf5Util.close()
+
+
+def benchmark(part_name: str, strategy: str, max_layers: int, measure_memory: bool) -> dict:
+    config = default_config()
+    config["Part File Name"] = part_name
+    config.update(STRATEGIES[strategy])
+
+    # Load time is measured separately as it is paid once per build, not per layer
+    start = time.perf_counter()
+    part = create_part(config)
+    load_time = time.perf_counter() - start
+
+    heights = layer_heights(part, config["Layer Thickness"])
+    layers = sample_layers(heights, max_layers)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        timed = StageMeter()
+        run_pass(config, layers, timed, work_dir)
+
+        if measure_memory:
+            metered = StageMeter(measure_memory=True)
+            tracemalloc.start()
+            try:
+                run_pass(config, layers, metered, work_dir)
+            finally:
+                tracemalloc.stop()
+
+    stages = {}
+    for stage in STAGES:
+        stages[stage] = {'layers': timed.counts[stage], 'time': timed.times[stage],
+                         'layers_per_sec': timed.counts[stage] / timed.times[stage] if timed.times[stage] > 0 else None}
+        if measure_memory:
+            stages[stage]['peak_memory_mb'] = metered.peaks[stage] / 1024**2
+
+    total = sum(timed.times.values())
+    return {'num_layers': len(heights), 'layers': len(layers), 'load_time': load_time,
+            'layers_per_sec': len(layers) / total if total > 0 else None, 'stages': stages}
+
+
+def measure_startup(runs: int) -> float:
+    """ Fastest time, over the given number of runs, for main.py to start and exit """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, 'main.py', '--help'], stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def machine_settings() -> dict:
+    """ The settings of this machine, as listed in MACHINE_SETTINGS """
+    return {'node': platform.node(), 'machine': platform.machine(), 'processor': platform.processor(),
+            'cpu_count': os.cpu_count(), 'python': platform.python_version()}
+
+
+def machine_mismatches(settings: dict, baseline: dict) -> list:
+    """
+    Lists the machine settings that differ between a run and the baseline. A baseline recorded before the machine was
+    stored differs in all of them.
+    """
+    return ['{}: {} (baseline {})'.format(key, settings.get(key), baseline.get(key, 'not recorded'))
+            for key in MACHINE_SETTINGS if key not in baseline or baseline[key] != settings.get(key)]
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Lists the stages that got slower, or use more memory, than in the baseline by more than the tolerance, and the
+    combinations that fail but were measured in the baseline.
+    """
+    regressions = []
+    for part_name, strategies in results['failed'].items():
+        for strategy, error in strategies.items():
+            if strategy in baseline['results'].get(part_name, {}):
+                regressions.append('{}/{}: failed with {}'.format(part_name, strategy, error))
+
+    for part_name, strategies in results['results'].items():
+        for strategy, result in strategies.items():
+            base = baseline['results'].get(part_name, {}).get(strategy)
+            if base is None or 'error' in base:
+                continue
+
+            for stage, stats in result['stages'].items():
+                baseStats = base['stages'].get(stage, {})
+                rate, baseRate = stats.get('layers_per_sec'), baseStats.get('layers_per_sec')
+                if rate is not None and baseRate is not None and rate < baseRate * (1 - tolerance):
+                    regressions.append('{}/{}/{}: {:.2f} layers/s, baseline {:.2f} layers/s'.format(
+                        part_name, strategy, stage, rate, baseRate))
+
+                peak, basePeak = stats.get('peak_memory_mb'), baseStats.get('peak_memory_mb')
+                if peak is not None and basePeak is not None and peak > basePeak * (1 + tolerance) and peak - basePeak > 1:
+                    regressions.append('{}/{}/{}: {:.1f} MB peak, baseline {:.1f} MB'.format(
+                        part_name, strategy, stage, peak, basePeak))
+    return regressions
+
+
+def format_result(part_name: str, strategy: str, result: dict) -> str:
+    if 'error' in result:
+        return '{} / {}: failed with {}'.format(part_name, strategy, result['error'])
+    lines = ['{} / {}: {} of {} layers, load {:.2f} s, {:.2f} layers/s overall'.format(
+        part_name, strategy, result['layers'], result['num_layers'], result['load_time'], result['layers_per_sec'] or 0)]
+    for stage, stats in result['stages'].items():
+        line = '    {:<6s} {:8.2f} layers/s'.format(stage, stats['layers_per_sec'] or 0)
+        if 'peak_memory_mb' in stats:
+            line += '  peak {:8.2f} MB'.format(stats['peak_memory_mb'])
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main():
+    args = parse_args()
+
+    if args.startup:
+        startup = measure_startup(args.startup_runs)
+        print("main.py startup: {:.2f} s (budget {:.2f} s)".format(startup, STARTUP_BUDGET))
+        if startup > STARTUP_BUDGET:
+            print("Startup is over budget; check for new imports in main.py that could be deferred "
+                  "(python -X importtime main.py --help)")
+            sys.exit(1)
+        return
+
+    parts = args.parts
+    if parts is None:
+        parts = sorted(os.path.basename(path) for path in glob.glob('geometry/*') if path.lower().endswith('.stl'))
+
+    results = {'settings': {'max_layers': args.max_layers, 'platform': platform.platform(), **machine_settings()},
+               'results': {}, 'failed': {}}
+    for part_name in parts:
+        for strategy in args.strategies:
+            try:
+                result = benchmark(part_name, strategy, args.max_layers, not args.no_memory)
+            except Exception as e:
+                # e.g. IslandHatcher fails on every part (see the README); the other combinations still get run
+                result = {'error': '{}: {}'.format(type(e).__name__, e)}
+                results['failed'].setdefault(part_name, {})[strategy] = result['error']
+            else:
+                results['results'].setdefault(part_name, {})[strategy] = result
+            print(format_result(part_name, strategy, result), flush=True)
+
+    for path in (args.output, args.save_baseline):
+        if path is not None:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+
+    if args.save_baseline is None and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        mismatches = machine_mismatches(results['settings'], baseline['settings'])
+        if mismatches:
+            print("{} was recorded on a different machine, so its timings aren't comparable:".format(args.baseline))
+            for mismatch in mismatches:
+                print('    ' + mismatch)
+            if not args.ignore_machine:
+                print("Skipping the comparison; re-record the baseline with --save-baseline, or pass --ignore-machine")
+                return
+
+        if baseline['settings'].get('max_layers') != args.max_layers:
+            print("Baseline was run with --max-layers {}, so its layers/s aren't comparable".format(
+                baseline['settings'].get('max_layers')))
+
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("Regressions against {}:".format(args.baseline))
+            for regression in regressions:
+                print('    ' + regression)
+            sys.exit(1)
+        print("No regressions against {}".format(args.baseline))
+
+
+if __name__ == "__main__":
+    main()
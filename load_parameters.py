@@ -57,4 +57,30 @@ def get_value_of_attribute(value, data_type):
     elif data_type == "bool":
         return True if value == "Yes" else False
     else:
-        return value
\ No newline at end of file
+        return value
+
+# Returns the default config with the given option selections applied on top, e.g. {"Part File Name": "nut.stl"}
+# Values may be given stringified (as the UI does) or already typed
+def override_config(overrides):
+    with open(os.path.abspath("schema.json"), "r") as f:
+        schema = json.load(f)
+    data_types = {}
+    for category in schema:
+        if category in special_keys:
+            continue
+        for attribute in schema[category]:
+            data_types[attribute["name"]] = attribute["type"]
+
+    config = default_config()
+
+    # Strategy specific options get their defaults too, so only the strategy needs to be chosen
+    for category in schema["Strategy Specific"]:
+        for attribute in schema["Strategy Specific"][category]:
+            data_types[attribute["name"]] = attribute["type"]
+            config[attribute["name"]] = get_value_of_attribute(attribute["default"], attribute["type"])
+
+    for key, value in overrides.items():
+        if isinstance(value, str) and key in data_types:
+            value = get_value_of_attribute(value, data_types[key])
+        config[key] = value
+    return config
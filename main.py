@@ -1,244 +1,399 @@
 # Standard Library Imports
 import sys
 import os
-import glob
-import time
-import statistics as stats
-import json 
+import json
+import argparse
+import cProfile
 
 # Third-Party Imports
-import numpy as np
-import matplotlib.pyplot as plt
 from tqdm import tqdm
-import sklearn.preprocessing as skp
-import pandas as pd 
-from pprint import pprint 
 
 # Local Imports
+# NOTE: The UI starts a new process for every run, so only what's needed to write the XML is imported here. Plotting,
+# analysis, Excel (scanpath switching) and HDF5 dependencies are imported where a feature actually uses them; keep
+# it that way, as every import here adds to the startup time (see benchmark.py --startup)
 sys.path.insert(0, os.path.abspath("./")) # Hacky way to ensure Python can find local modules
-sys.path.insert(0, os.path.abspath("pyslm")) 
-print(sys.path)
+sys.path.insert(0, os.path.abspath("pyslm"))
 import pyslm
-import pyslm.visualise
-import pyslm.analysis
-import pyslm.geometry
-from pyslm.hatching.islandHatcher import IslandHatcher
-from src.output.alsamTypes import SegmentStyle,VelocityProfile,Wobble,Traveler
-from pyslm.hatching import hatching, LinearSort
-from pyslm.geometry import HatchGeometry
-# from pyslm.hatching.multiple import hatch_multiple
-from src.standardization.shortening import split_long_vectors
-from src.standardization.lengthening import lengthen_short_vectors
-from src.island.island import BasicIslandHatcherRandomOrder
-from src.scanpath_switching.scanpath_switching import excel_to_array, array_to_instances
-from src.output.xml_hdf5_io_2 import XMLWriter, xml_to_hdf5
-import src.output.HDF5Util as HDF5Util
-
-
-# Handle first command line argument, which is a JSON-serialized list of the user's option selections
-# Go from our standardized source of fields, or our "schema"
+from src.output.xml_hdf5_io_2 import XMLWriter
+from src.pipeline.pipeline import part_file_path, create_part, create_hatcher, create_segment_styles, \
+    create_velocity_profiles, layer_heights, select_layers, fix_polygons_mode, clipper_slices, generate_layers, \
+    HatchAngles
+from src.pipeline.cache import LayerCache, HatchedFlags, build_digest
+from src.pipeline.stages import create_stages, run_stages, report_stages
+from src.pipeline.checkpoint import Checkpoint, run_digest
+from src.pipeline.timings import LayerTimings
+from src.pipeline.batch import load_jobs, run_batch
+from src.pipeline.plate import load_plate, create_plate, plate_digest, generate_plate_layers
+from src.pipeline.slice_stack import SliceStack, write_build_slices, generate_layers_from_slices
 from load_parameters import *
-if len(sys.argv) > 1:
-    print("First Command Line Argument: " + sys.argv[1], flush=True)
-    config_obj = json.loads(sys.argv[1])
-    config = parse_config(config_obj)
-else: 
-    print("First Command Line Argument not specified, using default config", flush=True)
-    config = default_config()
-print("Post-load config: " + str(config))
-
-# Handle second command line argument, which is a list of paths to add to the python path
-# ...it's a (hacky) way to ensure a given library (in our case, pyslm) gets properly loaded from the UI
-
-if len(sys.argv) > 2: 
-    print("Second Command Line Argument: " + sys.argv[2], flush=True)
-    for path in json.loads(sys.argv[2]):
-        print("Appending {} to PYTHONPATH.".format(path), flush=True)
-        sys.path.append(path)
-
-#%%
-
-# Initialize Part
-# config["Part File Name"] = "nist.stl"
-Part = pyslm.Part(config["Part File Name"])
-Part.setGeometry('geometry/' + config["Part File Name"])
-Part.origin = [0.0, 0.0, 0.0]
-Part.rotation = np.array([0, 0, 90])
-Part.dropToPlatform()
-
-# General Part Parameters 
-LAYER_THICKNESS = config["Layer Thickness"]  # [mm]
-
-# Special scan strategies need additional attributes supplied
-if config["Scan Strategy"] == "Island":
-    print("Island Hatching!")
-    hatcher = IslandHatcher()
-elif config["Scan Strategy"] == "Striping": 
-    print("Striping hatching!") 
-    hatcher = hatching.StripeHatcher()
-else:
-    print("Default hatching!")
-    hatcher = hatching.Hatcher()
-
-# Parameters used in the common hatching class used for any hatcher (default, island, striping)
-hatcher.hatchAngle = config["Hatch Angle"] # Hatch Angle
-hatcher.layerAngleIncrement = config["Hatch Angle Increment"] # [degrees]
-hatcher.hatchDistance = config["Hatch Distance"] # Hatch Distance
-hatcher.layerAngleIncrement = config["Hatch Angle Increment"] # Hatch Angle Increment
-hatcher.numInnerContours = config["# Inner Contours"] # Num Inner Contours
-hatcher.numOuterContours = config["# Outer Contours"] # Num Outer Contours
-hatcher.spotCompensation = config["Spot Compensation"] # Spot Compensation
-hatcher.volumeOffsetHatch = config["Volume Offset Hatch"] # Volume Offset Hatch 
-hatcher.scanContourFirst = config["Contour First"] # Whether to scan contours or hatches first
-hatcher.hatchSortMethod = LinearSort() # Which direction, essentially, to do vectors
-
-if config["Scan Strategy"] == "Island":
-    hatcher.islandWidth = config["Island Width"]
-    hatcher.islandOffset = config["Island Offset"]
-    hatcher.islandOverlap = config["Island Overlap"]
-
-elif config["Scan Strategy"] == "Striping": 
-    hatcher.stripeWidth = config["Stripe Width"]
-    hatcher.stripeOffset = config["Stripe Offset"]
-    hatcher.stripeOverlap = config["Stripe Overlap"]
-
-# Instantiate model and set model parameters
-model = pyslm.geometry.Model()
-model.mid = 1
-
-segStyleList=[]
-# pull segment style info from schema
-for style in config["Segment Styles"]:
-    ## Create new SegmentStyle object that contains segment style info
-    segStyle = SegmentStyle()   
-    
-    # Segment Style Info 
-    segStyle.id=style["id"] # TYPE: string
-    segStyle.vProfileID=style["velocityProfileID"] # TYPE: string
-    segStyle.laserMode=style["laserMode"] # TYPE: string from set {"Independent", "FollowMe"}
-    
-    # Create traveler list and add traveler objects to it
-    travelers=[]
-    for item in style["travelers"]:
-        traveler=Traveler()
-        traveler.id=item["id"] # TYPE: int
-        traveler.syncDelay=item["syncDelay"]
-        traveler.power=item["power"]  # TYPE: float (Watts)
-        traveler.spotSize=item["spotSize"]  # TYPE: float (microns)
-
-        # If wobble tag exists
-        if item["wobble"] is not None:
-            #pull wobble info
-            wobble=Wobble()
-            wobble.on=item["wobble"]["on"]
-            wobble.freq=item["wobble"]["freq"]
-            wobble.shape=item["wobble"]["shape"]
-            wobble.transAmp=item["wobble"]["transAmp"]
-            wobble.longAmp=item["wobble"]["longAmp"]
-            traveler.wobble=wobble
-
-        travelers.append(traveler)
-    # Attach travelers to SegmentStyle object
-    segStyle.travelers=travelers
-    segStyleList.append(segStyle)
-    
-vProfileList=[]
-for style in config["Velocity Profiles"]:
-    ## Create new VelocityProfile object that contains velocity profile info
-    vProfile = VelocityProfile()   
-    # Velocity Profile Info
-    vProfile.id=style["id"] # TYPE: string
-    vProfile.velocity=style["velocity"] # TYPE: float (mm/s)
-    vProfile.mode=style["mode"] # TYPE: string from set {"Delay", "Auto"}
-    vProfile.laserOnDelay=style["laserOnDelay"] # TYPE: float (microseconds)
-    vProfile.laserOffDelay=style["laserOffDelay"] # TYPE: float (microseconds)
-    vProfile.jumpDelay=style["jumpDelay"] # TYPE: float (microseconds)
-    vProfile.markDelay=style["markDelay"] # TYPE: float (microseconds)
-    vProfile.polygonDelay=style["polygonDelay"] # TYPE: float (microseconds)
-
-    vProfileList.append(vProfile)
-
-resolution = 0.2
-
-#%%
-'''
-STEP 2: Slice part, generate scan paths, control parameters while slicing the part 
-'''
-
-# Keep track of parameters
-layers = []
-layer_times = []
-layer_powers = []
-layer_speeds = []
-layer_segstyles = []
-
-# Perform the hatching operations
-# layer_segstyle = 11
-# layer_power = model.buildStyles[layer_segstyle].laserPower
-# layer_speed = model.buildStyles[layer_segstyle].laserSpeed
-# NOTE: file=* is b/c tqdm prints to stderr by default, but to handle properly in ui we need to redirect to stdout
-for z in tqdm(np.arange(0, Part.boundingBox[5],
-                        LAYER_THICKNESS), desc="Generating Vectors", unit="layers", file=sys.stdout, smoothing=0):
-
-    geom_slice = Part.getVectorSlice(z)  # Slice layer
-
-    # pyslm doesn't error out if Trimesh returns an empty slice, so we have to check
-    # This generally only occurs at the very beginning or end of the part 
-    if geom_slice == []:
-        continue
-
-    if "Use Scanpath Switching" in config and config["Use Scanpath Switching"]:
-        hatchers, areas = [], []
-        for pair in scanpath_area_pairs:
-            hatchers.append(pair[0])
-            areas.append(pair[1])
-        layer = hatch_multiple(hatchers[1:], areas[1:], hatchers[0], geom_slice, z)
-    else:
-        layer = hatcher.hatch(geom_slice)  # Hatch layer
-
-    # The layer height is set in integer increment of microns to ensure no rounding error during manufacturing
-    layer.z = int(z*1000)
-    for geometry in layer.geometry:
-        geometry.mid = 1
-        geometry.bid = 1
-
-    layers.append(layer)
-
-    # Hatch angle increment is handled inside pyslm
-
-'''
-If pulling .scn output from process, the data is available here for conversion
-
-Data available is in Lists after slicing and hatching completes
-
-    layer_times->list of ints describing time to execute each layer: generated from analysis of layer object by pyslm package
-    layer_powers->list of int or string arrays describing laser power
-    layer_speeds->list of ints describing laser speed
-    layer_segstyles->list of layer_segstyle objects
-    layers->list of instances Layer class objects defined in pyslm
-'''
-
-#%%
 
-'''
-This chunk should be able to go where needed. It requires an output directory to an empty or new folder so the zip output can produce a correct .scn file
-will need to ensure input sanitation when UI hooks into this component. 
-'''
 
-# NOTE: This folder name is hardcoded into 'cdme-scangen-ui' as well, so if you change it here, change it there
-# Also note that xmlWriter creates the given output folder if it doesn't already
-outputDir=os.path.abspath('XMLOutput')
-xmlWriter = XMLWriter(outputDir)
-
-#outputs xml layer files
-xmlWriter.output_xml(layers,segStyleList,vProfileList, config["Contour Default ID"], config["Hatch Default ID"])
-
-#outputs .scn file in same location as xml layer files
-# xmlWriter.output_zip()
-
-#%%
-#converts xlm output to an hdf5 file for use in external simulator
-# The UI disables this automatically (as it has an alternate mechanism for HDF5 export) and the schema has it disabled by default
-if config["Output .HDF5"]: 
-    hdf5Dir=os.path.abspath('HDF5Output')
-    HDF5Util.HDF5Util(os.path.abspath('XMLOutput'),'HDF5FromSCN.hdf5').convertSCNtoHDF5()
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generates scan paths for the part and options given in the config.")
+    # The UI passes these two positionally, so they have to stay that way
+    parser.add_argument("config", nargs="?", help="JSON-serialized list of the user's option selections")
+    parser.add_argument("paths", nargs="?", help="JSON-serialized list of paths to add to the python path")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes used to slice and hatch layers, or with --batch the number "
+                             "of jobs run at once (default: 1, i.e. serial)")
+    parser.add_argument("--batch", metavar="JOBS",
+                        help="Run every job in the JSON file JOBS, each with its own options and output folder, instead "
+                             "of a single run (see src/pipeline/batch.py for the format)")
+    parser.add_argument("--plate", metavar="PLATE",
+                        help="Build every part listed in the JSON file PLATE, each with its own position, rotation and "
+                             "scale, with all the parts of a layer merged into one layer file (see "
+                             "src/pipeline/plate.py for the format). The config's part file is not used")
+    slices = parser.add_mutually_exclusive_group()
+    slices.add_argument("--write-slices", metavar="DIR",
+                        help="Slice every layer of the part into a slice stack in DIR before hatching, so later runs "
+                             "can hatch it with --from-slices (see src/pipeline/slice_stack.py)")
+    slices.add_argument("--from-slices", metavar="DIR",
+                        help="Hatch the layers of the slice stack in DIR instead of slicing the part, e.g. to re-run "
+                             "with different hatching parameters. The config's part file is not used")
+    parser.add_argument("--repair-invalid-only", action="store_true",
+                        help="Only repair the slice polygons that are invalid, instead of offsetting every polygon by "
+                             "1 micron (the other polygons are then left exactly as sliced)")
+    parser.add_argument("--reuse-slice-topology", action="store_true",
+                        help="Reuse the loops traced for the previous slice when consecutive slices cross the same "
+                             "triangles, which is faster on prismatic parts. The boundaries are the same, but start at "
+                             "different points than by default")
+    parser.add_argument("--clipper-slices", action="store_true",
+                        help="Slice straight into pyclipper's scaled integer paths, which are hatched without "
+                             "converting them to shapely polygons and back. The boundaries can differ from the "
+                             "default by the 0.01 micron clipper resolution")
+    parser.add_argument("--scanline-clipping", action="store_true",
+                        help="Clip the hatches to the boundary by intersecting them with its edges directly in numpy "
+                             "rather than with pyclipper. The hatches match the default to within the 0.01 micron "
+                             "clipper resolution, but can be written in a slightly different order")
+    parser.add_argument("--hatch-extent", choices=("bbox", "boundary", "regions"),
+                        help="Only generate the hatches that cross the extent of the boundary in the hatch direction "
+                             "('boundary') or of one of its connected regions ('regions'), rather than across the "
+                             "square wrapping its bounding box ('bbox', the default). The hatches are the same, but "
+                             "fewer are clipped; those that tie in the sort can be written in a different order")
+    parser.add_argument("--slice-batch", type=int, default=64, metavar="N",
+                        help="Number of layers sliced together in one sweep through the mesh when generating layers "
+                             "serially; pass the number of layers to slice the whole build at once (default: 64)")
+    parser.add_argument("--stage-workers", type=int, nargs=3, metavar=("SLICE", "HATCH", "WRITE"),
+                        help="Run slicing, hatching and XML writing as overlapping stages, each with its own number of "
+                             "worker processes (0 runs a stage in the main process)")
+    parser.add_argument("--queue-size", type=int, default=4,
+                        help="Maximum number of layers each stage holds in flight when using --stage-workers (default: 4)")
+    parser.add_argument("--cache-dir",
+                        help="Directory for caching hatched layers. Re-runs that only change segment styles or "
+                             "velocity profiles then skip slicing and hatching")
+    parser.add_argument("--mesh-cache-dir",
+                        help="Directory for caching the repaired and positioned part mesh. Later runs on the same part "
+                             "load it from there instead of repairing it again")
+    parser.add_argument("--cache-size", type=float, default=2048,
+                        help="Size limit of the layer cache in MB; least recently used layers are evicted (default: 2048)")
+    parser.add_argument("--mesh-cache-size", type=float, default=2048,
+                        help="Size limit of the mesh cache in MB; least recently used meshes are evicted (default: 2048)")
+    layers = parser.add_mutually_exclusive_group()
+    layers.add_argument("--z-range", type=float, nargs=2, metavar=("ZMIN", "ZMAX"),
+                        help="Only generate the layers between these heights [mm], inclusive")
+    layers.add_argument("--layer-range", type=int, nargs=2, metavar=("FIRST", "LAST"),
+                        help="Only generate the layers with these indices, inclusive (the first layer is 0)")
+    parser.add_argument("--every", type=int, default=1, metavar="K",
+                        help="Only generate every K-th layer (of those selected), e.g. for a quick preview. Each layer "
+                             "keeps the hatch angle it has in the full build, which takes slicing every layer below it "
+                             "unless an earlier run of the build recorded which layers are hatched (in "
+                             "XMLOutput_hatched.json, or the --cache-dir)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from its last checkpoint instead of starting over. The "
+                             "output is the same as if the run had never been interrupted")
+    parser.add_argument("--checkpoint-every", type=int, default=50,
+                        help="Number of layers between checkpoints (default: 50)")
+    parser.add_argument("--timings", action="store_true",
+                        help="Record the time spent in each step of slicing, hatching and writing every layer, along "
+                             "with vector and vertex counts, as JSON lines in XMLOutput_timings.jsonl")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="Profile layer generation with cProfile and dump the stats to XMLOutput_profile.prof")
+    args = parser.parse_args()
+
+    if args.batch is not None and (args.stage_workers is not None or args.resume or args.timings or args.cprofile
+                                   or args.cache_dir is not None or args.mesh_cache_dir is not None
+                                   or args.plate is not None or args.write_slices is not None
+                                   or args.from_slices is not None
+                                   or args.repair_invalid_only or args.reuse_slice_topology or args.clipper_slices
+                                   or args.scanline_clipping or args.hatch_extent is not None
+                                   or args.z_range is not None
+                                   or args.layer_range is not None or args.every != 1):
+        parser.error("--batch can only be combined with --workers")
+    if args.every < 1:
+        parser.error("--every must be at least 1")
+    if args.slice_batch < 1:
+        parser.error("--slice-batch must be at least 1")
+    if args.stage_workers is not None and args.workers > 1:
+        parser.error("--workers and --stage-workers cannot be used together")
+    if args.plate is not None and (args.stage_workers is not None or args.timings):
+        parser.error("--plate can't be used with --stage-workers or --timings")
+    if (args.write_slices is not None or args.from_slices is not None) and \
+            (args.plate is not None or args.stage_workers is not None or args.timings):
+        parser.error("--write-slices and --from-slices can't be used with --plate, --stage-workers or --timings")
+    if args.timings and (args.stage_workers is not None or args.workers > 1):
+        parser.error("--timings needs the layers to be generated in this process, so it can't be used with "
+                     "--workers or --stage-workers")
+
+    return args
+
+
+def run_batch_jobs(args):
+    jobs = load_jobs(args.batch)
+    print("Running {} jobs with {} workers".format(len(jobs), args.workers), flush=True)
+
+    failed = 0
+    for result in tqdm(run_batch(jobs, args.workers), total=len(jobs), desc="Jobs", unit="jobs", file=sys.stdout, smoothing=0):
+        if "error" in result:
+            failed += 1
+            print("Job for {} failed:\n{}".format(result["output"], result["error"]), flush=True)
+        else:
+            print("Wrote {} layers to {} in {:.1f} s".format(result["layers"], result["output"], result["time"]), flush=True)
+
+    if failed:
+        sys.exit("{} of {} jobs failed".format(failed, len(jobs)))
+
+
+def main():
+    args = parse_args()
+
+    if args.batch is not None:
+        run_batch_jobs(args)
+        return
+
+    # Handle first command line argument, which is a JSON-serialized list of the user's option selections
+    # Go from our standardized source of fields, or our "schema"
+    if args.config is not None:
+        print("First Command Line Argument: " + args.config, flush=True)
+        config_obj = json.loads(args.config)
+        config = parse_config(config_obj)
+    else:
+        print("First Command Line Argument not specified, using default config", flush=True)
+        config = default_config()
+    if args.repair_invalid_only:
+        config["Repair Invalid Polygons Only"] = True
+    if args.reuse_slice_topology:
+        config["Reuse Slice Topology"] = True
+    if args.clipper_slices:
+        config["Clipper Slices"] = True
+    if args.scanline_clipping:
+        config["Hatch Clip Method"] = "scanline"
+    if args.hatch_extent is not None:
+        config["Hatch Extent"] = args.hatch_extent
+    print("Post-load config: " + str(config))
+
+    # Handle second command line argument, which is a list of paths to add to the python path
+    # ...it's a (hacky) way to ensure a given library (in our case, pyslm) gets properly loaded from the UI
+    if args.paths is not None:
+        print("Second Command Line Argument: " + args.paths, flush=True)
+        for path in json.loads(args.paths):
+            print("Appending {} to PYTHONPATH.".format(path), flush=True)
+            sys.path.append(path)
+
+    #%%
+
+    # Initialize Part
+    # config["Part File Name"] = "nist.stl"
+    # With --plate, Part is the whole build plate; it has the bounding box of all its parts
+    # With --from-slices, the part isn't loaded at all (Part is None)
+    plate = None
+    stack = None
+    meshCacheSize = int(args.mesh_cache_size * 1024**2)
+    if args.plate is not None:
+        plate = load_plate(args.plate)
+        Part = create_plate(plate, config, args.mesh_cache_dir, meshCacheSize)
+        print("Loaded {} parts onto the build plate".format(len(plate)), flush=True)
+    elif args.from_slices is not None:
+        stack = SliceStack(args.from_slices)
+        Part = None
+        print("Hatching the slices of {} from {}".format(stack.part, args.from_slices), flush=True)
+    else:
+        Part = create_part(config, args.mesh_cache_dir, meshCacheSize)
+
+    # General Part Parameters
+    LAYER_THICKNESS = config["Layer Thickness"]  # [mm]
+    if stack is not None and abs(stack.layer_thickness - float(LAYER_THICKNESS)) > 1e-9:
+        sys.exit("The slice stack has a layer thickness of {} mm, not {} mm".format(stack.layer_thickness,
+                                                                                  LAYER_THICKNESS))
+
+    # Special scan strategies need additional attributes supplied; see create_hatcher
+    hatcher = create_hatcher(config)
+
+    segStyleList = create_segment_styles(config)
+    vProfileList = create_velocity_profiles(config)
+
+    #%%
+    '''
+    STEP 2: Slice part, generate scan paths, control parameters while slicing the part
+    '''
+
+    # NOTE: This folder name is hardcoded into 'cdme-scangen-ui' as well, so if you change it here, change it there
+    # Also note that xmlWriter creates the given output folder if it doesn't already
+    outputDir=os.path.abspath('XMLOutput')
+    xmlWriter = XMLWriter(outputDir)
+
+    # The hatch angle of each layer is replayed in order (see HatchAngles), so the layers can be spread across worker
+    # processes (--workers) and still come out identical to a serial run
+    if stack is not None:
+        heights = stack.heights
+    else:
+        heights = layer_heights(Part, LAYER_THICKNESS)
+
+    if args.write_slices is not None:
+        # Every layer is sliced into the stack (whatever layers are selected below), which is then hatched from
+        print("Writing the slices of {} layers to {}".format(len(heights), args.write_slices), flush=True)
+        stack = write_build_slices(args.write_slices, Part, part_file_path(config), heights, config, args.slice_batch)
+
+    # Only the selected layers are generated, if a range or --every is given
+    layerIds = select_layers(heights, args.z_range, args.layer_range, args.every)
+    selected = len(layerIds) < len(heights)
+    if selected:
+        print("Generating {} of {} layers".format(len(layerIds), len(heights)), flush=True)
+
+    # Progress is checkpointed next to (not inside) the output folder, so it never ends up in the .scn
+    checkpointPath = outputDir + '_checkpoint.json'
+    if plate is not None:
+        buildDigest = plate_digest(plate, Part, hatcher, config)
+    elif Part is None:
+        buildDigest = stack.build_digest(hatcher)
+    else:
+        buildDigest = build_digest(part_file_path(config), Part, hatcher, fix_polygons_mode(config),
+                                   clipper_slices(config))
+    digest = run_digest(config, None, None, hatcher, layerIds if selected else None, build=buildDigest)
+    checkpoint = None
+    if args.resume:
+        checkpoint = Checkpoint.load(checkpointPath, digest, len(heights), hatcher, args.checkpoint_every)
+        if checkpoint is None:
+            print("No checkpoint found at {}, starting from the first layer".format(checkpointPath), flush=True)
+        else:
+            missing = checkpoint.missing_files(outputDir)
+            if missing:
+                sys.exit("Cannot resume: {} layer files from the checkpoint are missing from {}".format(len(missing), outputDir))
+            # Layer files written after the checkpoint was saved get regenerated
+            xmlWriter.remove_layers_after(checkpoint.layer_num)
+            print("Resuming from layer {} ({} layer files already written)".format(
+                checkpoint.next_layer_id, checkpoint.layer_num), flush=True)
+
+    if checkpoint is None:
+        xmlWriter.prepare_output_dir()
+        checkpoint = Checkpoint(checkpointPath, digest, len(heights), hatcher, args.checkpoint_every)
+
+    #converts xlm output to an hdf5 file for use in external simulator
+    # The UI disables this automatically (as it has an alternate mechanism for HDF5 export) and the schema has it disabled by default
+    hdf5Util = None
+    if config["Output .HDF5"]:
+        import src.output.HDF5Util as HDF5Util # Pulls in h5py, which is only needed here
+        hdf5Util = HDF5Util.HDF5Util(outputDir,'HDF5FromSCN.hdf5')
+        # The HDF5 file is rewritten from scratch, so when resuming the layers written before have to go back in
+        for layerNum in range(1, checkpoint.layer_num + 1):
+            hdf5Util.convertLayer(xmlWriter.layer_path(layerNum), layerNum - 1)
+
+    cache = None
+    if args.cache_dir is not None:
+        cache = LayerCache(args.cache_dir, int(args.cache_size * 1024**2), buildDigest)
+
+    # Which layers are hatched is kept next to the output folder (as for the checkpoint), so a later run of the same
+    # build, e.g. a preview of a few layers, knows the hatch angle of every layer without slicing the layers below them
+    flags = HatchedFlags(outputDir + '_hatched.json', buildDigest, cache)
+
+    # Instrumenting changes the attributes of the hatcher, so this has to come after anything that hashes them
+    timings = None
+    if args.timings:
+        timings = LayerTimings(outputDir + '_timings.jsonl', append=args.resume)
+        timings.instrument(Part, hatcher, xmlWriter)
+
+    profiler = None
+    if args.cprofile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    # Layers are streamed straight from the slicer/hatcher into the output files rather than collected in a list,
+    # so memory doesn't grow with the build height and output appears as soon as each layer is done
+    todo = layerIds[layerIds >= checkpoint.next_layer_id]
+    done = len(layerIds) - len(todo)
+    angles = HatchAngles(hatcher, checkpoint.next_layer_id, checkpoint.hatch_angle)
+    try:
+        if args.stage_workers is not None:
+            # Slicing, hatching and writing overlap, each on its own pool of workers
+            stages = create_stages(config, outputDir, args.stage_workers, args.queue_size, args.mesh_cache_dir,
+                                   meshCacheSize)
+            progress = lambda hatched: tqdm(hatched, initial=done, total=len(layerIds), desc="Generating Vectors",
+                                            unit="layers", file=sys.stdout, smoothing=0)
+
+            for layerId, layerNum, xmlPath in run_stages(stages, heights, todo, angles, progress, cache,
+                                                         checkpoint.layer_num, Part, flags):
+                if hdf5Util is not None:
+                    hdf5Util.convertLayer(xmlPath, layerNum - 1)
+                checkpoint.update(layerId, angles[layerId], xmlPath)
+
+            print(report_stages(stages), flush=True)
+        else:
+            layerNum = checkpoint.layer_num
+
+            # NOTE: file=* is b/c tqdm prints to stderr by default, but to handle properly in ui we need to redirect to stdout
+            # Timings are recorded per layer, so each layer is sliced on its own then
+            sliceBatch = 1 if timings is not None else args.slice_batch
+            if stack is not None:
+                layers = generate_layers_from_slices(stack, hatcher, config, workers=args.workers, cache=cache,
+                                                     layer_ids=todo, angles=angles, flags=flags)
+            elif plate is not None:
+                layers = generate_plate_layers(plate, Part, hatcher, heights, config, workers=args.workers, cache=cache,
+                                               layer_ids=todo, slice_batch=sliceBatch,
+                                               mesh_cache_dir=args.mesh_cache_dir, mesh_cache_size=meshCacheSize,
+                                               angles=angles, flags=flags)
+            else:
+                layers = generate_layers(Part, hatcher, heights, config, workers=args.workers, cache=cache,
+                                         layer_ids=todo, slice_batch=sliceBatch, mesh_cache_dir=args.mesh_cache_dir,
+                                         mesh_cache_size=meshCacheSize, angles=angles, flags=flags)
+            layers = tqdm(layers, initial=done, total=len(layerIds), desc="Generating Vectors", unit="layers", file=sys.stdout, smoothing=0)
+            for layerId, layer in zip(todo, layers):
+
+                # Empty slices are skipped; see generate_layer
+                if layer is None:
+                    checkpoint.update(layerId, angles[layerId])
+                    if timings is not None:
+                        timings.end_layer(layerId, heights[layerId])
+                    continue
+
+                layerNum += 1
+
+                #outputs xml layer file
+                xmlWriter.write_layer(layer, layerNum, segStyleList, vProfileList, config["Contour Default ID"], config["Hatch Default ID"])
+
+                if hdf5Util is not None:
+                    hdf5Util.convertLayer(xmlWriter.layer_path(layerNum), layerNum - 1)
+
+                checkpoint.update(layerId, angles[layerId], xmlWriter.layer_path(layerNum))
+                if timings is not None:
+                    timings.end_layer(layerId, heights[layerId], layerNum)
+    except BaseException:
+        # Keep whatever was finished since the last periodic checkpoint, e.g. when stopped with Ctrl+C
+        checkpoint.save()
+        raise
+    finally:
+        flags.save()
+        if timings is not None:
+            timings.close()
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(outputDir + '_profile.prof')
+
+    checkpoint.remove()
+
+    if hdf5Util is not None:
+        hdf5Util.close()
+
+    if cache is not None:
+        print(cache.report(), flush=True)
+
+    # Polygons repaired in worker processes are added to the count of the part in this process
+    if args.repair_invalid_only and Part is not None:
+        print("Repaired {} invalid slice polygons".format(Part.numRepairedPolygons), flush=True)
+
+    #outputs .scn file in same location as xml layer files
+    # xmlWriter.output_zip()
+
+
+# Worker processes (see --workers) re-import this file on Windows, so nothing may run at import time
+if __name__ == "__main__":
+    main()
@@ -29,6 +29,8 @@ import time as _time
 import warnings as _warnings
 import numbers as _numbers
 
+import numpy as _np
+
 from cython.operator cimport dereference as deref
 
 cdef extern from "Python.h":
@@ -637,6 +639,28 @@ cdef class Pyclipper:
             raise ClipperException('All paths are invalid for clipping')
         return result
 
+    def AddPathsArray(self, coords, offsets, PolyType poly_type, closed=True):
+        """ Add paths packed into numpy arrays, without converting them to python lists first.
+
+        Keyword arguments:
+        coords    -- (n, 2) or (n, 3) integer array of the points of every path, one path after the other
+        offsets   -- (m + 1,) integer array of the index of the first point of each path into coords, followed by n,
+                     i.e. the points of path i are coords[offsets[i]:offsets[i + 1]]
+        poly_type -- type of added paths - subject or clip
+        closed    -- True if added paths are closed, False if open
+
+        Returns:
+        True -- all or some paths are valid for clipping and were added
+
+        Raises:
+        ClipperException -- all paths are invalid for clipping
+        """
+        cdef Paths c_paths = _to_clipper_paths_array(_as_coords_array(coords), _as_offsets_array(offsets, coords))
+        cdef bint result = <bint> self.thisptr.AddPaths(c_paths, poly_type, <bint> closed)
+        if not result:
+            raise ClipperException('All paths are invalid for clipping')
+        return result
+
     def Clear(self):
         """ Removes all subject and clip polygons.
         More info: http://www.angusj.com/delphi/clipper/documentation/Docs/Units/ClipperLib/Classes/ClipperBase/Methods/Clear.htm
@@ -701,6 +725,49 @@ cdef class Pyclipper:
             raise ClipperException('Execution of clipper did not succeed!')
         return _from_poly_tree(solution)
 
+    def ExecuteArray(self, ClipType clip_type,
+                     PolyFillType subj_fill_type=pftEvenOdd, PolyFillType clip_fill_type=pftEvenOdd):
+        """ Performs the clipping operation and returns the resulting paths packed into numpy arrays. The paths are
+        taken from the PolyTree of the solution, as PolyTreeToPaths does, so open paths may be clipped too.
+
+        Keyword arguments:
+        clip_type      -- type of the clipping operation
+        subj_fill_type -- fill rule of subject paths
+        clip_fill_type -- fill rule of clip paths
+
+        Returns:
+        (coords, offsets) -- (n, 3) int64 array of the points of every path and (m + 1,) int64 array of the index of
+                             the first point of each path into coords, as taken by AddPathsArray
+
+        Raises:
+        ClipperException -- operation did not succeed
+        """
+        coords, offsets, parents = self.Execute2Array(clip_type, subj_fill_type, clip_fill_type)
+        return coords, offsets
+
+    def Execute2Array(self, ClipType clip_type,
+                      PolyFillType subj_fill_type=pftEvenOdd, PolyFillType clip_fill_type=pftEvenOdd):
+        """ Performs the clipping operation and returns the PolyTree of the solution packed into numpy arrays.
+
+        Keyword arguments:
+        clip_type      -- type of the clipping operation
+        subj_fill_type -- fill rule of subject paths
+        clip_fill_type -- fill rule of clip paths
+
+        Returns:
+        (coords, offsets, parents) -- the contour of every node of the tree in depth-first order, packed as returned by
+                                      ExecuteArray, and (m,) int64 array of the index of the parent of each node
+                                      (-1 for the outermost nodes)
+
+        Raises:
+        ClipperException -- operation did not succeed
+        """
+        cdef PolyTree solution
+        cdef object success = <bint> self.thisptr.Execute(clip_type, solution, subj_fill_type, clip_fill_type)
+        if not success:
+            raise ClipperException('Execution of clipper did not succeed!')
+        return _from_poly_tree_array(solution)
+
     property ReverseSolution:
         """ Should polygons returned from Execute/Execute2 have their orientations
         opposite to their normal orientations.
@@ -776,6 +843,18 @@ cdef class PyclipperOffset:
         cdef Paths c_paths = _to_clipper_paths(paths)
         self.thisptr.AddPaths(c_paths, join_type, end_type)
 
+    def AddPathsArray(self, coords, offsets, JoinType join_type, EndType end_type):
+        """ Add paths packed into numpy arrays, without converting them to python lists first.
+
+        Keyword arguments:
+        coords    -- (n, 2) or (n, 3) integer array of the points of every path, one path after the other
+        offsets   -- (m + 1,) integer array of the index of the first point of each path into coords, followed by n
+        join_type -- join type of added paths
+        end_type  -- end type of added paths
+        """
+        cdef Paths c_paths = _to_clipper_paths_array(_as_coords_array(coords), _as_offsets_array(offsets, coords))
+        self.thisptr.AddPaths(c_paths, join_type, end_type)
+
     def Execute(self, double delta):
         """ Performs the offset operation and returns a list of offset paths.
         More info: http://www.angusj.com/delphi/clipper/documentation/Docs/Units/ClipperLib/Classes/ClipperOffset/Methods/Execute.htm
@@ -806,6 +885,37 @@ cdef class PyclipperOffset:
         self.thisptr.Execute(solution, delta)
         return _from_poly_tree(solution)
 
+    def ExecuteArray(self, double delta):
+        """ Performs the offset operation and returns the offset paths packed into numpy arrays.
+
+        Keyword arguments:
+        delta -- amount to which the supplied paths will be offset - negative delta shrinks polygons,
+                 positive delta expands them.
+
+        Returns:
+        (coords, offsets) -- (n, 3) int64 array of the points of every path and (m + 1,) int64 array of the index of
+                             the first point of each path into coords, as taken by AddPathsArray
+        """
+        cdef Paths c_solution
+        self.thisptr.Execute(c_solution, delta)
+        return _from_clipper_paths_array(c_solution)
+
+    def Execute2Array(self, double delta):
+        """ Performs the offset operation and returns the PolyTree of the offset paths packed into numpy arrays.
+
+        Keyword arguments:
+        delta -- amount to which the supplied paths will be offset - negative delta shrinks polygons,
+                 positive delta expands them.
+
+        Returns:
+        (coords, offsets, parents) -- the contour of every node of the tree in depth-first order, packed as returned by
+                                      ExecuteArray, and (m,) int64 array of the index of the parent of each node
+                                      (-1 for the outermost nodes)
+        """
+        cdef PolyTree solution
+        self.thisptr.Execute(solution, delta)
+        return _from_poly_tree_array(solution)
+
     def Clear(self):
         """ Clears all paths.
 
@@ -934,6 +1044,104 @@ cdef object _from_clipper_path(Path path):
     return poly
 
 
+def _as_coords_array(coords):
+    coords = _np.ascontiguousarray(coords, dtype=_np.int64)
+    if coords.ndim != 2 or coords.shape[1] not in (2, 3):
+        raise ValueError('The coordinates must be an (n, 2) or (n, 3) array')
+    return coords
+
+
+def _as_offsets_array(offsets, coords):
+    offsets = _np.ascontiguousarray(offsets, dtype=_np.int64)
+    if offsets.ndim != 1 or len(offsets) == 0 or offsets[0] != 0 or offsets[-1] != len(coords) \
+            or _np.any(offsets[1:] < offsets[:-1]):
+        raise ValueError('The offsets must increase from 0 to the number of points')
+    return offsets
+
+
+cdef Paths _to_clipper_paths_array(const cInt[:, ::1] coords, const cInt[::1] offsets):
+    cdef Paths paths = Paths()
+    cdef Path path
+    cdef IntPoint point
+    cdef Py_ssize_t i, j
+    cdef bint has_z = coords.shape[1] > 2
+
+    point.Z = 0
+    for i in range(offsets.shape[0] - 1):
+        path = Path()
+        for j in range(offsets[i], offsets[i + 1]):
+            point.X = coords[j, 0]
+            point.Y = coords[j, 1]
+            if has_z:
+                point.Z = coords[j, 2]
+            path.push_back(point)
+        paths.push_back(path)
+    return paths
+
+
+cdef object _from_clipper_paths_array(Paths &paths):
+    cdef vector[Path] c_paths
+    cdef Py_ssize_t i
+    for i in range(paths.size()):
+        c_paths.push_back(paths[i])
+    return _pack_paths(c_paths)
+
+
+cdef object _pack_paths(vector[Path] &paths):
+    cdef Py_ssize_t i, j, k = 0
+    cdef Py_ssize_t num_points = 0
+    cdef cInt[:, ::1] coords_view
+    cdef cInt[::1] offsets_view
+    cdef IntPoint point
+
+    for i in range(paths.size()):
+        num_points += paths[i].size()
+
+    coords = _np.empty((num_points, 3), dtype=_np.int64)
+    offsets = _np.empty(paths.size() + 1, dtype=_np.int64)
+    coords_view = coords
+    offsets_view = offsets
+
+    for i in range(paths.size()):
+        offsets_view[i] = k
+        for j in range(paths[i].size()):
+            point = paths[i][j]
+            coords_view[k, 0] = point.X
+            coords_view[k, 1] = point.Y
+            coords_view[k, 2] = point.Z
+            k += 1
+    offsets_view[paths.size()] = k
+
+    return coords, offsets
+
+
+cdef void _walk_poly_nodes(PolyNode *c_polynode, Py_ssize_t parent,
+                           vector[Path] &contours, vector[Py_ssize_t] &parents):
+    cdef Py_ssize_t i, index
+    cdef PolyNode *c_child
+    for i in range(c_polynode.ChildCount()):
+        c_child = c_polynode.Childs[i]
+        index = contours.size()
+        contours.push_back(c_child.Contour)
+        parents.push_back(parent)
+        _walk_poly_nodes(c_child, index, contours, parents)
+
+
+cdef object _from_poly_tree_array(PolyTree &c_polytree):
+    cdef vector[Path] contours
+    cdef vector[Py_ssize_t] c_parents
+    cdef Py_ssize_t i
+
+    _walk_poly_nodes(&c_polytree, -1, contours, c_parents)
+
+    coords, offsets = _pack_paths(contours)
+    parents = _np.empty(c_parents.size(), dtype=_np.int64)
+    for i in range(c_parents.size()):
+        parents[i] = c_parents[i]
+
+    return coords, offsets, parents
+
+
 def _check_scaling_factor():
     """
     Check whether SCALING_FACTOR has been set by the code using this library and warn the user that it has been
@@ -1,17 +1,69 @@
 from abc import ABC
-from typing import Any, List, Optional, Tuple
+from typing import Any, List, Optional, Tuple, Union
+import hashlib
 import logging
+import os
 
 import numpy as np
 import networkx as nx
+import pyclipper
 import trimesh
 
 
 from shapely.geometry import Polygon
 from shapely.ops import unary_union
 
+try:
+    # Vectorised operations on arrays of geometries, available from Shapely 2.0
+    from shapely import buffer as shapelyBuffer, is_valid as shapelyIsValid
+except ImportError:
+    shapelyBuffer = None
+    shapelyIsValid = None
+
 from scipy.spatial.qhull import ConvexHull
 
+from .stl import isBinarySTL, readBinarySTL
+
+
+class ClipperPaths(list):
+    """
+    A list of closed paths in the scaled integer coordinate system used by
+    `PyClipper <https://pypi.org/project/pyclipper/>`_, i.e. the original coordinates multiplied by
+    :attr:`scaleFactor` and truncated. The hatchers in :mod:`pyslm.hatching` recognise these paths and pass them to
+    PyClipper as they are, rather than scaling them to and from the floating point coordinate system.
+
+    The paths are either stored flat, as returned by :meth:`Part.getClipperSlice`, or grouped by polygon, as returned by
+    :meth:`~pyslm.hatching.BaseHatcher.offsetBoundary`.
+    """
+
+    def __init__(self, paths: Optional[List[Any]] = None, scaleFactor: float = 1e5):
+        super().__init__(paths if paths is not None else [])
+        self.scaleFactor = scaleFactor
+
+    def coordinates(self) -> np.ndarray:
+        """
+        Returns the (nx2) scaled integer coordinates of every point across all the paths
+        """
+        paths = []
+        for item in self:
+            if len(item) > 0 and np.ndim(item[0]) > 1:
+                # A polygon, i.e. a list of paths
+                paths += [np.asarray(path, dtype=np.int64)[:, :2] for path in item]
+            else:
+                paths.append(np.asarray(item, dtype=np.int64)[:, :2])
+
+        if len(paths) == 0:
+            return np.empty((0, 2), dtype=np.int64)
+
+        return np.vstack(paths)
+
+    def boundingBox(self) -> np.ndarray:
+        """
+        Returns the (1x4) bounding box of the paths in the original floating point coordinate system
+        """
+        coords = self.coordinates()
+        return np.hstack([np.min(coords, axis=0), np.max(coords, axis=0)]) / self.scaleFactor
+
 
 class DocumentObject(ABC):
 
@@ -180,6 +232,12 @@ class Part(DocumentObject):
     _partType = 'Part'
     """ The part type is a static class attribute used for classifying the part when used in the document tree. """
 
+    MESH_CACHE_VERSION = 1
+    """
+    Version of the mesh cache files written when using the `cacheDir` of :meth:`setGeometry`. Changing it invalidates
+    any previously cached meshes.
+    """
+
     POLYGON_FIX_EPSILON = 1e-3
     """ 
     Constant value used for repairing invalid/broken polygon regions obtained using :meth:`getVectorSlice`
@@ -195,6 +253,24 @@ class Part(DocumentObject):
 
         self._bbox = np.zeros((1, 6))
 
+        # Index of the faces' z-ranges, built along with the geometry cache (see _buildFaceIndex)
+        self._faceZMin = None
+        self._faceZMax = None
+        self._faceIndex = []
+
+        # Reuse the loops traced for the previous section when slicing (see _linesToPath). This changes where each
+        # boundary starts compared to slicing without it.
+        self.reuseSliceTopology = False
+        self._sliceTopology = None
+
+        # Number of invalid polygons repaired by getVectorSlice with fixPolygons='invalid'
+        self.numRepairedPolygons = 0
+
+        # Mesh cache used by setGeometry and regenerate, if enabled
+        self._meshCacheDir = None
+        self._meshCacheKey = None
+        self._meshCacheSize = None
+
         self._rotation = np.array((0.0, 0.0, 0.0))
         self._scaleFactor = np.array((1.0, 1.0, 1.0))
         self._origin = np.array((0.0, 0.0, 0.0))
@@ -296,28 +372,69 @@ class Part(DocumentObject):
 
     def setGeometry(self, geometry,
                     fixGeometry: Optional[bool] = True,
-                    mergeVertices: Optional[bool] = True) -> None:
+                    mergeVertices: Optional[bool] = True,
+                    cacheDir: Optional[str] = None,
+                    cacheSize: Optional[int] = None) -> None:
         """
         Sets the Part geometry based on a mesh filename. The mesh must have a compatible file that can be
         imported via `trimesh` - see .
 
+        When a `cacheDir` is given, the repaired mesh is stored there as `.npy` arrays keyed by a hash of the file and
+        the repair options, as is the transformed geometry generated by :meth:`regenerate` for each transformation.
+        Later loads of the same file then skip repairing and transforming the mesh, and memory-map the cached arrays
+        instead of reading them. If a `cacheSize` is given, the least recently used meshes are evicted from the cache
+        once it grows past that size.
+
+        Without `fixGeometry`, binary STL files are read directly into the vertex and face arrays using
+        :func:`readBinarySTL`, which avoids the copies of the mesh made by loading it through `trimesh`.
+
         :param filename: The mesh filename
         :param fixGeometry: Use Trimesh's utilities to fix the mesh: Default = `True`
         :param mergeVertices:  Merges the vertices of the mesh: Default = `True`
+        :param cacheDir: Directory used for caching the repaired and transformed mesh: Default = `None`
+        :param cacheSize: Size limit of the mesh cache in bytes: Default = `None` (no limit)
         """
 
+        self._meshCacheDir = None
+        self._meshCacheKey = None
+        self._meshCacheSize = cacheSize
+        cachedMesh = None
+        needsMerge = mergeVertices
+
         if isinstance(geometry, trimesh.Trimesh):
             self._geometry = geometry
         else:
             logging.info('Geometry information <{:s}> - [{:s}]'.format(self.name, geometry))
-            self._geometry = trimesh.load_mesh(geometry, process=False, use_embree=False, Validate_faces=False)
 
-        if mergeVertices:
-            self._geometry.merge_vertices()
+            if cacheDir is not None:
+                os.makedirs(cacheDir, exist_ok=True)
+                self._meshCacheDir = cacheDir
+                self._meshCacheKey = self._meshFileKey(geometry, fixGeometry, mergeVertices)
+                cachedMesh = self._loadCachedMesh(self._meshCacheKey)
+                # Applies the size limit to what earlier runs left in the cache, as a hit doesn't write to it
+                self._evictCachedMeshes(keep=(self._meshCacheKey,))
+
+            if cachedMesh is not None:
+                logging.info('\t Loaded the repaired mesh from the cache')
+                self._geometry = cachedMesh
+            elif not fixGeometry and isBinarySTL(geometry):
+                # The vertices are merged as the file is read
+                vertices, faces = readBinarySTL(geometry, mergeVertices)
+                self._geometry = trimesh.Trimesh(vertices=vertices, faces=faces, process=False, validate=False)
+                needsMerge = False
+            else:
+                self._geometry = trimesh.load_mesh(geometry, process=False, use_embree=False, Validate_faces=False)
+
+        if cachedMesh is None:
+            if needsMerge:
+                self._geometry.merge_vertices()
+
+            if fixGeometry:
+                self._geometry.process(validate=True)
+                self._geometry.fix_normals()
 
-        if fixGeometry:
-            self._geometry.process(validate=True)
-            self._geometry.fix_normals()
+            if self._meshCacheKey is not None:
+                self._saveCachedMesh(self._meshCacheKey, self._geometry)
 
         logging.info('\t Bounds: [{:.3f},{:.3f},{:.3f}], [{:.3f},{:.3f},{:.3f}]'.format(*self._geometry.bounds.ravel()))
         logging.info('\t Extent: [{:.3f},{:.3f},{:.3f}]'.format(*self._geometry.extents))
@@ -325,6 +442,92 @@ class Part(DocumentObject):
         self.checkGeometry()
         self._dirty = True
 
+    def _meshFileKey(self, filename: str, fixGeometry: bool, mergeVertices: bool) -> str:
+        """
+        Key of the repaired mesh of a file in the mesh cache, from the file contents and the repair options.
+        """
+        h = hashlib.sha256()
+
+        with open(filename, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+
+        h.update('{:d} {:s} {:d} {:d}'.format(Part.MESH_CACHE_VERSION, trimesh.__version__,
+                                              bool(fixGeometry), bool(mergeVertices)).encode())
+        return h.hexdigest()
+
+    def _meshCachePaths(self, key: str) -> Tuple[str, str]:
+        return (os.path.join(self._meshCacheDir, key + '_vertices.npy'),
+                os.path.join(self._meshCacheDir, key + '_faces.npy'))
+
+    def _loadCachedMesh(self, key: str) -> Optional[trimesh.Trimesh]:
+        """
+        Loads a mesh from the cache as a Trimesh backed by (read-only) memory-mapped arrays, or returns None if it is
+        not cached.
+        """
+        verticesPath, facesPath = self._meshCachePaths(key)
+
+        if not (os.path.exists(verticesPath) and os.path.exists(facesPath)):
+            return None
+
+        vertices = np.load(verticesPath, mmap_mode='r')
+        faces = np.load(facesPath, mmap_mode='r')
+
+        # The modification time of the cached files is the last use of the mesh (see _evictCachedMeshes)
+        for path in (verticesPath, facesPath):
+            os.utime(path)
+
+        return trimesh.Trimesh(vertices=vertices, faces=faces, process=False, validate=False)
+
+    def _saveCachedMesh(self, key: str, mesh: trimesh.Trimesh) -> None:
+        """
+        Stores the vertices and faces of a mesh in the cache
+        """
+        for path, values in zip(self._meshCachePaths(key), (mesh.vertices, mesh.faces)):
+            # Written under a temporary name first so an interrupted run never leaves a truncated array behind
+            tmpPath = path + '.tmp'
+            with open(tmpPath, 'wb') as f:
+                np.save(f, np.asarray(values))
+            os.replace(tmpPath, path)
+
+        self._evictCachedMeshes(keep=(key, self._meshCacheKey))
+
+    def _evictCachedMeshes(self, keep: Tuple[str, ...] = ()) -> None:
+        """
+        Evicts the least recently used meshes from the cache until it is within its size limit, if it has one. The
+        meshes with the keys in `keep` (e.g. the one just written) are never evicted.
+        """
+        if self._meshCacheSize is None:
+            return
+
+        # Last use and total size of the files of each mesh, keyed by the mesh
+        meshes = {}
+        for entry in os.scandir(self._meshCacheDir):
+            for suffix in ('_vertices.npy', '_faces.npy'):
+                if entry.name.endswith(suffix):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+
+                    key = entry.name[:-len(suffix)]
+                    lastUse, size = meshes.get(key, (0.0, 0))
+                    meshes[key] = (max(lastUse, stat.st_mtime), size + stat.st_size)
+
+        cacheSize = sum(size for _, size in meshes.values())
+        for lastUse, key in sorted((lastUse, key) for key, (lastUse, _) in meshes.items()):
+            if cacheSize <= self._meshCacheSize:
+                break
+            if key in keep:
+                continue
+
+            for path in self._meshCachePaths(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            cacheSize -= meshes[key][1]
+
     def checkGeometry(self) -> bool:
 
         if not self.geometry.is_watertight:
@@ -337,6 +540,7 @@ class Part(DocumentObject):
          :param mesh: The trimesh object loaded
          """
         self._geometry = mesh
+        self._meshCacheKey = None
         self._dirty = True
 
     def getProjectedHull(self, returnPoly: bool = False):
@@ -437,10 +641,159 @@ class Part(DocumentObject):
         Regenerate the geometry
         """
         logging.debug('Updating {:s} Geometry Representation'.format(self.label))
-        self._geometryCache = self._geometry.copy()
-        self._geometryCache.apply_transform(self.getTransform())
+
+        transform = self.getTransform()
+        cachedMesh = None
+
+        if self._meshCacheKey is not None:
+            key = hashlib.sha256((self._meshCacheKey + transform.tobytes().hex()).encode()).hexdigest()
+            cachedMesh = self._loadCachedMesh(key)
+
+        if cachedMesh is not None:
+            self._geometryCache = cachedMesh
+        else:
+            self._geometryCache = self._geometry.copy()
+            self._geometryCache.apply_transform(transform)
+
+            if self._meshCacheKey is not None:
+                self._saveCachedMesh(key, self._geometryCache)
+
+        self._buildFaceIndex()
+        self._sliceTopology = None
         self._dirty = False
 
+    def _buildFaceIndex(self) -> None:
+        """
+        Builds the index used to find the faces whose z-range spans a slice plane. The faces are grouped by the power
+        of two of their z-range and sorted by their lowest z within each group. The faces spanning a plane are then
+        found by a binary search in each group, only looking at the faces that start at most the group's largest
+        z-range below the plane, rather than at every face in the mesh.
+        """
+        mesh = self._geometryCache
+        faceZ = mesh.vertices[:, 2][mesh.faces]
+        self._faceZMin = faceZ.min(axis=1)
+        self._faceZMax = faceZ.max(axis=1)
+
+        spans = self._faceZMax - self._faceZMin
+        group = np.floor(np.log2(np.maximum(spans, 1e-12))).astype(np.int64)
+
+        order = np.lexsort((self._faceZMin, group))
+        splits = np.nonzero(np.diff(group[order]))[0] + 1
+
+        self._faceIndex = []
+        for faces in np.split(order, splits):
+            self._faceIndex.append((faces, self._faceZMin[faces], spans[faces].max()))
+
+    def _crossingFaces(self, z: float) -> np.ndarray:
+        """
+        The faces that may intersect the plane at z, i.e. those whose z-range spans it allowing for the tolerance
+        `trimesh` uses to decide that a vertex lies on the plane, in increasing index order.
+        """
+        tol = trimesh.constants.tol.merge
+        crossing = []
+
+        for faces, zMin, maxSpan in self._faceIndex:
+            start = np.searchsorted(zMin, z - maxSpan - tol, side='left')
+            end = np.searchsorted(zMin, z + tol, side='right')
+            candidates = faces[start:end]
+            crossing.append(candidates[self._faceZMax[candidates] >= z - tol])
+
+        return np.sort(np.concatenate(crossing)) if crossing else np.empty(0, dtype=np.int64)
+
+    def _section(self, z: float, faces: np.ndarray) -> Optional[trimesh.path.Path3D]:
+        """
+        The section through the given faces of the mesh at z, or None if it is empty. When the faces include all of
+        those crossing the plane, in increasing index order, this is identical to slicing the entire mesh.
+        """
+        mesh = self.geometry
+
+        # Obtain the section through the STL polygon using Trimesh Algorithm (Shapely)
+        lines = trimesh.intersections.mesh_plane(mesh,
+                                                 plane_normal=[0, 0, 1],
+                                                 plane_origin=[0, 0, z],
+                                                 local_faces=faces,
+                                                 cached_dots=mesh.vertices[:, 2] - z)
+
+        if len(lines) == 0:
+            return None
+
+        return self._linesToPath(lines)
+
+    def _linesToPath(self, lines: np.ndarray) -> trimesh.path.Path3D:
+        """
+        Joins the line segments of a section into a path, as `trimesh` does when loading them. The end points of the
+        segments are merged into vertices and the loops are traced by traversing the graph of the segments.
+
+        Tracing the loops is the costly part. With :attr:`reuseSliceTopology` enabled, the loops traced for the
+        previous section are reused whenever its segments join up in the same way, which is usually the case for
+        consecutive slices through prismatic regions of the part, as they cross the same triangles. Only the vertex
+        positions are then new. The loops are put into a canonical form (see :meth:`_canonicalLoops`) so the result
+        doesn't depend on which sections came before.
+        """
+        points = lines.reshape((-1, 3))
+
+        # Merged the same way as trimesh.path.exchange.misc.lines_to_path, so the result is identical
+        unique, inverse = trimesh.grouping.unique_rows(points, digits=trimesh.constants.tol_path.merge_digits)
+        edges = inverse.reshape((-1, 2))
+        vertices = points[unique]
+
+        traversals = None
+
+        if self.reuseSliceTopology and self._sliceTopology is not None:
+            prevInverse, numVertices, prevTraversals = self._sliceTopology
+
+            # The segments join up in the same way as in the previous section when its vertices map one to one onto
+            # these. The loops then pass through the same segments, with the vertices renumbered.
+            if len(inverse) == len(prevInverse) and len(unique) == numVertices:
+                relabel = np.empty(numVertices, dtype=np.int64)
+                relabel[prevInverse] = inverse
+
+                if np.array_equal(relabel[prevInverse], inverse):
+                    traversals = [relabel[traversal] for traversal in prevTraversals]
+
+        if traversals is None:
+            traversals = trimesh.graph.fill_traversals(trimesh.graph.traversals(edges, mode='dfs'), edges=edges)
+
+        if self.reuseSliceTopology:
+            traversals = self._canonicalLoops(traversals, vertices)
+            self._sliceTopology = (inverse, len(unique), traversals)
+
+        # Each path gets its own copy of the loops, in case it modifies its entities
+        entities = [trimesh.path.entities.Line(traversal.copy()) for traversal in traversals]
+
+        return trimesh.path.Path3D(entities=entities, vertices=vertices, process=False)
+
+    @staticmethod
+    def _canonicalLoops(traversals: List[np.ndarray], vertices: np.ndarray) -> List[np.ndarray]:
+        """
+        Puts the traced loops of a section into an order that only depends on their geometry: each closed loop starts
+        at its vertex with the lowest (x, y) and heads towards the lower of that vertex's neighbours, and the loops are
+        sorted by their first vertex.
+        """
+        loops = []
+
+        for traversal in traversals:
+            if len(traversal) > 3 and traversal[0] == traversal[-1]:
+                ring = traversal[:-1]
+                coords = vertices[ring, :2]
+
+                first = np.lexsort((coords[:, 1], coords[:, 0]))[0]
+                ring = np.roll(ring, -first)
+
+                # Reverse the loop if the previous vertex is lower than the next one
+                prevCoords, nextCoords = vertices[ring[-1], :2], vertices[ring[1], :2]
+                if tuple(prevCoords) < tuple(nextCoords):
+                    ring = np.concatenate([ring[:1], ring[:0:-1]])
+
+                traversal = np.append(ring, ring[0])
+
+            loops.append(traversal)
+
+        starts = np.array([vertices[loop[0], :2] for loop in loops]).reshape(-1, 2)
+        order = np.lexsort((starts[:, 1], starts[:, 0]))
+
+        return [loops[i] for i in order]
+
     @property
     def partType(self) -> str:
         """
@@ -460,21 +813,82 @@ class Part(DocumentObject):
         if not self.geometry:
             raise ValueError('Geometry was not set')
 
-        if z < self.boundingBox[2] or z > self.boundingBox[5]:
+        bbox = self.boundingBox
+
+        if z < bbox[2] or z > bbox[5]:
+            return []
+
+        # Only the faces spanning the slice plane are intersected with it
+        sections = self._section(z, self._crossingFaces(z))
+
+        if sections is None:
             return []
 
+        return self._planarSection(sections)
+
+    def getTrimeshSlices(self, z: np.ndarray) -> List[Any]:
+        """
+        Slices the part at several z-positions in a single sweep through the mesh. The triangles are sorted by their
+        lowest z-coordinate and the slice heights visited in increasing order, so that only the triangles whose
+        z-range spans each height are intersected with its plane, rather than the entire mesh every time. The
+        sections are identical to those given by :meth:`getTrimeshSlice` for each z-position.
+
+        :param z: The slices' z-positions (in any order)
+        :return: The vector slice at each z level, in the same order as `z`
+        """
+        if not self.geometry:
+            raise ValueError('Geometry was not set')
+
+        z = np.asanyarray(z, dtype=np.float64).ravel()
+        slices = [[] for i in range(len(z))]
+
+        bbox = self.boundingBox
+
+        # A triangle can only intersect the plane when its z-range spans the height, allowing for the tolerance
+        # trimesh uses to decide that a vertex lies on the plane.
+        faceZMin, faceZMax = self._faceZMin, self._faceZMax
+        tol = trimesh.constants.tol.merge
+
+        order = np.argsort(faceZMin, kind='stable')
+        sortedZMin = faceZMin[order]
+
+        active = np.empty(0, dtype=np.int64)
+        numAdded = 0
+
+        for i in np.argsort(z, kind='stable'):
+            zPos = z[i]
+
+            if zPos < bbox[2] or zPos > bbox[5]:
+                continue
+
+            # Add the triangles starting below this height and drop those that ended below it. The heights are
+            # visited in increasing order, so a dropped triangle is never needed again.
+            end = np.searchsorted(sortedZMin, zPos + tol, side='right')
+            active = np.concatenate([active, order[numAdded:end]])
+            numAdded = end
+            active = active[faceZMax[active] >= zPos - tol]
+
+            # The faces are passed in index order, so the line segments come out in the same order as slicing the
+            # whole mesh, and therefore give the same paths
+            sections = self._section(zPos, np.sort(active))
+
+            if sections is None:
+                continue
+
+            slices[i] = self._planarSection(sections)
+
+        return slices
+
+    def _planarSection(self, sections) -> trimesh.path.Path2D:
+        """
+        Converts a 3D section through the part at a constant z into its 2D planar section, closing any gaps left by
+        holes in the mesh.
+        """
         transformMat = np.array(([1.0, 0.0, 0.0, 0.0],
                                  [0.0, 1.0, 0.0, 0.0],
                                  [0.0, 0.0, 1.0, 0.0],
                                  [0.0, 0.0, 0.0, 1.0]), dtype=np.float32)
 
-        # Obtain the section through the STL polygon using Trimesh Algorithm (Shapely)
-        sections = self.geometry.section(plane_origin=[0, 0, z],
-                                         plane_normal=[0, 0, 1])
-
-        if sections == None:
-            return []
-
         # Obtain the 2D Planar Section at this Z-position
         planarSection, transform = sections.to_planar(transformMat)
 
@@ -486,7 +900,7 @@ class Part(DocumentObject):
         return planarSection
 
     def getVectorSlice(self, z: float, returnCoordPaths: bool = True,
-                       fixPolygons: bool = True,
+                       fixPolygons: Union[bool, str] = True,
                        simplificationFactor:float = None, simplificationPreserveTopology: Optional[bool] = True,
                        simplificationFactorMode:str = 'absolute') -> Any:
         """
@@ -494,15 +908,43 @@ class Part(DocumentObject):
 
         :param z: The slice's z-position
         :param returnCoordPaths: If True returns a list of closed paths representing the polygon, otherwise Shapely Polygons
-        :param fixPolygons: Fixes any polygons during slicing by offset by epsilon value
+        :param fixPolygons: Fixes any polygons during slicing by offset by epsilon value. If 'invalid', only the
+                            polygons that are invalid are offset (see :attr:`numRepairedPolygons`)
         :param simplificationFactor:  Simplification factor used for the boundary
         :param simplificationPreserveTopology:  Preserves the slice's topology when using simplification algorithm
         :param simplificationFactorMode: Set mode ('absolute', 'line') for the simplification tolerance calculation
 
         :return: The vector slice at the given z level
         """
-        planarSection = self.getTrimeshSlice(z)
+        return self._vectorSlice(self.getTrimeshSlice(z), returnCoordPaths, fixPolygons, simplificationFactor,
+                                 simplificationPreserveTopology, simplificationFactorMode)
+
+    def getVectorSlices(self, z: np.ndarray, returnCoordPaths: bool = True,
+                        fixPolygons: Union[bool, str] = True,
+                        simplificationFactor:float = None, simplificationPreserveTopology: Optional[bool] = True,
+                        simplificationFactorMode:str = 'absolute') -> List[Any]:
+        """
+        Slices the part at several z-positions in a single sweep through the mesh (see :meth:`getTrimeshSlices`).
+        Each slice is identical to the one given by :meth:`getVectorSlice` with the same options.
 
+        :param z: The slices' z-positions (in any order)
+        :param returnCoordPaths: If True returns a list of closed paths representing the polygon, otherwise Shapely Polygons
+        :param fixPolygons: Fixes any polygons during slicing by offset by epsilon value (see :meth:`getVectorSlice`)
+        :param simplificationFactor:  Simplification factor used for the boundary
+        :param simplificationPreserveTopology:  Preserves the slice's topology when using simplification algorithm
+        :param simplificationFactorMode: Set mode ('absolute', 'line') for the simplification tolerance calculation
+
+        :return: The vector slice at each z level, in the same order as `z`
+        """
+        return [self._vectorSlice(planarSection, returnCoordPaths, fixPolygons, simplificationFactor,
+                                  simplificationPreserveTopology, simplificationFactorMode)
+                for planarSection in self.getTrimeshSlices(z)]
+
+    def _vectorSlice(self, planarSection, returnCoordPaths: bool, fixPolygons: Union[bool, str], simplificationFactor: float,
+                     simplificationPreserveTopology: bool, simplificationFactorMode: str) -> Any:
+        """
+        Converts a planar section into the polygons or closed paths returned by :meth:`getVectorSlice`
+        """
         if not planarSection:
             return []
 
@@ -536,17 +978,125 @@ class Part(DocumentObject):
             polygons = simpPolys
 
         # fix polygon
-        if fixPolygons:
-            fixPolys = []
-            for polygon in polygons:
-                fixPolys.append(polygon.buffer(Part.POLYGON_FIX_EPSILON))
-            polygons = fixPolys
+        if fixPolygons == 'invalid':
+            polygons = self._repairInvalidPolygons(polygons)
+        elif fixPolygons:
+            polygons = self._bufferPolygons(polygons)
 
         if returnCoordPaths:
             return self.path2DToPathList(polygons)
         else:
             return polygons
 
+    def getClipperSlice(self, z: float, fixPolygons: Union[bool, str] = True,
+                        scaleFactor: float = 1e5) -> ClipperPaths:
+        """
+        Slices the part into the closed paths used directly by `PyClipper <https://pypi.org/project/pyclipper/>`_ for
+        offsetting and clipping, without creating any shapely polygons. The loops of the section are scaled to
+        integer coordinates and unioned using the even-odd rule, which orients each exterior counter-clockwise and
+        each hole clockwise. Each exterior is followed by its holes, as with :meth:`path2DToPathList`.
+
+        :param z: The slice's z-position
+        :param fixPolygons: Offsets the polygons by :attr:`POLYGON_FIX_EPSILON`, as :meth:`getVectorSlice` does. The
+                            union already gives valid polygons, so with 'invalid' they are not offset.
+        :param scaleFactor: The scale factor applied to the coordinates, which should match the
+                            :attr:`~pyslm.hatching.BaseHatcher.PYCLIPPER_SCALEFACTOR` of the hatcher used
+        :return: The closed (nx2) integer paths of the slice at the given z level
+        """
+        return self._clipperSlice(self.getTrimeshSlice(z), fixPolygons, scaleFactor)
+
+    def getClipperSlices(self, z: np.ndarray, fixPolygons: Union[bool, str] = True,
+                         scaleFactor: float = 1e5) -> List[ClipperPaths]:
+        """
+        Slices the part at several z-positions in a single sweep through the mesh (see :meth:`getTrimeshSlices`).
+        Each slice is identical to the one given by :meth:`getClipperSlice` with the same options.
+
+        :param z: The slices' z-positions (in any order)
+        :param fixPolygons: Offsets the polygons by :attr:`POLYGON_FIX_EPSILON` (see :meth:`getClipperSlice`)
+        :param scaleFactor: The scale factor applied to the coordinates
+        :return: The closed integer paths of the slice at each z level, in the same order as `z`
+        """
+        return [self._clipperSlice(planarSection, fixPolygons, scaleFactor)
+                for planarSection in self.getTrimeshSlices(z)]
+
+    def _clipperSlice(self, planarSection, fixPolygons: Union[bool, str], scaleFactor: float) -> ClipperPaths:
+        """
+        Converts a planar section into the scaled integer paths returned by :meth:`getClipperSlice`
+        """
+        if not planarSection:
+            return ClipperPaths([], scaleFactor)
+
+        # Scaled and truncated in the same way as pyclipper.scale_to_clipper
+        loops = [(np.asarray(loop, dtype=np.float64)[:, :2] * scaleFactor).astype(np.int64).tolist()
+                 for loop in planarSection.discrete]
+
+        pc = pyclipper.Pyclipper()
+
+        try:
+            pc.AddPaths(loops, pyclipper.PT_SUBJECT, True)
+        except pyclipper.ClipperException:
+            # Every loop is degenerate
+            return ClipperPaths([], scaleFactor)
+
+        if fixPolygons and fixPolygons != 'invalid':
+            pco = pyclipper.PyclipperOffset()
+            pco.AddPaths(pc.Execute(pyclipper.CT_UNION, pyclipper.PFT_EVENODD, pyclipper.PFT_EVENODD),
+                         pyclipper.JT_ROUND, pyclipper.ET_CLOSEDPOLYGON)
+            polyTree = pco.Execute2(int(Part.POLYGON_FIX_EPSILON * scaleFactor))
+        else:
+            polyTree = pc.Execute2(pyclipper.CT_UNION, pyclipper.PFT_EVENODD, pyclipper.PFT_EVENODD)
+
+        paths = ClipperPaths([], scaleFactor)
+        Part._polyTreeToPaths(polyTree, paths)
+
+        return paths
+
+    @staticmethod
+    def _polyTreeToPaths(node, paths: List[np.ndarray]) -> None:
+        """
+        Appends the closed paths of each exterior in a PyClipper PolyTree followed by those of its holes, including
+        any exteriors nested within the holes
+        """
+        for exterior in node.Childs:
+            for contour in [exterior.Contour] + [hole.Contour for hole in exterior.Childs]:
+                path = np.array(contour, dtype=np.int64)[:, :2]
+                paths.append(np.vstack([path, path[:1]]))
+
+            for hole in exterior.Childs:
+                Part._polyTreeToPaths(hole, paths)
+
+    def _bufferPolygons(self, polygons: List[Polygon]) -> List[Polygon]:
+        """
+        Offsets the polygons by :attr:`POLYGON_FIX_EPSILON`, which repairs any that are invalid
+        """
+        if shapelyBuffer is None:
+            return [polygon.buffer(Part.POLYGON_FIX_EPSILON) for polygon in polygons]
+
+        # Same number of segments per quarter circle as Polygon.buffer, so the result is identical
+        return list(shapelyBuffer(np.asarray(polygons, dtype=object), Part.POLYGON_FIX_EPSILON, quad_segs=16))
+
+    def _repairInvalidPolygons(self, polygons: List[Polygon]) -> List[Polygon]:
+        """
+        Checks the validity of all the polygons at once and only offsets those that are invalid (see
+        :meth:`_bufferPolygons`). The number repaired is added to :attr:`numRepairedPolygons`.
+        """
+        if shapelyIsValid is None:
+            invalid = [i for i, polygon in enumerate(polygons) if not polygon.is_valid]
+        else:
+            invalid = np.flatnonzero(~shapelyIsValid(np.asarray(polygons, dtype=object)))
+
+        if len(invalid) == 0:
+            return polygons
+
+        polygons = list(polygons)
+        for i, polygon in zip(invalid, self._bufferPolygons([polygons[i] for i in invalid])):
+            polygons[i] = polygon
+
+        self.numRepairedPolygons += len(invalid)
+        logging.debug('Repaired {:d} invalid polygons'.format(len(invalid)))
+
+        return polygons
+
     def path2DToPathList(self, shapes: List[Polygon]) -> List[np.ndarray]:
         """
         Returns the list of paths and coordinates from a cross-section (i.e. Trimesh Path2D). This is required to be
@@ -615,4 +1165,100 @@ class Part(DocumentObject):
 
                 sliceImg[startPos[0]:endPos[0], startPos[1]:endPos[1]] += grid
 
-            return sliceImg
\ No newline at end of file
+            return sliceImg
+
+    def getBitmapShape(self, resolution: float, origin: Optional[np.ndarray] = None) -> Tuple[int, int]:
+        """
+        Returns the shape (rows, columns) of the bitmaps covering the part's bounding box, as generated by
+        :meth:`getBitmapSlices`.
+
+        :param resolution: The size of each pixel [length unit]
+        :param origin: The position of the centre of pixel (0,0) - defaults to the bounding box minimum (optional)
+        :return: The number of pixels along the y and x axes
+        """
+        bbox = self.boundingBox
+        origin = bbox[:2] if origin is None else np.asarray(origin, dtype=np.float64)
+
+        numPixels = np.floor((bbox[3:5] - origin) / resolution).astype(np.int64) + 1
+        numPixels = np.maximum(numPixels, 1)
+
+        return int(numPixels[1]), int(numPixels[0])
+
+    def getBitmapSlices(self, z: np.ndarray, resolution: float, origin: Optional[np.ndarray] = None,
+                        filename: Optional[str] = None) -> np.ndarray:
+        """
+        Rasterises the slices at several z-positions into a 3D occupancy grid, i.e. a stack of bitmaps covering the
+        part's bounding box at the same resolution. The part is sliced in a single sweep (see
+        :meth:`getTrimeshSlices`) and each slice filled using a vectorised scanline algorithm, with a pixel set when its
+        centre lies inside the slice (even-odd rule). This is far quicker than calling :meth:`getBitmapSlice` for each
+        layer.
+
+        The bitmaps are packed into bits along the x-axis (as with :func:`numpy.packbits`) to reduce their size eight
+        fold, so the array has a shape of (len(z), rows, ceil(columns / 8)) and can be unpacked using
+        ``np.unpackbits(bitmaps, axis=-1, count=columns)``, where the shape of each bitmap is given by
+        :meth:`getBitmapShape`. Rows correspond to increasing y and columns to increasing x. For builds that do not fit
+        in memory, a filename can be given to write the array to a memory-mapped `.npy` file instead, which can
+        later be loaded using ``np.load(filename, mmap_mode='r')``.
+
+        :param z: The slices' z-positions
+        :param resolution: The size of each pixel [length unit]
+        :param origin: The position of the centre of pixel (0,0) - defaults to the bounding box minimum (optional)
+        :param filename: The `.npy` file to store the bitmaps in, rather than in memory (optional)
+        :return: The packed bitmaps of each slice, in the same order as `z`
+        """
+        z = np.asanyarray(z, dtype=np.float64).ravel()
+
+        origin = self.boundingBox[:2] if origin is None else np.asarray(origin, dtype=np.float64)
+        shape = self.getBitmapShape(resolution, origin)
+        stackShape = (len(z), shape[0], (shape[1] + 7) // 8)
+
+        if filename is not None:
+            bitmaps = np.lib.format.open_memmap(filename, mode='w+', dtype=np.uint8, shape=stackShape)
+        else:
+            bitmaps = np.zeros(stackShape, dtype=np.uint8)
+
+        for i, planarSection in enumerate(self.getTrimeshSlices(z)):
+            if not planarSection:
+                bitmaps[i] = 0
+                continue
+
+            bitmaps[i] = self._scanlineFill(planarSection.discrete, origin, resolution, shape)
+
+        if filename is not None:
+            bitmaps.flush()
+
+        return bitmaps
+
+    @staticmethod
+    def _scanlineFill(loops: List[np.ndarray], origin: np.ndarray, resolution: float,
+                      shape: Tuple[int, int]) -> np.ndarray:
+        """
+        Fills the closed loops of a slice on a grid of pixels using the even-odd rule, returning the bitmap with its bits
+        packed along each row. The scanlines run along the columns: every edge is intersected with all of the pixel
+        columns it spans at once, and each crossing toggles the pixels from it upwards in its column. The toggles are
+        packed into bits, so accumulating them with an exclusive-or down the rows fills eight columns per byte.
+        """
+        numRows, numCols = shape
+        numBytes = (numCols + 7) // 8
+
+        # Edges of the loops (x0, y0, x1, y1) in pixel coordinates, including the edge closing each loop
+        edges = np.vstack([np.hstack([loop[:, :2], np.roll(loop[:, :2], -1, axis=0)]) for loop in loops])
+        edges = (edges - np.tile(origin, 2)) / resolution
+        x0, y0, x1, y1 = edges.T
+
+        # Each edge spans the columns with centres in [min(x0, x1), max(x0, x1)), so vertical edges span none
+        colStart = np.clip(np.ceil(np.minimum(x0, x1)), 0, numCols).astype(np.int64)
+        colEnd = np.clip(np.ceil(np.maximum(x0, x1)), 0, numCols).astype(np.int64)
+        counts = colEnd - colStart
+
+        edgeIds = np.repeat(np.arange(len(counts)), counts)
+        cols = np.arange(len(edgeIds)) - np.repeat(np.cumsum(counts) - counts - colStart, counts)
+
+        # Crossing of each column with the edge and the first pixel centre on or above it
+        y = y0[edgeIds] + (cols - x0[edgeIds]) * (y1[edgeIds] - y0[edgeIds]) / (x1[edgeIds] - x0[edgeIds])
+        rows = np.clip(np.ceil(y), 0, numRows).astype(np.int64)
+
+        toggles = np.zeros((numRows + 1) * numBytes, dtype=np.uint8)
+        np.bitwise_xor.at(toggles, rows * numBytes + (cols >> 3), (0x80 >> (cols & 7)).astype(np.uint8))
+
+        return np.bitwise_xor.accumulate(toggles.reshape(numRows + 1, numBytes)[:numRows], axis=0)
@@ -9,8 +9,16 @@ from pyslm import pyclipper
 
 from shapely.geometry import Polygon as ShapelyPolygon
 from .sorting import AlternateSort, BaseSort, LinearSort
+from ..core import ClipperPaths
 from ..geometry import Layer, Model, LayerGeometry, ContourGeometry, HatchGeometry, PointsGeometry
 
+PYCLIPPER_ARRAYS = hasattr(pyclipper.Pyclipper, 'AddPathsArray')
+"""
+Whether pyclipper provides the numpy interface (``AddPathsArray``, ``ExecuteArray`` and ``Execute2Array``) of the
+extension built with pyslm from ``external/pyclipper``. The paths are then passed to and from pyclipper as packed
+integer arrays, otherwise as nested lists.
+"""
+
 
 def getExposurePoints(layer: Layer, models: List[Model], includePowerDeposited: bool = True):
     """
@@ -157,7 +165,9 @@ class BaseHatcher(abc.ABC):
 
     For all polygon manipulation operations used for offsetting and clipping, internally this calls provides automatic
     conversion to the integer coordinate system used by ClipperLib by internally calling
-    :meth:`~BaseHatcher.scaleToClipper` and :meth:`~BaseHatcher.scaleFromClipper`.
+    :meth:`~BaseHatcher.scaleToClipper` and :meth:`~BaseHatcher.scaleFromClipper`. Boundaries given as
+    :class:`~pyslm.core.ClipperPaths` (see :meth:`pyslm.core.Part.getClipperSlice`) are already in this coordinate
+    system and are used as they are.
     """
 
 
@@ -174,11 +184,34 @@ class BaseHatcher(abc.ABC):
     """
 
     def __init__(self):
-        pass
+        self._hatchExtent = 'bbox'
 
     def __str__(self):
         return 'BaseHatcher <{:s}>'.format(self.name)
 
+    @property
+    def hatchExtent(self) -> str:
+        """
+        The region that the un-clipped hatches from :meth:`generateHatching` are kept within (default: 'bbox'):
+
+        * 'bbox' - every hatch across the square wrapping the bounding box of the boundary
+        * 'boundary' - only the hatches crossing the extent of the boundary in the frame of the hatches, i.e. its
+          projection along and across the hatch direction
+        * 'regions' - only the hatches crossing the extent of one of the polygons (connected regions) of the boundary
+
+        Hatches outside of these would be clipped entirely, so the clipped hatches are the same in every case, but
+        fewer hatches are passed to the clipping. Pieces of the same hatch, or hatches tied in the sort, may come out in
+        a different order though.
+        """
+        return self._hatchExtent
+
+    @hatchExtent.setter
+    def hatchExtent(self, extent: str):
+        if extent not in ('bbox', 'boundary', 'regions'):
+            raise ValueError("Hatch extent must be 'bbox', 'boundary' or 'regions', not '{:s}'".format(str(extent)))
+
+        self._hatchExtent = extent
+
     @staticmethod
     def scaleToClipper(feature: Any):
         """
@@ -188,6 +221,10 @@ class BaseHatcher(abc.ABC):
         :param feature: The geometry to scale to pyclipper
         :return: The scaled geometry
         """
+        if isinstance(feature, np.ndarray):
+            # Scaled and truncated in one pass, giving the same nested lists of integers as pyclipper
+            return (feature.astype(np.float64) * BaseHatcher.PYCLIPPER_SCALEFACTOR).astype(np.int64).tolist()
+
         return pyclipper.scale_to_clipper(feature, BaseHatcher.PYCLIPPER_SCALEFACTOR)
 
     @staticmethod
@@ -210,6 +247,10 @@ class BaseHatcher(abc.ABC):
         :param coords: The list of hatches generated from pyclipper
         :return: The hatch coordinates transfromed into a (n x 2 x 3) numpy array.
         """
+        if isinstance(coords, np.ndarray) and coords.ndim == 3:
+            # Already an array of hatches (see clipLines)
+            return coords
+
         return np.transpose(np.dstack(coords), axes=[2, 0, 1])
 
     @classmethod
@@ -220,7 +261,64 @@ class BaseHatcher(abc.ABC):
         return 1. / cls.PYCLIPPER_SCALEFACTOR
 
     @staticmethod
-    def _getChildPaths(poly):
+    def checkClipperPaths(paths: ClipperPaths) -> None:
+        """
+        Checks that the :class:`~pyslm.core.ClipperPaths` were scaled by :attr:`PYCLIPPER_SCALEFACTOR`.
+
+        :param paths: The scaled paths
+        :raises: ValueError if the paths use a different scale factor
+        """
+        if paths.scaleFactor != BaseHatcher.PYCLIPPER_SCALEFACTOR:
+            raise ValueError('Clipper paths scaled by {:g} cannot be used with a scale factor of {:g}'.format(
+                paths.scaleFactor, BaseHatcher.PYCLIPPER_SCALEFACTOR))
+
+    @staticmethod
+    def _packPaths(paths, isClipperPaths: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Packs a list of paths for the numpy interface of pyclipper (see :data:`PYCLIPPER_ARRAYS`) into the (nx2) integer
+        coordinates of all their points, scaled as by :meth:`scaleToClipper` unless they already are, and the index of
+        the first point of each path into these, followed by the number of points.
+        """
+        paths = [np.asarray(path)[:, :2] for path in paths]
+        offsets = np.cumsum([0] + [len(path) for path in paths], dtype=np.int64)
+
+        if len(paths) == 0:
+            return np.empty((0, 2), dtype=np.int64), offsets
+
+        if isClipperPaths:
+            return np.vstack(paths).astype(np.int64), offsets
+
+        return (np.vstack(paths).astype(np.float64) * BaseHatcher.PYCLIPPER_SCALEFACTOR).astype(np.int64), offsets
+
+    @staticmethod
+    def _getChildPathsArray(coords: np.ndarray, offsets: np.ndarray, parents: np.ndarray,
+                            scaleFromClipper: bool = True):
+        """
+        The counterpart of :meth:`_getChildPaths` for a PolyTree packed by the numpy interface of pyclipper, giving the
+        same boundaries of each polygon, in the same order, as closed (nx3) arrays.
+        """
+        if scaleFromClipper:
+            coords = coords / BaseHatcher.PYCLIPPER_SCALEFACTOR
+
+        # The nodes are in depth-first order, so every parent comes before its children
+        depth = np.zeros(len(parents), dtype=np.int64)
+        for i, parent in enumerate(parents):
+            if parent >= 0:
+                depth[i] = depth[parent] + 1
+
+        # Append the first point to the end of each path to close loop
+        paths = [np.vstack([coords[start:end], coords[start:start + 1]])
+                 for start, end in zip(offsets[:-1], offsets[1:])]
+
+        # Outer boundaries are at even depths of the tree, each followed by its holes
+        offsetPolys = []
+        for i in np.flatnonzero(depth % 2 == 0):
+            offsetPolys.append([paths[j] for j in np.flatnonzero(parents == i)] + [paths[i]])
+
+        return offsetPolys
+
+    @staticmethod
+    def _getChildPaths(poly, scaleFromClipper: bool = True):
 
         offsetPolys = []
 
@@ -232,14 +330,15 @@ class BaseHatcher(abc.ABC):
         for path in paths:
             path.append(path[0])
 
-        paths = BaseHatcher.scaleFromClipper(paths)
+        if scaleFromClipper:
+            paths = BaseHatcher.scaleFromClipper(paths)
 
         offsetPolys.append(paths)
 
         for polyChild in poly.Childs:
             if len(polyChild.Childs) > 0:
                 for polyChild2 in polyChild.Childs:
-                    offsetPolys += BaseHatcher._getChildPaths(polyChild2)
+                    offsetPolys += BaseHatcher._getChildPaths(polyChild2, scaleFromClipper)
 
         return offsetPolys
 
@@ -259,34 +358,89 @@ class BaseHatcher(abc.ABC):
         return [BaseHatcher.offsetBoundary(poly, offset) for poly in polygons]
 
     @staticmethod
-    def offsetBoundary(paths, offset: float):
+    def _addOffsetPaths(pc: pyclipper.PyclipperOffset, paths) -> None:
+        """
+        Adds the closed boundaries of a polygon, or :class:`~pyslm.core.ClipperPaths`, to the offsetter as rounded
+        closed polygons.
+        """
+        isClipperPaths = isinstance(paths, ClipperPaths)
+
+        if isClipperPaths:
+            BaseHatcher.checkClipperPaths(paths)
+
+        if PYCLIPPER_ARRAYS:
+            coords, offsets = BaseHatcher._packPaths(paths, isClipperPaths)
+            pc.AddPathsArray(coords, offsets, pyclipper.JT_ROUND, pyclipper.ET_CLOSEDPOLYGON)
+        else:
+            # Append the paths to libClipper offsetting algorithm
+            for path in paths:
+                pc.AddPath(np.asarray(path).tolist() if isClipperPaths else BaseHatcher.scaleToClipper(path),
+                           pyclipper.JT_ROUND,
+                           pyclipper.ET_CLOSEDPOLYGON)
+
+    @staticmethod
+    def _executeOffset(pc: pyclipper.PyclipperOffset, offset: float, returnClipperPaths: bool = False):
+        """
+        Offsets the paths added to the offsetter (see :meth:`_addOffsetPaths`) by the offset, returning the boundaries
+        of each polygon as for :meth:`offsetBoundary`. The offsetter keeps its paths, so may be executed again.
+        """
+        clipperOffset = BaseHatcher.scaleToClipper(offset)
+
+        if PYCLIPPER_ARRAYS:
+            # Perform the offseting operation and convert the packed nodes back to paths
+            offsetContours = BaseHatcher._getChildPathsArray(*pc.Execute2Array(clipperOffset),
+                                                             scaleFromClipper=not returnClipperPaths)
+        else:
+            # Perform the offseting operation
+            boundaryOffsetPolys = pc.Execute2(clipperOffset)
+
+            offsetContours = []
+            # Convert these nodes back to paths
+            for polyChild in boundaryOffsetPolys.Childs:
+                offsetContours += BaseHatcher._getChildPaths(polyChild, not returnClipperPaths)
+
+        if returnClipperPaths:
+            return ClipperPaths(offsetContours, BaseHatcher.PYCLIPPER_SCALEFACTOR)
+
+        return offsetContours
+
+    @staticmethod
+    def offsetBoundary(paths, offset: float, returnClipperPaths: bool = False):
         """
         Offsets a single path for a single polygon.
 
-        :param paths: Closed polygon path list for offsetting
+        :param paths: Closed polygon path list for offsetting, or :class:`~pyslm.core.ClipperPaths`
         :param offset: The offset applied to the poylgon
+        :param returnClipperPaths: Returns the boundaries as :class:`~pyslm.core.ClipperPaths` without scaling them
+                                   back from the integer coordinate system
         :return: A list of boundaries offset from the subject
         """
         pc = pyclipper.PyclipperOffset()
+        BaseHatcher._addOffsetPaths(pc, paths)
 
-        clipperOffset = BaseHatcher.scaleToClipper(offset)
+        return BaseHatcher._executeOffset(pc, offset, returnClipperPaths)
 
-        # Append the paths to libClipper offsetting algorithm
-        for path in paths:
-            pc.AddPath(BaseHatcher.scaleToClipper(path),
-                       pyclipper.JT_ROUND,
-                       pyclipper.ET_CLOSEDPOLYGON)
+    @staticmethod
+    def offsetBoundaryLevels(paths, contourOffsets: List[float], hatchOffset: float,
+                             returnClipperPaths: bool = False) -> Tuple[List[list], Any]:
+        """
+        Offsets the boundaries of a layer by each of the contour offsets and by the offset of the hatch boundary in a
+        single pass. The paths are only scaled and added to libClipper once, and every level is offset from the
+        original boundary, so each is identical to that of a separate call to :meth:`offsetBoundary`.
 
-        # Perform the offseting operation
-        boundaryOffsetPolys = pc.Execute2(clipperOffset)
+        :param paths: Closed polygon path list for offsetting, or :class:`~pyslm.core.ClipperPaths`
+        :param contourOffsets: The offset applied for each contour, in order
+        :param hatchOffset: The offset applied for the boundary of the hatches
+        :param returnClipperPaths: Returns the hatch boundary as :class:`~pyslm.core.ClipperPaths` without scaling it
+                                   back from the integer coordinate system
+        :return: A list of the offset boundaries for each contour offset, and the offset hatch boundary
+        """
+        pc = pyclipper.PyclipperOffset()
+        BaseHatcher._addOffsetPaths(pc, paths)
 
-        offsetContours = []
-        # Convert these nodes back to paths
-        for polyChild in boundaryOffsetPolys.Childs:
-            offsetContours += BaseHatcher._getChildPaths(polyChild)
+        contours = [BaseHatcher._executeOffset(pc, offset) for offset in contourOffsets]
 
-
-        return offsetContours
+        return contours, BaseHatcher._executeOffset(pc, hatchOffset, returnClipperPaths)
 
     @staticmethod
     def polygonBoundingBox(obj: Any) -> np.ndarray:
@@ -321,6 +475,8 @@ class BaseHatcher(abc.ABC):
         :param boundaries: A list of polygon
         :return: A (1x6) numpy array
         """
+        if isinstance(boundaries, ClipperPaths):
+            return boundaries.boundingBox()
 
         bboxList = [BaseHatcher.polygonBoundingBox(boundary) for boundary in boundaries]
 
@@ -406,6 +562,27 @@ class BaseHatcher(abc.ABC):
         return results
 
 
+    @staticmethod
+    def _addClipBoundaries(pc: pyclipper.Pyclipper, paths) -> None:
+        """
+        Adds the boundary of each polygon (as returned by :meth:`offsetBoundary`) to the clipper as a clip path. These
+        are scaled to the integer coordinate system unless already given as :class:`~pyslm.core.ClipperPaths`.
+        """
+        isClipperPaths = isinstance(paths, ClipperPaths)
+
+        if isClipperPaths:
+            BaseHatcher.checkClipperPaths(paths)
+
+        if PYCLIPPER_ARRAYS:
+            coords, offsets = BaseHatcher._packPaths([boundary for path in paths for boundary in path], isClipperPaths)
+            if len(offsets) > 1:
+                pc.AddPathsArray(coords, offsets, pyclipper.PT_CLIP, True)
+            return
+
+        for path in paths:
+            for boundary in path:
+                pc.AddPath(boundary if isClipperPaths else BaseHatcher.scaleToClipper(boundary), pyclipper.PT_CLIP, True)
+
     @staticmethod
     def clipLines(paths, lines):
         """
@@ -417,7 +594,8 @@ class BaseHatcher(abc.ABC):
 
         :param paths: The set of boundary paths for trimming the lines
         :param lines: The un-trimmed lines to clip from the boundary
-        :return: A list of trimmed lines (open paths)
+        :return: A list of trimmed lines (open paths), or a (n x 2 x 3) array of them with the numpy interface of
+                 pyclipper (see :data:`PYCLIPPER_ARRAYS`)
         """
         #clipLines = BaseHatcher.clipLines2(paths, lines)
 
@@ -427,14 +605,24 @@ class BaseHatcher(abc.ABC):
 
         pc = pyclipper.Pyclipper()
 
-        for path in paths:
-            for boundary in path:
-                pc.AddPath(BaseHatcher.scaleToClipper(boundary), pyclipper.PT_CLIP, True)
+        BaseHatcher._addClipBoundaries(pc, paths)
+
+        if PYCLIPPER_ARRAYS:
+            # Each line is a path of two points (x,y,z), with the hatch order kept in z
+            lineCoords = (lines.reshape(-1, 3).astype(np.float64) * BaseHatcher.PYCLIPPER_SCALEFACTOR).astype(np.int64)
+            pc.AddPathsArray(lineCoords, np.arange(0, len(lineCoords) + 1, 2), pyclipper.PT_SUBJECT, False)
+
+            coords, offsets = pc.ExecuteArray(pyclipper.CT_INTERSECTION, pyclipper.PFT_NONZERO, pyclipper.PFT_NONZERO)
+            coords = coords / BaseHatcher.PYCLIPPER_SCALEFACTOR
+
+            if len(coords) == 2 * (len(offsets) - 1):
+                # Every trimmed line is a single segment, so these are returned as a (n x 2 x 3) array
+                return coords.reshape(-1, 2, 3)
+
+            return [coords[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
 
         # Reshape line list to create n lines with 2 coords(x,y,z)
-        lineList = lines.reshape(-1, 2, 3)
-        lineList = tuple(map(tuple, lineList))
-        lineList = BaseHatcher.scaleToClipper(lineList)
+        lineList = BaseHatcher.scaleToClipper(lines.reshape(-1, 2, 3))
 
         pc.AddPaths(lineList, pyclipper.PT_SUBJECT, False)
 
@@ -446,6 +634,148 @@ class BaseHatcher(abc.ABC):
 
         return BaseHatcher.scaleFromClipper(lineOutput)
 
+    @staticmethod
+    def _boundaryEdges(paths) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the (nx2) start and end points of every edge of the boundaries of each polygon (as returned by
+        :meth:`offsetBoundary`) in the floating point coordinate system. Each boundary is closed if it isn't already.
+        """
+        isClipperPaths = isinstance(paths, ClipperPaths)
+
+        boundaries = []
+        for path in paths:
+            for boundary in path:
+                boundary = np.asarray(boundary, dtype=np.float64)
+                if len(boundary) > 1:
+                    boundaries.append(boundary[:, :2])
+
+        if len(boundaries) == 0:
+            return np.empty((0, 2)), np.empty((0, 2))
+
+        edgeStart = np.vstack(boundaries)
+        edgeEnd = np.vstack([np.roll(boundary, -1, axis=0) for boundary in boundaries])
+
+        if isClipperPaths:
+            edgeStart /= paths.scaleFactor
+            edgeEnd /= paths.scaleFactor
+
+        return edgeStart, edgeEnd
+
+    @staticmethod
+    def clipLinesScanline(paths, lines) -> np.ndarray:
+        """
+        Clips a series of straight lines (hatches) across the closed polygon boundaries analytically, as an alternative
+        to :meth:`clipLines` that doesn't use `Pyclipper <https://pypi.org/project/pyclipper/>`_.
+
+        The lines are grouped by their direction and each group is rotated into a frame where its lines are horizontal
+        scanlines. Lines lying on the same scanline, e.g. across adjacent stripes, share a scanline to within the
+        resolution :meth:`error`. Every boundary edge is then intersected at once with all the scanlines it spans, and
+        the crossings along each scanline are sorted and tracked with the non-zero winding rule, as used by
+        :meth:`clipLines`, to give the intervals inside the boundary. Finally, each line is trimmed to these intervals.
+
+        :param paths: The set of boundary paths for trimming the lines, or :class:`~pyslm.core.ClipperPaths`
+        :param lines: The un-trimmed lines to clip from the boundary, with the hatch order in the z component
+        :return: The trimmed lines as a (n x 2 x 3) numpy array with the order of the line each was clipped from in
+                 the z component, sorted by their order and position along the line
+        """
+        lines = np.asarray(lines, dtype=np.float64).reshape(-1, 2, lines.shape[-1])
+        edgeStart, edgeEnd = BaseHatcher._boundaryEdges(paths)
+
+        if len(lines) == 0 or len(edgeStart) == 0:
+            return np.empty((0, 2, 3))
+
+        lineOrder = lines[:, 0, 2] if lines.shape[-1] > 2 else np.arange(len(lines), dtype=np.float64)
+        delta = lines[:, 1, :2] - lines[:, 0, :2]
+
+        # Group the lines by their direction, regardless of which way along it they run
+        angle = np.mod(np.arctan2(delta[:, 1], delta[:, 0]), np.pi)
+        angleKey = np.mod(np.rint(angle * 1e6), np.rint(np.pi * 1e6))
+
+        clipped = []
+
+        for key in np.unique(angleKey):
+            lineId = np.flatnonzero(angleKey == key)
+            theta = angle[lineId[0]]
+
+            # Unit vector along the lines and the normal across them
+            d = np.array([np.cos(theta), np.sin(theta)])
+            n = np.array([-d[1], d[0]])
+
+            lineOffset = lines[lineId, 0, :2].dot(n)
+            lineStart = lines[lineId, 0, :2].dot(d)
+            lineEnd = lines[lineId, 1, :2].dot(d)
+
+            # The unique scanlines (at the offset of the first line on each) and the scanline of every line
+            _, first, lineScan = np.unique(np.rint(lineOffset / BaseHatcher.error()).astype(np.int64),
+                                           return_index=True, return_inverse=True)
+            lineScan = lineScan.ravel()
+            scanOffset = lineOffset[first]
+
+            # Each edge crosses the scanlines in the half-open range of offsets it spans, so a scanline passing through
+            # a vertex is only crossed once by its two edges and edges along a scanline aren't crossed at all
+            ca, cb = edgeStart.dot(n), edgeEnd.dot(n)
+            sa, sb = edgeStart.dot(d), edgeEnd.dot(d)
+
+            firstScan = np.searchsorted(scanOffset, np.minimum(ca, cb), side='left')
+            lastScan = np.searchsorted(scanOffset, np.maximum(ca, cb), side='left')
+            numCrossings = lastScan - firstScan
+
+            edgeId = np.repeat(np.arange(len(ca)), numCrossings)
+            crossingScan = firstScan[edgeId] + np.arange(len(edgeId)) - np.repeat(
+                np.cumsum(numCrossings) - numCrossings, numCrossings)
+
+            ca, cb, sa, sb = ca[edgeId], cb[edgeId], sa[edgeId], sb[edgeId]
+            crossing = sa + (scanOffset[crossingScan] - ca) * (sb - sa) / (cb - ca)
+            winding = np.where(cb > ca, 1, -1)
+
+            # Sweep along each scanline in turn. Every scanline crosses each closed boundary as many times upwards as
+            # downwards, so the winding number is back at zero at the end of each scanline
+            order = np.lexsort((crossing, crossingScan))
+            crossing, crossingScan = crossing[order], crossingScan[order]
+            windingAfter = np.cumsum(winding[order])
+            windingBefore = windingAfter - winding[order]
+
+            enters = (windingBefore == 0) & (windingAfter != 0)
+            leaves = (windingBefore != 0) & (windingAfter == 0)
+
+            intervalStart, intervalEnd = crossing[enters], crossing[leaves]
+            intervalScan = crossingScan[enters]
+
+            # Trim each line to the intervals of its scanline
+            firstInterval = np.searchsorted(intervalScan, lineScan, side='left')
+            numIntervals = np.searchsorted(intervalScan, lineScan, side='right') - firstInterval
+
+            pairLine = np.repeat(np.arange(len(lineId)), numIntervals)
+            pairInterval = firstInterval[pairLine] + np.arange(len(pairLine)) - np.repeat(
+                np.cumsum(numIntervals) - numIntervals, numIntervals)
+
+            lo = np.maximum(intervalStart[pairInterval], np.minimum(lineStart, lineEnd)[pairLine])
+            hi = np.minimum(intervalEnd[pairInterval], np.maximum(lineStart, lineEnd)[pairLine])
+
+            keep = (hi - lo) >= BaseHatcher.error()
+            pairLine, lo, hi = pairLine[keep], lo[keep], hi[keep]
+
+            # Trimmed lines keep the direction of the line they were clipped from
+            reverse = (lineEnd < lineStart)[pairLine]
+            s0 = np.where(reverse, hi, lo)
+            s1 = np.where(reverse, lo, hi)
+
+            c = lineOffset[pairLine].reshape(-1, 1)
+            z = lineOrder[lineId[pairLine]].reshape(-1, 1)
+
+            segments = np.empty((len(pairLine), 2, 3))
+            segments[:, 0] = np.hstack([s0.reshape(-1, 1) * d + c * n, z])
+            segments[:, 1] = np.hstack([s1.reshape(-1, 1) * d + c * n, z])
+
+            clipped.append((lineId[pairLine], np.where(reverse, -s0, s0), segments))
+
+        lineId = np.hstack([item[0] for item in clipped])
+        position = np.hstack([item[1] for item in clipped])
+        segments = np.vstack([item[2] for item in clipped])
+
+        # Order the trimmed lines as the lines they were clipped from, and then along each line
+        return segments[np.lexsort((position, lineId))]
+
     @staticmethod
     def clipContourLines(paths, contourPaths: List[np.ndarray]):
         """
@@ -463,15 +793,23 @@ class BaseHatcher(abc.ABC):
 
         pc = pyclipper.Pyclipper()
 
-        for path in paths:
-            for boundary in path:
-                pc.AddPath(BaseHatcher.scaleToClipper(boundary), pyclipper.PT_CLIP, True)
+        BaseHatcher._addClipBoundaries(pc, paths)
 
         # Reshape line list to create n lines with 2 coords(x,y,z)
         #lineList = lines.reshape(-1, 2, 3)
         #lineList = tuple(map(tuple, lineList))
         #lineList = BaseHatcher.scaleToClipper(lineList)
 
+        if PYCLIPPER_ARRAYS:
+            coords, offsets = BaseHatcher._packPaths(contourPaths)
+            if len(offsets) > 1:
+                pc.AddPathsArray(coords, offsets, pyclipper.PT_SUBJECT, False)
+
+            coords, offsets = pc.ExecuteArray(pyclipper.CT_INTERSECTION, pyclipper.PFT_NONZERO, pyclipper.PFT_NONZERO)
+            coords = coords / BaseHatcher.PYCLIPPER_SCALEFACTOR
+
+            return [coords[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
         for contour in contourPaths:
             path = BaseHatcher.scaleToClipper(contour)
             pc.AddPath(path, pyclipper.PT_SUBJECT, False)
@@ -484,10 +822,54 @@ class BaseHatcher(abc.ABC):
 
         return BaseHatcher.scaleFromClipper(lineOutput)
 
+    def hatchesWithinExtent(self, paths, coords: np.ndarray, R: np.ndarray, centre: np.ndarray) -> np.ndarray:
+        """
+        Removes the un-clipped hatches that lie outside of the extent of the boundary chosen by :attr:`hatchExtent`.
+        The hatches are given in their own frame, i.e. before they are rotated by R and translated to the centre,
+        where each is parallel to the x or y axis, so the extent of the boundary is a rectangle (one per polygon for
+        'regions') bounding the boundary transformed back into this frame.
+
+        :param paths: The boundaries that the hatches should fill
+        :param coords: The (2n x 3) coordinates of the hatches in their own frame, with the hatch order in z
+        :param R: The (3x3) rotation matrix applied to the hatches
+        :param centre: The (x,y) position the hatches are translated to
+        :return: The coordinates of the hatches that cross the extent of the boundary
+        """
+        if self._hatchExtent == 'bbox' or len(coords) == 0:
+            return coords
+
+        isClipperPaths = isinstance(paths, ClipperPaths)
+
+        regions = []
+        for path in paths:
+            region = np.vstack([np.asarray(boundary, dtype=np.float64)[:, :2] for boundary in path])
+            regions.append(region / paths.scaleFactor if isClipperPaths else region)
+
+        if self._hatchExtent == 'boundary':
+            regions = [np.vstack(regions)]
+
+        # Transform each region into the frame of the hatches by the inverse (transpose) of R, i.e. (p - centre) R
+        extents = np.array([np.hstack([np.min(local, axis=0), np.max(local, axis=0)])
+                            for local in ((region - centre).dot(R[:2, :2]) for region in regions)])
+
+        # Expanded slightly, so hatches through a corner of the boundary aren't lost to rounding
+        extents[:, :2] -= self.error()
+        extents[:, 2:] += self.error()
+
+        hatches = coords.reshape(-1, 2, 3)
+        hatchMin = np.min(hatches[:, :, :2], axis=1)
+        hatchMax = np.max(hatches[:, :, :2], axis=1)
+
+        # A hatch parallel to the x or y axis crosses a rectangle if their bounding boxes overlap
+        overlaps = (hatchMax[:, None, 0] >= extents[None, :, 0]) & (hatchMin[:, None, 0] <= extents[None, :, 2]) & \
+                   (hatchMax[:, None, 1] >= extents[None, :, 1]) & (hatchMin[:, None, 1] <= extents[None, :, 3])
+
+        return hatches[np.any(overlaps, axis=1)].reshape(-1, 3)
+
     def generateHatching(self, paths, hatchSpacing: float, hatchAngle: Optional[float] = 90.0) -> np.ndarray:
         """
         Generates un-clipped hatches which is guaranteed to cover the entire polygon region base on the maximum extent
-        of the polygon bounding box
+        of the polygon bounding box. Only those within the :attr:`hatchExtent` are kept.
 
         :param paths: Boundary paths to generate hatches to cover
         :param hatchSpacing: Hatch Spacing to use
@@ -528,6 +910,8 @@ class BaseHatcher(abc.ABC):
                       (s, c, 0),
                       (0, 0, 1.0)])
 
+        coords = self.hatchesWithinExtent(paths, coords, R, bboxCentre)
+
         # Apply the rotation matrix and translate to bounding box centre
         coords = np.matmul(R, coords.T)
         coords = coords.T + np.hstack([bboxCentre, 0.0])
@@ -727,6 +1111,10 @@ class Hatcher(BaseHatcher):
         self._hatchAngle = 45
         self._hatchSortMethod = None
         self._hatchingEnabled = True
+        self._hatchClipMethod = 'clipper'
+
+        # Whether the last layer given to hatch was filled with hatches
+        self._layerHatched = False
 
     @property
     def hatchDistance(self) -> float:
@@ -853,85 +1241,162 @@ class Hatcher(BaseHatcher):
     def hatchingEnabled(self, value):
         self._hatchingEnabled = value
 
-    def hatch(self, boundaryFeature) -> Union[Layer, None]:
+    @property
+    def layerHatched(self) -> bool:
+        """
+        Whether the last call to :meth:`hatch` filled the boundaries with hatches, and so advanced the hatch angle if it
+        wasn't given the angle of the layer. This is what :meth:`hatchesBoundary` predicts, but found without offsetting
+        the boundaries again.
+        """
+        return self._layerHatched
+
+    @property
+    def hatchClipMethod(self) -> str:
+        """
+        The method used to clip the hatches to the boundary: 'clipper' uses :meth:`~BaseHatcher.clipLines` and
+        'scanline' uses :meth:`~BaseHatcher.clipLinesScanline` (default: 'clipper')
+        """
+        return self._hatchClipMethod
+
+    @hatchClipMethod.setter
+    def hatchClipMethod(self, method: str):
+        if method not in ('clipper', 'scanline'):
+            raise ValueError("Hatch clip method must be 'clipper' or 'scanline', not '{:s}'".format(str(method)))
+
+        self._hatchClipMethod = method
+
+    def advanceHatchAngle(self, hatchAngle: float) -> float:
+        """
+        The hatch angle of the next layer hatched after one hatched at the given angle: incremented by the
+        :attr:`layerAngleIncrement` and bound by the +ve X vector. :meth:`hatch` does this to the :attr:`hatchAngle` for
+        every layer it fills with hatches (see :meth:`hatchesBoundary`), unless it is given the angle of the layer.
+
+        Replaying this over the layers of a build in order gives each layer exactly the angle it would get by hatching
+        the layers in turn with a single hatcher, so layers may then be hatched independently and in any order (e.g.
+        across multiple processes).
+
+        :param hatchAngle: The hatch angle of the previous layer that was hatched [degrees]
+        :return: The hatch angle of the next layer [degrees]
+        """
+        # Hatch angle will change per layer
+        hatchAngle = np.mod(hatchAngle + self._layerAngleIncrement, 180)
+
+        # The layer hatch angle needs to be bound by +ve X vector (i.e. -90 < theta_h < 90 )
+        if hatchAngle > 90:
+            hatchAngle = hatchAngle - 180
+
+        return hatchAngle
+
+    def _hatchOffsets(self) -> Tuple[List[float], float]:
+        """
+        The offsets of the boundary for each contour, outer contours first, and for the boundary of the hatches.
+        """
+        # First generate a boundary with the spot compensation applied
+        offsetDelta = 1e-6
+        offsetDelta -= self._spotCompensation
+
+        contourOffsets = []
+        for i in range(self._numOuterContours + self._numInnerContours):
+            offsetDelta -= self._contourOffset
+            contourOffsets.append(offsetDelta)
+
+        # The final offset is applied to the boundary if there has been existing contour offsets applied
+        if self._numInnerContours + self._numOuterContours > 0:
+            offsetDelta -= self._volOffsetHatch
+
+        return contourOffsets, offsetDelta
+
+    def hatchesBoundary(self, boundaryFeature) -> bool:
+        """
+        Whether :meth:`hatch` fills the boundaries with hatches, and so advances the hatch angle (see
+        :meth:`advanceHatchAngle`). This is not the case for an empty slice, when hatching is disabled, or when there
+        is no region left inside the contours.
+
+        :param boundaryFeature: The collection of boundaries of closed polygons within a layer.
+        :return: True if the boundaries are hatched
+        """
+        if len(boundaryFeature) == 0 or not self.hatchingEnabled:
+            return False
+
+        contourOffsets, hatchOffset = self._hatchOffsets()
+
+        # Only the number of polygons is needed, so they aren't scaled back from the integer coordinate system
+        return len(self.offsetBoundary(boundaryFeature, hatchOffset, returnClipperPaths=True)) > 0
+
+    def hatch(self, boundaryFeature, layerHatchAngle: Optional[float] = None) -> Union[Layer, None]:
         """
         Generates a series of contour or boundary offsets along with a basic full region internal hatch.
 
+        If the hatch angle of the layer is provided (e.g. from :meth:`advanceHatchAngle`), the hatches are generated at
+        this angle and the state of the hatcher is left unchanged. Otherwise, the :attr:`hatchAngle` is incremented by
+        :attr:`layerAngleIncrement` on each call that generates hatches.
+
         :param boundaryFeature: The collection of boundaries of closed polygons within a layer.
+        :param layerHatchAngle: The (optional) hatch angle of the layer [degrees]
         :return: A :class:`Layer` object containing a list of :class:`LayerGeometry` objects generated
         """
+        self._layerHatched = False
+
         if len(boundaryFeature) == 0:
             return None
 
         layer = Layer(0, 0)
-        # First generate a boundary with the spot compensation applied
-
-        offsetDelta = 1e-6
-        offsetDelta -= self._spotCompensation
 
         # Store all contour layer geometries to before adding at the end of each layer
         contourLayerGeometries = []
         hatchLayerGeometries = []
 
-        for i in range(self._numOuterContours):
-            offsetDelta -= self._contourOffset
-            offsetBoundary = self.offsetBoundary(boundaryFeature, offsetDelta)
+        contourOffsets, offsetDelta = self._hatchOffsets()
 
-            for poly in offsetBoundary:
-                for path in poly:
-                    contourGeometry = ContourGeometry()
-                    contourGeometry.coords = np.array(path)[:, :2]
-                    contourGeometry.subType = "outer"
-                    contourLayerGeometries.append(contourGeometry)  # Append to the layer
-
-        # Repeat for inner contours
-        for i in range(self._numInnerContours):
-            offsetDelta -= self._contourOffset
-            offsetBoundary = self.offsetBoundary(boundaryFeature, offsetDelta)
+        # All the contours and the hatch boundary are offset in one pass. Boundaries sliced directly into the integer
+        # coordinate system stay there for clipping the hatches
+        contourBoundaries, curBoundary = self.offsetBoundaryLevels(
+            boundaryFeature, contourOffsets, offsetDelta, returnClipperPaths=isinstance(boundaryFeature, ClipperPaths))
 
+        # The outer contours come first, followed by the inner contours
+        for i, offsetBoundary in enumerate(contourBoundaries):
             for poly in offsetBoundary:
                 for path in poly:
                     contourGeometry = ContourGeometry()
                     contourGeometry.coords = np.array(path)[:, :2]
-                    contourGeometry.subType = "inner"
+                    contourGeometry.subType = "outer" if i < self._numOuterContours else "inner"
                     contourLayerGeometries.append(contourGeometry)  # Append to the layer
 
-        # The final offset is applied to the boundary if there has been existing contour offsets applied
-        if self._numInnerContours + self._numOuterContours > 0:
-            offsetDelta -= self._volOffsetHatch
-
-        curBoundary = self.offsetBoundary(boundaryFeature, offsetDelta)
-
         scanVectors = []
 
-        if self.hatchingEnabled and len(curBoundary) > 0:
+        self._layerHatched = self.hatchingEnabled and len(curBoundary) > 0
+        if self._layerHatched:
             paths = curBoundary
 
-            # Hatch angle will change per layer
-            self._hatchAngle = np.mod(self._hatchAngle + self._layerAngleIncrement, 180)
-
-            # The layer hatch angle needs to be bound by +ve X vector (i.e. -90 < theta_h < 90 )
-            if self._hatchAngle > 90:
-                self._hatchAngle = self._hatchAngle - 180
+            if layerHatchAngle is None:
+                # Hatch angle will change per layer
+                self._hatchAngle = self.advanceHatchAngle(self._hatchAngle)
+                layerHatchAngle = self._hatchAngle
 
             # NOTE: MUST happen after changing hatch angle 
             if self.hatchSortMethod:
-                self.hatchSortMethod.hatchAngle = self.hatchAngle
+                self.hatchSortMethod.hatchAngle = layerHatchAngle
 
             # Generate the un-clipped hatch regions based on the layer hatchAngle and hatch distance
-            hatches = self.generateHatching(paths, self._hatchDistance, self._hatchAngle)
+            hatches = self.generateHatching(paths, self._hatchDistance, layerHatchAngle)
 
             # Clip the hatch fill to the boundary
-            clippedPaths = self.clipLines(paths, hatches)
-            clippedLines = []
+            if self._hatchClipMethod == 'scanline':
+                # The trimmed lines are already in order, so only the x-y coordinates are kept
+                clippedLines = self.clipLinesScanline(paths, hatches)[:, :, :2]
+            else:
+                clippedPaths = self.clipLines(paths, hatches)
+                clippedLines = []
 
-            # Merge the lines together
-            if len(clippedPaths) > 0:
+                if len(clippedPaths) > 0:
+                    clippedLines = BaseHatcher.clipperToHatchArray(clippedPaths)
 
-                clippedLines = BaseHatcher.clipperToHatchArray(clippedPaths)
+                    # Extract only x-y coordinates; the pseudo-order is stored in the z component by pyclipper
+                    # builds with use_xyz
+                    clippedLines = clippedLines[:, :, :2]
 
-                # Extract only x-y coordinates and sort based on the pseudo-order stored in the z component.
-                clippedLines = clippedLines[:, :, :3]
+            # Merge the lines together
+            if len(clippedLines) > 0:
 
                 '''
                 for i in range(len(clippedLines)): 
@@ -1108,6 +1573,8 @@ class StripeHatcher(Hatcher):
                       (s, c, 0),
                       (0, 0, 1.0)])
 
+        coords = self.hatchesWithinExtent(paths, coords, R, bboxCentre)
+
         # Apply the rotation matrix and translate to bounding box centre
         coords = np.matmul(R, coords.T)
         coords = coords.T + np.hstack([bboxCentre, 0.0])
@@ -1242,6 +1709,8 @@ class BasicIslandHatcher(Hatcher):
                       (s, c, 0),
                       (0, 0, 1.0)])
 
+        coords = self.hatchesWithinExtent(paths, coords, R, bboxCentre)
+
         # Apply the rotation matrix and translate to bounding box centre
         coords = np.matmul(R, coords.T)
         coords = coords.T + np.hstack([bboxCentre, 0.0])
@@ -5,6 +5,16 @@ import numpy as np
 from pyslm import pyclipper
 from shapely.geometry import LinearRing, MultiPolygon, Polygon
 
+try:
+    # Vectorised predicates on arrays of geometries, available from Shapely 2.0
+    from shapely import intersects as shapelyIntersects, overlaps as shapelyOverlaps, polygons as shapelyPolygons, \
+        prepare as shapelyPrepare
+except ImportError:
+    shapelyPolygons = None
+    shapelyIntersects = None
+    shapelyOverlaps = None
+    shapelyPrepare = None
+
 from ..geometry import Layer, LayerGeometry, ContourGeometry, HatchGeometry, PointsGeometry
 from .hatching import Hatcher, InnerHatchRegion
 from .utils import pathsToClosedPolygons
@@ -101,6 +111,30 @@ class Island(InnerHatchRegion):
         coords = self.localBoundary()
         return Polygon(self.transformCoordinates2D(coords))
 
+    @staticmethod
+    def boundaries(islands: List['Island']) -> np.ndarray:
+        """
+        Returns the boundaries of many islands at once, as obtained from :meth:`~Island.boundary` for each, but with
+        the coordinates of all the islands transformed together and the polygons created in a single call. The local
+        boundaries of the islands must all have the same number of points. This requires Shapely 2.0.
+
+        :param islands: The islands
+        :return: An array of the boundary polygons
+        """
+        if len(islands) == 0:
+            return np.empty(0, dtype=object)
+
+        local = np.array([island.localBoundary() for island in islands])
+        origin = np.array([island.origin for island in islands]).reshape(-1, 1, 2)
+        theta = np.array([island.orientation for island in islands]).reshape(-1, 1)
+        c, s = np.cos(theta), np.sin(theta)
+
+        # Rotate each island's local boundary by its own orientation and translate it to its origin
+        coords = np.stack([c * local[:, :, 0] - s * local[:, :, 1],
+                           s * local[:, :, 0] + c * local[:, :, 1]], axis=2) + origin
+
+        return shapelyPolygons(coords)
+
     def generateInternalHatch(self, isOdd: bool = True) -> np.ndarray:
         """
         Generates a set of hatches orthogonal to the island's coordinate system :math:`(x', y')`.
@@ -275,71 +309,75 @@ class IslandHatcher(Hatcher):
 
         return islands
 
-    def hatch(self, boundaryFeature) -> Layer:
+    def advanceHatchAngle(self, hatchAngle: float) -> float:
         """
-        Generates the Island Scan Strategy for a layer given a list of boundary features
-
-        :param boundaryFeature: A list of boundary features
+        The islands of every layer are orientated using the base :attr:`hatchAngle` (the hatches of neighbouring
+        islands already alternate in direction), so the hatch angle stays the same from one layer to the next.
 
-        :return: A layer containing the layer geometry
+        :param hatchAngle: The hatch angle of the previous layer that was hatched [degrees]
+        :return: The hatch angle of the next layer [degrees]
         """
+        return hatchAngle
 
-        if len(boundaryFeature) == 0:
-            return
-
-        layer = Layer(0, 0)
-
+    def _hatchOffsets(self) -> Tuple[List[float], float]:
         """
         First generate the boundary with the spot compensation applied including outer and inner contours
         """
-
         offsetDelta = 0.0
         offsetDelta -= self._spotCompensation
 
-        for i in range(self._numOuterContours):
+        contourOffsets = []
+        for i in range(self._numOuterContours + self._numInnerContours):
             offsetDelta -= self._contourOffset
-            offsetBoundary = self.offsetBoundary(boundaryFeature, offsetDelta)
+            contourOffsets.append(offsetDelta)
 
-            for poly in offsetBoundary:
-                for path in poly:
-                    contourGeometry = ContourGeometry()
-                    contourGeometry.coords = np.array(path)[:, :2]
-                    contourGeometry.subType = "outer"
-                    layer.geometry.append(contourGeometry)  # Append to the layer
+        # The final offset is applied to the boundary
+        offsetDelta -= self._volOffsetHatch
 
-        # Repeat for inner contours
-        for i in range(self._numInnerContours):
+        return contourOffsets, offsetDelta
 
-            offsetDelta -= self._contourOffset
-            offsetBoundary = self.offsetBoundary(boundaryFeature, offsetDelta)
+    def hatch(self, boundaryFeature, layerHatchAngle: Optional[float] = None) -> Layer:
+        """
+        Generates the Island Scan Strategy for a layer given a list of boundary features. The islands are orientated
+        using the hatch angle of the layer if it is provided, and otherwise the base :attr:`hatchAngle` (see
+        :meth:`advanceHatchAngle`).
+
+        :param boundaryFeature: A list of boundary features
+        :param layerHatchAngle: The (optional) hatch angle of the layer [degrees]
+
+        :return: A layer containing the layer geometry
+        """
+        self._layerHatched = False
+
+        if len(boundaryFeature) == 0:
+            return
+
+        if layerHatchAngle is None:
+            layerHatchAngle = self._hatchAngle
+
+        layer = Layer(0, 0)
+
+        contourOffsets, offsetDelta = self._hatchOffsets()
 
+        # All the contours and the hatch boundary are offset in one pass
+        contourBoundaries, curBoundary = self.offsetBoundaryLevels(boundaryFeature, contourOffsets, offsetDelta)
+
+        # The outer contours come first, followed by the inner contours
+        for i, offsetBoundary in enumerate(contourBoundaries):
             for poly in offsetBoundary:
                 for path in poly:
                     contourGeometry = ContourGeometry()
                     contourGeometry.coords = np.array(path)[:, :2]
-                    contourGeometry.subType = "inner"
+                    contourGeometry.subType = "outer" if i < self._numOuterContours else "inner"
                     layer.geometry.append(contourGeometry)  # Append to the layer
 
-        # The final offset is applied to the boundary
-
-        offsetDelta -= self._volOffsetHatch
-
-        curBoundary = self.offsetBoundary(boundaryFeature, offsetDelta)
-
         scanVectors = []
 
-        # Iterate through each closed polygon region in the slice. The currently individually sliced.
-
-        # Hatch angle will change per layer
-        # TODO change the layer angle increment
-        layerHatchAngle = np.mod(self._hatchAngle + self._layerAngleIncrement, 180)
-
-        # The layer hatch angle needs to be bound by +ve X vector (i.e. -90 < theta_h < 90 )
-        if layerHatchAngle > 90:
-            layerHatchAngle = layerHatchAngle - 180
+        # The islands are hatched as long as there is a region left inside the contours (see hatchesBoundary)
+        self._layerHatched = self.hatchingEnabled and len(curBoundary) > 0
 
         # Generate the square island sub regions
-        islands = self.generateIslands(curBoundary, self._hatchAngle)
+        islands = self.generateIslands(curBoundary, layerHatchAngle)
 
         # All Island sub-regions need to have an intersection test
         self.intersectIslands(curBoundary, islands)
@@ -416,12 +454,13 @@ class IslandHatcher(Hatcher):
     def intersectIslands(self, paths, islands: List[Island]) -> Tuple[Any, Any]:
         """
         Perform the intersection and overlap tests on the island sub regions. This should be performed before any
-        clipping operations are performed.
+        clipping operations are performed. With Shapely 2.0, all the islands (see :meth:`Island.boundaries`) are tested
+        together against the prepared boundary, rather than one at a time.
 
         :param paths: List of coordinates describing the boundary
         :param islands: A list of Islands to have the intersection and overlap test
 
-        :return: A tuple containing lists of clipped and unClipped islands
+        :return: A tuple containing the sets of the indices of the clipped and unClipped islands
         """
         polys = []
         for path in paths:
@@ -429,29 +468,28 @@ class IslandHatcher(Hatcher):
 
         poly = MultiPolygon(polys)
 
-        intersectIslands = []
-        overlapIslands = []
-
-        intersectIslandsSet = set()
-        overlapIslandsSet = set()
-
-        for i in range(len(islands)):
-
-            island = islands[i]
-            s = island.boundary()
+        if shapelyIntersects is None:
+            boundaries = [island.boundary() for island in islands]
+            intersecting = np.array([poly.intersects(s) for s in boundaries], dtype=bool)
+            overlapping = np.array([poly.overlaps(s) for s in boundaries], dtype=bool)
+        else:
+            # Test all the islands against the prepared boundary at once. Only the islands intersecting the boundary
+            # can overlap it, i.e. cross its edges, so only these have the more expensive overlap test
+            shapelyPrepare(poly)
+            boundaries = Island.boundaries(islands)
 
-            if poly.overlaps(s):
-                overlapIslandsSet.add(i)  # id
-                overlapIslands.append(island.boundary)
-                island.setRequiresClipping(True)
+            intersecting = shapelyIntersects(poly, boundaries)
+            overlapping = np.zeros(len(islands), dtype=bool)
+            overlapping[intersecting] = shapelyOverlaps(poly, boundaries[intersecting])
 
-            if poly.intersects(s):
-                intersectIslandsSet.add(i)  # id
-                intersectIslands.append(island.boundary)
-                island.setIntersecting(True)
+        # Islands crossing the boundary require clipping, whilst those entirely inside are kept as they are
+        for i in np.flatnonzero(overlapping):
+            islands[i].setRequiresClipping(True)
 
+        for i in np.flatnonzero(intersecting):
+            islands[i].setIntersecting(True)
 
-        unTouchedIslandSet = intersectIslandsSet - overlapIslandsSet
-        unTouchedIslands = [islands[i] for i in unTouchedIslandSet]
+        overlapIslandsSet = set(np.flatnonzero(overlapping).tolist())
+        unTouchedIslandSet = set(np.flatnonzero(intersecting & ~overlapping).tolist())
 
         return overlapIslandsSet, unTouchedIslandSet
\ No newline at end of file
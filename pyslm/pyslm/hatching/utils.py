@@ -4,7 +4,6 @@ import trimesh.path.polygons
 import shapely.geometry
 
 from shapely.geometry import Polygon, LinearRing
-from skimage.measure import approximate_polygon
 
 
 def simplifyBoundaries(paths: List[Any], tolerance: float = 0.5, method : Optional[str] = '') -> Any:
@@ -25,6 +24,8 @@ def simplifyBoundaries(paths: List[Any], tolerance: float = 0.5, method : Option
     if isinstance(paths[0], shapely.geometry.Polygon):
         boundaries = [path.simplify(tolerance, preserve_topology=True) for path in paths]
     else:
+        # scikit-image is slow to import and only needed here
+        from skimage.measure import approximate_polygon
         boundaries = [approximate_polygon(path, tolerance) for path in paths]
 
     return boundaries
@@ -0,0 +1,82 @@
+from typing import Tuple
+import os
+
+import numpy as np
+
+STL_HEADER_SIZE = 84
+""" Size of the binary STL header: 80 bytes of text followed by the number of triangles as an uint32 """
+
+STL_RECORD_DTYPE = np.dtype([('normal', '<f4', (3,)),
+                             ('vertices', '<f4', (3, 3)),
+                             ('attributes', '<u2')])
+""" Layout of each 50 byte triangle record of a binary STL file """
+
+
+def isBinarySTL(filename: str) -> bool:
+    """
+    Checks whether a file is a binary STL file, i.e. that its size matches the number of triangles given in its
+    header. ASCII STL files (and any other mesh format) fail this check.
+
+    :param filename: The mesh filename
+    :return: True if the file is a binary STL file
+    """
+    if not filename.lower().endswith('.stl'):
+        return False
+
+    size = os.path.getsize(filename)
+
+    if size < STL_HEADER_SIZE:
+        return False
+
+    with open(filename, 'rb') as f:
+        f.seek(80)
+        numTriangles = int(np.frombuffer(f.read(4), dtype='<u4')[0])
+
+    return size == STL_HEADER_SIZE + numTriangles * STL_RECORD_DTYPE.itemsize
+
+
+def readBinarySTL(filename: str, mergeVertices: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reads the triangles of a binary STL file. The file is memory-mapped and its triangle records viewed as a numpy
+    structured array, so the only copy of the data made is that of the vertex coordinates.
+
+    When merging vertices, the corners of the triangles with identical coordinates are combined into a single
+    vertex (in the order of their first occurrence in the file) using a vectorised unique-rows search, rather than
+    being merged within a tolerance as `trimesh` does.
+
+    :param filename: The binary STL filename
+    :param mergeVertices: Merges the identical vertices of the triangles: Default = `True`
+    :return: A tuple of the (nx3) vertices and (mx3) faces of the mesh
+    """
+    if not isBinarySTL(filename):
+        raise ValueError('{:s} is not a binary STL file'.format(filename))
+
+    numTriangles = (os.path.getsize(filename) - STL_HEADER_SIZE) // STL_RECORD_DTYPE.itemsize
+
+    if numTriangles == 0:
+        return np.empty((0, 3)), np.empty((0, 3), dtype=np.int64)
+
+    records = np.memmap(filename, dtype=STL_RECORD_DTYPE, mode='r', offset=STL_HEADER_SIZE, shape=(numTriangles,))
+
+    # Adding zero copies the corners out of the records and also turns any -0.0 into 0.0, so equal coordinates have
+    # identical bytes
+    corners = records['vertices'].reshape(-1, 3) + np.float32(0.0)
+    del records
+
+    if not mergeVertices:
+        faces = np.arange(len(corners), dtype=np.int64).reshape(-1, 3)
+        return corners.astype(np.float64), faces
+
+    # Each corner is compared as a single 12 byte value
+    rows = np.ascontiguousarray(corners).view(np.dtype((np.void, corners.dtype.itemsize * 3))).ravel()
+    _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+
+    # Number the unique vertices in the order they first appear in the file
+    order = np.argsort(first)
+    index = np.empty(len(order), dtype=np.int64)
+    index[order] = np.arange(len(order))
+
+    vertices = corners[first[order]].astype(np.float64)
+    faces = index[inverse.ravel()].reshape(-1, 3)
+
+    return vertices, faces
@@ -390,22 +390,17 @@ def plotHeatMap(part: Part, z: float, exposurePoints: np.ndarray, resolution:flo
     fig, ax = plt.subplots()
     ax.axis('equal')
 
-    bitmap = part.getBitmapSlice(z, 0.1)
-    offset = part.boundingBox[:2]
-
     if exposurePoints.shape[1] != 3:
         raise ValueError('Exposure points must include energy deposited i.e. 3rd column')
 
     # Offset the coordinates based on the resolution and the bounding box of the part
     exposurePoints[:, :2] -= part.boundingBox[:2] + resolution / 2
-    expPointTrans = np.floor(exposurePoints[:, :2] / resolution).astype(np.int)
+    expPointTrans = np.floor(exposurePoints[:, :2] / resolution).astype(np.int64)
 
-    # Get a bitmap object to work on
-    bitmapSlice  = part.getBitmapSlice(z, resolution).astype(np.int)
-    slice = np.zeros(bitmapSlice.shape)
+    # Only the size of the bitmap covering the part is needed to work on
+    slice = np.zeros(part.getBitmapShape(resolution))
 
-    for i in range(len(expPointTrans)):
-        slice[expPointTrans[i,1], expPointTrans[i,0]] += exposurePoints[i,2]
+    np.add.at(slice, (expPointTrans[:, 1], expPointTrans[:, 0]), exposurePoints[:, 2])
 
     slice /= resolution*resolution
 
@@ -5,4 +5,7 @@ import os
 import pyslm
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-
+# The scan path generator built on pyslm (src/), whose layer pipeline is tested here too. Its paths (e.g. to the
+# parts in geometry/ and to schema.json) are relative to this directory
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(REPO_DIR)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+from .context import pyslm, REPO_DIR
+
+import json
+import os
+import tempfile
+import unittest
+
+from load_parameters import default_config
+from src.pipeline.batch import load_jobs, run_job, run_batch
+
+
+class BatchTestSuite(unittest.TestCase):
+    """A batch runs each job into its own output folder, and a failed job doesn't stop the others."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._cwd = os.getcwd()
+        os.chdir(REPO_DIR)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls._cwd)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def loadJobs(self, jobs):
+        path = os.path.join(self.tmp.name, 'jobs.json')
+        with open(path, 'w') as f:
+            json.dump(jobs, f)
+        return load_jobs(path)
+
+    def readFiles(self, outputDir: str) -> dict:
+        files = {}
+        for name in os.listdir(outputDir):
+            with open(os.path.join(outputDir, name), 'rb') as f:
+                files[name] = f.read()
+        return files
+
+    def test_load_jobs(self):
+        output = os.path.join(self.tmp.name, 'out')
+        jobs = self.loadJobs([{"config": {"Part File Name": "Cone_1.STL", "Hatch Distance": "0.2"}, "output": output},
+                              {"output": os.path.relpath(output + '_default')}])
+
+        # The options not given keep their defaults, and values given as strings are converted as in schema.json
+        self.assertEqual(jobs[0]["config"]["Hatch Distance"], 0.2)
+        self.assertEqual(jobs[0]["config"]["Part File Name"], "Cone_1.STL")
+        self.assertEqual(jobs[1]["config"]["Part File Name"], default_config()["Part File Name"])
+        self.assertEqual([job["output"] for job in jobs], [output, output + '_default'])
+
+        for entries in ({"output": output}, [{"config": {}}], [{"output": output}, {"output": output}]):
+            with self.assertRaises(ValueError):
+                self.loadJobs(entries)
+
+    def test_batch(self):
+        jobs = self.loadJobs([{"config": {"Part File Name": "Cone_1.STL"}, "output": os.path.join(self.tmp.name, 'a')},
+                              {"config": {"Part File Name": "Missing.STL"}, "output": os.path.join(self.tmp.name, 'b')},
+                              {"config": {"Part File Name": "Cone_1.STL", "Hatch Distance": 0.2},
+                               "output": os.path.join(self.tmp.name, 'c')}])
+
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                results = {os.path.basename(result["output"]): result for result in run_batch(jobs, workers)}
+                self.assertEqual(sorted(results), ['a', 'b', 'c'])
+
+                self.assertIn("Missing.STL", results['b']["error"])
+                self.assertNotIn("layers", results['b'])
+
+                files = {}
+                for name in ('a', 'c'):
+                    self.assertNotIn("error", results[name])
+                    files[name] = self.readFiles(jobs[ord(name) - ord('a')]["output"])
+                    self.assertGreater(results[name]["layers"], 0)
+                    self.assertEqual(len(files[name]), results[name]["layers"])
+
+                # Each job is hatched with its own options
+                self.assertEqual(results['a']["layers"], results['c']["layers"])
+                self.assertNotEqual(files['a'], files['c'])
+
+                # A job gives the same output whether run alone or as part of a batch
+                self.assertEqual(run_job(jobs[0])["layers"], results['a']["layers"])
+                self.assertEqual(self.readFiles(jobs[0]["output"]), files['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
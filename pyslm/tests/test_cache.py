@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+from .context import pyslm, REPO_DIR
+
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from pyslm.geometry import Layer, HatchGeometry
+from load_parameters import default_config
+from src.pipeline.cache import LayerCache, HatchedFlags, build_digest
+from src.pipeline.pipeline import create_part, create_hatcher, layer_heights, part_file_path, generate_layers
+
+from .test_pipeline import layerKey
+
+
+def hatchLayer(z: int, numHatches: int) -> Layer:
+    layer = Layer(0, 0)
+    layer.z = z
+    geom = HatchGeometry()
+    geom.coords = np.arange(numHatches * 4, dtype=float).reshape(-1, 2)
+    geom.mid, geom.bid = 1, 1
+    layer.geometry.append(geom)
+    return layer
+
+
+class LayerCacheTestSuite(unittest.TestCase):
+    """Layers are cached by build, height and hatch angle, and the least recently used ones are evicted."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._cwd = os.getcwd()
+        os.chdir(REPO_DIR)
+
+        cls.config = default_config()
+        cls.config["Part File Name"] = "Cone_1.STL"
+        cls.part = create_part(cls.config)
+        cls.heights = layer_heights(cls.part, cls.config["Layer Thickness"])
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls._cwd)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def digest(self, hatcher) -> str:
+        return build_digest(part_file_path(self.config), self.part, hatcher)
+
+    def generate(self, cache=None, **kwargs):
+        hatcher = create_hatcher(self.config, verbose=False)
+        return [layerKey(layer) for layer in generate_layers(self.part, hatcher, self.heights, self.config,
+                                                              cache=cache, **kwargs)]
+
+    def test_cached_layers(self):
+        expected = self.generate()
+        digest = self.digest(create_hatcher(self.config, verbose=False))
+
+        cache = LayerCache(self.tmp.name, 1 << 30, digest)
+        self.assertEqual(self.generate(cache), expected)
+        self.assertEqual((cache.hits, cache.misses), (0, len(self.heights)))
+
+        # A second run loads every layer and its hatched flag from the cache, without slicing the part
+        cache = LayerCache(self.tmp.name, 1 << 30, digest)
+        with mock.patch.object(pyslm.Part, 'getVectorSlice', side_effect=AssertionError), \
+                mock.patch.object(pyslm.Part, 'getVectorSlices', side_effect=AssertionError):
+            self.assertEqual(self.generate(cache), expected)
+        self.assertEqual((cache.hits, cache.misses), (len(self.heights), 0))
+
+    def test_workers(self):
+        expected = self.generate()
+        digest = self.digest(create_hatcher(self.config, verbose=False))
+
+        # Only some of the layers are cached, but whether every layer below the last of them is hatched is too
+        cache = LayerCache(self.tmp.name, 1 << 30, digest)
+        layerIds = list(range(0, 60, 3))
+        self.assertEqual(self.generate(cache, workers=2, layer_ids=layerIds),
+                         [expected[layerId] for layerId in layerIds])
+        self.assertEqual((cache.hits, cache.misses), (0, len(layerIds)))
+
+        # The cached layers are loaded, the others below them generated at the angles known from the cache, and the
+        # layers above sliced to find out whether they are hatched
+        cache = LayerCache(self.tmp.name, 1 << 30, digest)
+        self.assertEqual(self.generate(cache, workers=2), expected)
+        self.assertEqual((cache.hits, cache.misses), (len(layerIds), len(self.heights) - len(layerIds)))
+
+    def test_key(self):
+        hatcher = create_hatcher(self.config, verbose=False)
+        digest = self.digest(hatcher)
+        cache = LayerCache(self.tmp.name, 1 << 30, digest)
+        cache.put(1.0, 10.0, hatchLayer(1000, 4))
+        cache.put(2.0, 10.0, None)
+
+        self.assertEqual(layerKey(cache.get(1.0, 10.0)[1]), layerKey(hatchLayer(1000, 4)))
+        self.assertEqual(cache.get(2.0, 10.0), (True, None))
+        self.assertEqual(cache.get(1.0, 76.6), (False, None))
+        self.assertEqual(cache.get(3.0, 10.0), (False, None))
+
+        # Changing a hatcher parameter changes the digest of the build, so none of its layers are shared
+        hatcher.hatchDistance *= 2
+        self.assertNotEqual(self.digest(hatcher), digest)
+        cache = LayerCache(self.tmp.name, 1 << 30, self.digest(hatcher))
+        self.assertEqual(cache.get(1.0, 10.0), (False, None))
+
+        cache.put_hatched(1.0, True)
+        self.assertTrue(cache.get_hatched(1.0))
+        self.assertIsNone(cache.get_hatched(2.0))
+
+    def test_optional_params(self):
+        # Hatcher options left at their defaults give the digest of a hatcher from before they were added
+        hatcher = create_hatcher(self.config, verbose=False)
+        digest = self.digest(hatcher)
+        older = create_hatcher(self.config, verbose=False)
+        del older._hatchExtent, older._hatchClipMethod
+        self.assertEqual(self.digest(older), digest)
+
+        for name, value in (('hatchExtent', 'regions'), ('hatchClipMethod', 'scanline')):
+            with self.subTest(name=name):
+                hatcher = create_hatcher(self.config, verbose=False)
+                setattr(hatcher, name, value)
+                self.assertNotEqual(self.digest(hatcher), digest)
+
+    def test_eviction(self):
+        cache = LayerCache(self.tmp.name, 1 << 30, 'digest')
+        for z in range(4):
+            cache.put(float(z), 0.0, hatchLayer(z, 100))
+            # The modification times order the entries by their last use, so they must differ
+            time.sleep(0.01)
+        entrySize = cache._size // 4
+
+        # Using the first layer again leaves the second one as the least recently used
+        self.assertTrue(cache.get(0.0, 0.0)[0])
+        cache.put(4.0, 0.0, hatchLayer(4, 100))
+
+        cache = LayerCache(self.tmp.name, 4 * entrySize, 'digest')
+        self.assertEqual([cache.get(float(z), 0.0)[0] for z in range(5)], [True, False, True, True, True])
+        self.assertLessEqual(cache._size, 4 * entrySize)
+
+        # However small the limit, the entry just written is kept
+        cache = LayerCache(self.tmp.name, 1, 'digest')
+        cache.put(5.0, 0.0, hatchLayer(5, 100))
+        self.assertEqual([cache.get(float(z), 0.0)[0] for z in range(6)], [False] * 5 + [True])
+
+
+class HatchedFlagsTestSuite(unittest.TestCase):
+    """A run records which layers are hatched, so a later selection of the same build only slices the selected layers."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._cwd = os.getcwd()
+        os.chdir(REPO_DIR)
+
+        cls.config = default_config()
+        cls.config["Part File Name"] = "Cone_1.STL"
+        cls.part = create_part(cls.config)
+        cls.heights = layer_heights(cls.part, cls.config["Layer Thickness"])
+        cls.digest = build_digest(part_file_path(cls.config), cls.part, create_hatcher(cls.config, verbose=False))
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls._cwd)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'XMLOutput_hatched.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def generate(self, flags, layerIds=None):
+        # Returns the layers along with the heights the part was sliced at
+        getVectorSlices = pyslm.Part.getVectorSlices
+        with mock.patch.object(pyslm.Part, 'getVectorSlices', autospec=True,
+                               side_effect=getVectorSlices) as slices:
+            hatcher = create_hatcher(self.config, verbose=False)
+            layers = [layerKey(layer) for layer in generate_layers(self.part, hatcher, self.heights, self.config,
+                                                                    layer_ids=layerIds, flags=flags)]
+        return layers, sorted(z for call in slices.call_args_list for z in call.args[1])
+
+    def test_preview(self):
+        flags = HatchedFlags(self.path, self.digest)
+        expected, sliced = self.generate(flags)
+        self.assertEqual(len(flags), len(self.heights))
+        flags.save()
+
+        layerIds = list(range(20, 60, 7))
+        layers, sliced = self.generate(HatchedFlags(self.path, self.digest), layerIds)
+        self.assertEqual(layers, [expected[layerId] for layerId in layerIds])
+        self.assertEqual(sliced, [self.heights[layerId] for layerId in layerIds])
+
+    def test_replay(self):
+        # Without stored flags, or with flags for a different build, every layer up to the last one selected is sliced
+        flags = HatchedFlags(self.path, 'another build')
+        expected, sliced = self.generate(flags)
+        flags.save()
+
+        layerIds = list(range(20, 60, 7))
+        for flags in (HatchedFlags(), HatchedFlags(self.path, self.digest)):
+            with self.subTest(path=flags.path):
+                self.assertEqual(len(flags), 0)
+                layers, sliced = self.generate(flags, layerIds)
+                self.assertEqual(layers, [expected[layerId] for layerId in layerIds])
+                self.assertEqual(sliced, list(self.heights[:layerIds[-1] + 1]))
+
+    def test_cache(self):
+        # Flags not stored in the file are looked up in the layer cache, and new ones go to both
+        cache = LayerCache(os.path.join(self.tmp.name, 'cache'), 1 << 30, self.digest)
+        cache.put_hatched(1.0, True)
+
+        flags = HatchedFlags(self.path, self.digest, cache)
+        self.assertTrue(flags.get(1.0))
+        flags.put(2.0, False)
+        self.assertIs(cache.get_hatched(2.0), False)
+        flags.save()
+
+        flags = HatchedFlags(self.path, self.digest)
+        self.assertEqual((flags.get(1.0), flags.get(2.0), flags.get(3.0)), (True, False, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+from .context import pyslm, REPO_DIR
+
+import os
+import tempfile
+import unittest
+
+from load_parameters import default_config
+from src.pipeline.checkpoint import Checkpoint, run_digest
+from src.pipeline.pipeline import create_part, create_hatcher, layer_heights, part_file_path, generate_layers, \
+    HatchAngles
+
+from .test_pipeline import layerKey
+
+
+class CheckpointTestSuite(unittest.TestCase):
+    """A run resumed from a checkpoint generates the same layers as one that was never interrupted."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._cwd = os.getcwd()
+        os.chdir(REPO_DIR)
+
+        cls.config = default_config()
+        cls.config["Part File Name"] = "Cone_1.STL"
+        cls.part = create_part(cls.config)
+        cls.heights = layer_heights(cls.part, cls.config["Layer Thickness"])
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls._cwd)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'checkpoint.json')
+        self.hatcher = create_hatcher(self.config, verbose=False)
+        self.digest = run_digest(self.config, part_file_path(self.config), self.part, self.hatcher)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def generate(self, checkpoint: Checkpoint, layerIds, stopAfter=None) -> list:
+        # Generates the layers as main.py does, recording each in the checkpoint
+        hatcher = create_hatcher(self.config, verbose=False)
+        angles = HatchAngles(hatcher, checkpoint.next_layer_id, checkpoint.hatch_angle)
+        layers = []
+        for layerId, layer in zip(layerIds, generate_layers(self.part, hatcher, self.heights, self.config,
+                                                            layer_ids=layerIds, angles=angles)):
+            layers.append(layerKey(layer))
+            checkpoint.update(layerId, angles[layerId], None if layer is None else 'layer{}.xml'.format(layerId))
+            if len(layers) == stopAfter:
+                break
+        return layers
+
+    def test_resume(self):
+        layerIds = list(range(len(self.heights)))
+        uninterrupted = Checkpoint(os.path.join(self.tmp.name, 'uninterrupted.json'), self.digest, len(self.heights),
+                                   self.hatcher)
+        expected = self.generate(uninterrupted, layerIds)
+
+        # Interrupted part way through, after the checkpoint was last saved
+        checkpoint = Checkpoint(self.path, self.digest, len(self.heights), self.hatcher, every=10)
+        layers = self.generate(checkpoint, layerIds, stopAfter=35)
+
+        checkpoint = Checkpoint.load(self.path, self.digest, len(self.heights), self.hatcher)
+        self.assertEqual(checkpoint.next_layer_id, 30)
+        self.assertEqual(checkpoint.files, ['layer{}.xml'.format(layerId) for layerId in range(30)
+                                            if expected[layerId] is not None])
+        self.assertEqual(checkpoint.layer_num, len(checkpoint.files))
+
+        layers = layers[:30] + self.generate(checkpoint, layerIds[30:])
+        self.assertEqual(layers, expected)
+
+    def test_load(self):
+        self.assertIsNone(Checkpoint.load(self.path, self.digest, len(self.heights), self.hatcher))
+
+        checkpoint = Checkpoint(self.path, self.digest, len(self.heights), self.hatcher)
+        checkpoint.update(4, 76.6, 'layer4.xml')
+        checkpoint.save()
+
+        loaded = Checkpoint.load(self.path, self.digest, len(self.heights), self.hatcher)
+        for name in ('next_layer_id', 'layer_num', 'hatch_angle', 'files'):
+            self.assertEqual(getattr(loaded, name), getattr(checkpoint, name))
+        self.assertEqual(loaded.missing_files(self.tmp.name), ['layer4.xml'])
+
+        # A checkpoint can't be continued by a run with a different config or number of layers
+        config = dict(self.config, **{"Layer Thickness": 0.05})
+        with self.assertRaises(ValueError):
+            Checkpoint.load(self.path, run_digest(config, part_file_path(config), self.part, self.hatcher),
+                            len(self.heights), self.hatcher)
+        with self.assertRaises(ValueError):
+            Checkpoint.load(self.path, self.digest, len(self.heights) + 1, self.hatcher)
+
+        checkpoint.remove()
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+from .context import pyslm
+
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from pyslm.core import ClipperPaths
+from pyslm.geometry import HatchGeometry
+from pyslm.hatching import hatching, islandHatcher
+from pyslm.hatching.islandHatcher import IslandHatcher
+from pyslm.hatching.sorting import LinearSort
+from src.island.island import BasicIslandHatcherRandomOrder
+
+
+def square(size: float, origin=(0.0, 0.0)) -> np.ndarray:
+    x, y = origin
+    return np.array([[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]], dtype=float)
+
+
+class IslandHatcherTestSuite(unittest.TestCase):
+    """The islands are orientated at the hatch angle of the layer when it is given."""
+
+    def setUp(self):
+        self.hatcher = IslandHatcher()
+        self.hatcher.hatchAngle = 10.0
+        self.hatcher.layerAngleIncrement = 66.6
+        self.hatcher.islandWidth = 3.0
+
+    def islandAngle(self, *args) -> float:
+        # Stops hatching once the islands are generated, as only their orientation is of interest
+        with mock.patch.object(IslandHatcher, 'generateIslands', side_effect=StopIteration) as generateIslands:
+            with self.assertRaises(StopIteration):
+                self.hatcher.hatch([square(10.0)], *args)
+        return generateIslands.call_args[0][1]
+
+    def test_layer_hatch_angle(self):
+        self.assertEqual(self.islandAngle(), 10.0)
+        self.assertEqual(self.islandAngle(40.0), 40.0)
+        self.assertEqual(self.hatcher.hatchAngle, 10.0)
+
+    def test_advance_hatch_angle(self):
+        self.assertEqual(self.hatcher.advanceHatchAngle(10.0), 10.0)
+        self.assertEqual(hatching.Hatcher.advanceHatchAngle(self.hatcher, 10.0), 76.6)
+
+
+class IntersectIslandsTestSuite(unittest.TestCase):
+    """Testing all the islands against the boundary at once splits them as testing one island at a time does."""
+
+    def setUp(self):
+        self.hatcher = IslandHatcher()
+        self.hatcher.islandWidth = 3.0
+        # A square with a hole, offset as for hatching so the boundary is a list of polygons
+        self.paths = self.hatcher.offsetBoundary([square(20.0), square(6.0, (7.0, 8.5))[::-1]], -0.1)
+
+    def split(self, hatchAngle: float):
+        islands = self.hatcher.generateIslands(self.paths, hatchAngle)
+        overlapping, untouched = self.hatcher.intersectIslands(self.paths, islands)
+        return overlapping, untouched, [(island.isIntersecting(), island.requiresClipping()) for island in islands]
+
+    def test_split(self):
+        for hatchAngle in (0.0, 30.0, 137.0):
+            with self.subTest(hatchAngle=hatchAngle):
+                overlapping, untouched, flags = self.split(hatchAngle)
+                with mock.patch.object(islandHatcher, 'shapelyIntersects', None):
+                    expected = self.split(hatchAngle)
+
+                self.assertEqual((overlapping, untouched, flags), expected)
+                # Islands inside the boundary, islands crossing its edges (including the hole's) and islands outside it
+                self.assertTrue(overlapping and untouched)
+                self.assertLess(len(overlapping | untouched), len(flags))
+
+
+class LayerHatchedTestSuite(unittest.TestCase):
+    """Hatcher.hatch records whether it filled the layer with hatches, as hatchesBoundary predicts."""
+
+    def test_layer_hatched(self):
+        hatcher = hatching.Hatcher()
+        # A square with a hole, one too small to have any region left inside its contours, and an empty slice
+        boundaries = [[square(10.0), square(3.0, (3.0, 4.0))[::-1]], [square(0.2)], []]
+
+        for hatchingEnabled in (True, False):
+            hatcher.hatchingEnabled = hatchingEnabled
+            for boundary, expected in zip(boundaries, (hatchingEnabled, False, False)):
+                with self.subTest(hatchingEnabled=hatchingEnabled, boundary=len(boundary)):
+                    self.assertEqual(hatcher.hatchesBoundary(boundary), expected)
+                    hatcher.hatch(boundary, 30.0)
+                    self.assertEqual(hatcher.layerHatched, expected)
+
+
+class OffsetBoundaryLevelsTestSuite(unittest.TestCase):
+    """Each level of offsetBoundaryLevels is the boundary a separate call to offsetBoundary gives."""
+
+    def setUp(self):
+        # A square with a hole holding an island, which in turn has a hole of its own, and a separate square. Offset
+        # inwards, the island breaks up into the corners left between the rounded holes, then the rings vanish and the
+        # separate square after them.
+        self.paths = [square(10.0), square(6.0, (2.0, 2.0))[::-1], square(4.0, (3.0, 3.0)),
+                      square(1.0, (4.5, 4.5))[::-1], square(3.0, (12.0, 0.0))]
+        self.contourOffsets = [0.05, -0.05, -0.3, -0.8, -1.2]
+        self.hatchOffset = -1.6
+
+    def assertSameBoundary(self, boundary, expected):
+        self.assertEqual(len(boundary), len(expected))
+        for poly, expectedPoly in zip(boundary, expected):
+            self.assertEqual(len(poly), len(expectedPoly))
+            for path, expectedPath in zip(poly, expectedPoly):
+                np.testing.assert_array_equal(np.asarray(path), np.asarray(expectedPath))
+
+    def test_levels(self):
+        contours, hatchBoundary = hatching.BaseHatcher.offsetBoundaryLevels(self.paths, self.contourOffsets,
+                                                                            self.hatchOffset)
+        self.assertEqual(len(contours), len(self.contourOffsets))
+        for offset, boundary in zip(self.contourOffsets, contours):
+            with self.subTest(offset=offset):
+                self.assertSameBoundary(boundary, hatching.BaseHatcher.offsetBoundary(self.paths, offset))
+
+        # The number of polygons left at each level, down to none for the hatch boundary
+        self.assertEqual([len(boundary) for boundary in contours], [3, 3, 3, 6, 1])
+        self.assertEqual(hatchBoundary, [])
+        self.assertEqual(hatching.BaseHatcher.offsetBoundary(self.paths, self.hatchOffset), [])
+
+    def test_clipper_paths(self):
+        paths = ClipperPaths([(path * hatching.BaseHatcher.PYCLIPPER_SCALEFACTOR).astype(np.int64)
+                              for path in self.paths], hatching.BaseHatcher.PYCLIPPER_SCALEFACTOR)
+        contours, hatchBoundary = hatching.BaseHatcher.offsetBoundaryLevels(paths, self.contourOffsets[:3], -0.6,
+                                                                            returnClipperPaths=True)
+        for offset, boundary in zip(self.contourOffsets, contours):
+            with self.subTest(offset=offset):
+                self.assertSameBoundary(boundary, hatching.BaseHatcher.offsetBoundary(paths, offset))
+
+        expected = hatching.BaseHatcher.offsetBoundary(paths, -0.6, returnClipperPaths=True)
+        self.assertIsInstance(hatchBoundary, ClipperPaths)
+        self.assertSameBoundary(hatchBoundary, expected)
+
+
+class HatchExtentTestSuite(unittest.TestCase):
+    """Only generating the hatches within the boundary or its regions gives the same layer as those across its bbox."""
+
+    def setUp(self):
+        # A square with a hole holding an island, a separate square and a thin diagonal wall, so the regions leave
+        # wide gaps in the bounding box
+        wall = np.array([[20.0, 0.0], [21.0, 0.0], [31.0, 10.0], [30.0, 10.0], [20.0, 0.0]])
+        self.boundary = [square(10.0), square(6.0, (2.0, 2.0))[::-1], square(2.0, (4.0, 4.0)),
+                         square(3.0, (12.0, 0.0)), wall]
+
+    def hatchers(self):
+        for hatcherType in (hatching.Hatcher, hatching.StripeHatcher, hatching.BasicIslandHatcher,
+                            BasicIslandHatcherRandomOrder):
+            hatcher = hatcherType()
+            hatcher.hatchDistance = 0.1
+            hatcher.hatchSortMethod = LinearSort()
+            yield hatcher
+
+    def hatch(self, hatcher, extent: str, hatchAngle: float):
+        hatcher.hatchExtent = extent
+        # The random order islands are shuffled the same way for every extent
+        np.random.seed(0)
+        return hatcher.hatch(self.boundary, hatchAngle)
+
+    def segments(self, coords: np.ndarray) -> np.ndarray:
+        # The hatches are clipped from a different set of lines, so the pieces of a hatch split by a hole, and the
+        # hatches tied in the sort, may come out in a different order
+        coords = coords.reshape(-1, 4)
+        return coords[np.lexsort(coords.T[::-1])]
+
+    def test_extent(self):
+        for hatcher in self.hatchers():
+            for hatchAngle in (0.0, 30.0, 90.0, 137.0):
+                expected = self.hatch(hatcher, 'bbox', hatchAngle)
+                for extent in ('boundary', 'regions'):
+                    with self.subTest(hatcher=type(hatcher).__name__, hatchAngle=hatchAngle, extent=extent):
+                        layer = self.hatch(hatcher, extent, hatchAngle)
+                        self.assertEqual([type(geom) for geom in layer.geometry],
+                                         [type(geom) for geom in expected.geometry])
+                        for geom, expectedGeom in zip(layer.geometry, expected.geometry):
+                            if isinstance(geom, HatchGeometry):
+                                np.testing.assert_array_equal(self.segments(geom.coords),
+                                                              self.segments(expectedGeom.coords))
+                            else:
+                                np.testing.assert_array_equal(geom.coords, expectedGeom.coords)
+
+    def test_fewer_hatches(self):
+        # The hatches in the gaps between the regions are never generated
+        hatcher = hatching.Hatcher()
+        paths = hatcher.offsetBoundary(self.boundary, -0.1)
+        counts = {}
+        for extent in ('bbox', 'boundary', 'regions'):
+            hatcher.hatchExtent = extent
+            counts[extent] = len(hatcher.generateHatching(paths, 0.1, 45.0))
+
+        self.assertLess(counts['boundary'], counts['bbox'])
+        self.assertLess(counts['regions'], counts['boundary'])
+
+        with self.assertRaises(ValueError):
+            hatcher.hatchExtent = 'polygon'
+
+
+class ClipLinesScanlineTestSuite(unittest.TestCase):
+    """clipLinesScanline trims hatches to the same segments as clipLines, to within the clipping resolution."""
+
+    def setUp(self):
+        # A square with a square hole (wound the other way) and a separate triangle
+        hole = square(3.0, (3.0, 4.0))[::-1]
+        triangle = np.array([[12.0, 0.0], [18.0, 0.0], [15.0, 8.0], [12.0, 0.0]])
+        self.paths = [[square(10.0), hole], [triangle]]
+        self.hatcher = hatching.Hatcher()
+
+    def segments(self, lines, keepDirection=False) -> np.ndarray:
+        # The x-y coordinates of the trimmed lines, sorted as the order of the lines along a scanline may differ.
+        # PyClipper doesn't keep the direction of the lines it clips either, so unless kept each line is turned to
+        # start at its lower end.
+        lines = hatching.BaseHatcher.clipperToHatchArray(lines)[:, :, :2]
+        if not keepDirection:
+            start, end = np.round(lines[:, 0], 3), np.round(lines[:, 1], 3)
+            reverse = (end[:, 0] < start[:, 0]) | ((end[:, 0] == start[:, 0]) & (end[:, 1] < start[:, 1]))
+            lines = np.where(reverse[:, None, None], lines[:, ::-1], lines)
+
+        lines = lines.reshape(-1, 4)
+        return lines[np.lexsort(np.round(lines, 3).T[::-1])]
+
+    def test_clip_lines(self):
+        for hatchAngle in (0.0, 30.0, 90.0, 137.0):
+            with self.subTest(hatchAngle=hatchAngle):
+                lines = self.hatcher.generateHatching(self.paths, 0.1, hatchAngle)
+                expected = self.segments(hatching.BaseHatcher.clipLines(self.paths, lines))
+                clipped = self.segments(hatching.BaseHatcher.clipLinesScanline(self.paths, lines))
+
+                self.assertEqual(clipped.shape, expected.shape)
+                np.testing.assert_allclose(clipped, expected, atol=10 * hatching.BaseHatcher.error())
+
+    def test_lines_through_vertices(self):
+        # Diamonds, so horizontal lines every 0.5 pass through their side corners without running along any edge. The
+        # top and bottom corners of the hole are off the lines, as the methods differ in whether a line touching the
+        # corner of a hole is split there.
+        diamond = lambda r: np.array([[5.0, 5.0 - r], [5.0 + r, 5.0], [5.0, 5.0 + r], [5.0 - r, 5.0], [5.0, 5.0 - r]])
+        paths = [[diamond(5.0), diamond(2.25)[::-1]]]
+
+        y = np.arange(-0.5, 11.0, 0.5)
+        lines = np.zeros((len(y), 2, 3))
+        lines[:, 0, :2] = np.stack([np.full(len(y), -1.0), y], axis=1)
+        lines[:, 1, :2] = np.stack([np.full(len(y), 11.0), y], axis=1)
+        lines[:, :, 2] = np.arange(len(y)).reshape(-1, 1)
+
+        expected = self.segments(hatching.BaseHatcher.clipLines(paths, lines))
+        clipped = self.segments(hatching.BaseHatcher.clipLinesScanline(paths, lines))
+
+        # Zero-length lines where a line just touches a corner are dropped
+        expected = expected[np.hypot(*(expected[:, 2:] - expected[:, :2]).T) >= hatching.BaseHatcher.error()]
+
+        self.assertEqual(clipped.shape, expected.shape)
+        np.testing.assert_allclose(clipped, expected, atol=10 * hatching.BaseHatcher.error())
+
+    def test_hatch(self):
+        # Sorted as by the scan path generator, as the hatches are otherwise left in the order they were clipped in
+        self.hatcher.hatchSortMethod = LinearSort()
+        layers = {}
+        for method in ('clipper', 'scanline'):
+            self.hatcher.hatchClipMethod = method
+            layers[method] = self.hatcher.hatch([boundary for path in self.paths for boundary in path], 30.0)
+
+        self.assertEqual(len(layers['clipper'].geometry), len(layers['scanline'].geometry))
+        for clipper, scanline in zip(layers['clipper'].geometry, layers['scanline'].geometry):
+            self.assertEqual(type(clipper), type(scanline))
+            expected, coords = clipper.coords, scanline.coords
+            if isinstance(clipper, HatchGeometry):
+                # The hatches keep their direction, but those tied in the sort may be in a different order
+                expected = self.segments(expected, keepDirection=True)
+                coords = self.segments(coords, keepDirection=True)
+            np.testing.assert_allclose(coords, expected, atol=10 * hatching.BaseHatcher.error())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from .context import pyslm, REPO_DIR
+
+import subprocess
+import sys
+import unittest
+
+
+class StartupImportsTestSuite(unittest.TestCase):
+    """main.py only imports what an XML run needs; HDF5 output and the analysis modules are imported when used."""
+
+    # Modules that are slow to import, and which a run without HDF5 output never uses
+    UNUSED = ['h5py', 'matplotlib', 'pandas', 'sklearn', 'skimage']
+
+    def imported(self, statement: str) -> list:
+        # In a fresh interpreter, since this one has likely imported them already
+        script = "import sys; {}; print(' '.join(m for m in {!r} if m in sys.modules))".format(statement, self.UNUSED)
+        result = subprocess.run([sys.executable, '-c', script], cwd=REPO_DIR, capture_output=True, text=True,
+                                check=True)
+        return result.stdout.split()
+
+    def test_main(self):
+        self.assertEqual(self.imported("import main"), [])
+
+    def test_hdf5(self):
+        # The check is of any use only if importing the HDF5 output does pull in h5py
+        self.assertIn('h5py', self.imported("import src.output.HDF5Util"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from .context import pyslm, REPO_DIR
+
+import os
+import tempfile
+import unittest
+
+from src.output.xml_hdf5_io_2 import XMLWriter
+
+
+class OutputDirTestSuite(unittest.TestCase):
+    """A new run starts from an empty output directory, and a resumed one keeps the layers before its checkpoint."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out = os.path.join(self.tmp.name, 'XMLOutput')
+        self.xmlWriter = XMLWriter(self.out)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def writeFiles(self, names):
+        for name in names:
+            with open(os.path.join(self.out, name), 'w') as f:
+                f.write(name)
+
+    def test_creates_dir(self):
+        self.xmlWriter.prepare_output_dir()
+        self.assertEqual(os.listdir(self.out), [])
+
+    def test_clears_previous_run(self):
+        # The layers of a longer previous run, along with the other files written next to them
+        os.makedirs(self.out)
+        self.writeFiles(['scan_{}.xml'.format(layerNum) for layerNum in range(1, 11)] + ['HDF5FromSCN.hdf5'])
+
+        self.xmlWriter.prepare_output_dir()
+        self.assertEqual(os.listdir(self.out), [])
+
+    def test_remove_layers_after(self):
+        os.makedirs(self.out)
+        self.writeFiles(['scan_{}.xml'.format(layerNum) for layerNum in range(1, 11)] + ['scan_x.xml'])
+
+        self.xmlWriter.remove_layers_after(4)
+        self.assertEqual(sorted(os.listdir(self.out)), ['scan_1.xml', 'scan_2.xml', 'scan_3.xml', 'scan_4.xml',
+                                                        'scan_x.xml'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+from .context import pyslm, REPO_DIR
+
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+import pyclipper
+import shapely
+import trimesh
+
+from pyslm.core import ClipperPaths
+
+
+class MeshCacheTestSuite(unittest.TestCase):
+    """The mesh cache of Part.setGeometry evicts the least recently used meshes once it is over its size limit."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cacheDir = os.path.join(self.tmp.name, 'cache')
+
+        self.files = {}
+        for name, mesh in (('box', trimesh.creation.box()), ('sphere', trimesh.creation.icosphere()),
+                           ('cylinder', trimesh.creation.cylinder(1.0, 2.0))):
+            self.files[name] = os.path.join(self.tmp.name, name + '.stl')
+            mesh.export(self.files[name])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def load(self, name: str, cacheSize=None) -> pyslm.Part:
+        part = pyslm.Part(name)
+        part.setGeometry(self.files[name], cacheDir=self.cacheDir, cacheSize=cacheSize)
+        part.geometry # Caches the transformed mesh too
+        # The modification times order the meshes by their last use, so they must differ between loads
+        time.sleep(0.05)
+        return part
+
+    def cachedKeys(self) -> set:
+        return {name.rsplit('_', 1)[0] for name in os.listdir(self.cacheDir) if name.endswith('.npy')}
+
+    def cacheSize(self) -> int:
+        return sum(os.path.getsize(os.path.join(self.cacheDir, name)) for name in os.listdir(self.cacheDir))
+
+    def test_unbounded(self):
+        for name in self.files:
+            self.load(name)
+
+        self.assertEqual(len(self.cachedKeys()), 6)
+
+    def test_evicts_least_recently_used(self):
+        self.load('box')
+        boxKeys = self.cachedKeys()
+        self.load('sphere')
+        sphereKeys = self.cachedKeys() - boxKeys
+
+        # Using the box again leaves the sphere's meshes as the least recently used. The cylinder is smaller than
+        # the sphere, so only the sphere's meshes need evicting to make room for it.
+        self.load('box')
+        size = self.cacheSize()
+        self.load('cylinder', cacheSize=size)
+
+        keys = self.cachedKeys()
+        self.assertLess(len(keys & sphereKeys), len(sphereKeys))
+        self.assertTrue(boxKeys <= keys)
+        self.assertEqual(len(keys - boxKeys - sphereKeys), 2)
+        self.assertLessEqual(self.cacheSize(), size)
+
+    def test_keeps_mesh_in_use(self):
+        self.load('box')
+        part = self.load('sphere', cacheSize=1)
+
+        # Only the repaired and transformed sphere are left, however small the limit
+        self.assertEqual(len(self.cachedKeys()), 2)
+        self.assertIn(part._meshCacheKey, self.cachedKeys())
+
+
+
+class BitmapSlicesTestSuite(unittest.TestCase):
+    """getBitmapSlices sets the pixels with centres inside each slice, as a point-in-polygon test does."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.part = pyslm.Part('nut')
+        cls.part.setGeometry(os.path.join(REPO_DIR, 'geometry', 'nut.stl'))
+        cls.part.dropToPlatform()
+
+        bbox = cls.part.boundingBox
+        cls.z = np.append(np.linspace(bbox[2] + 0.01, bbox[5] - 0.01, 5), bbox[5] + 1.0)
+        cls.resolution = 0.037
+
+    def pixelCentres(self):
+        rows, cols = self.part.getBitmapShape(self.resolution)
+        origin = self.part.boundingBox[:2]
+        return np.meshgrid(origin[0] + np.arange(cols) * self.resolution, origin[1] + np.arange(rows) * self.resolution)
+
+    def test_point_in_polygon(self):
+        bitmaps = self.part.getBitmapSlices(self.z, self.resolution)
+        x, y = self.pixelCentres()
+        self.assertEqual(bitmaps.shape, (len(self.z), x.shape[0], (x.shape[1] + 7) // 8))
+
+        for bitmap, z in zip(bitmaps, self.z):
+            with self.subTest(z=z):
+                bitmap = np.unpackbits(bitmap, axis=-1, count=x.shape[1]).astype(bool)
+                section = self.part.getTrimeshSlice(z)
+                if not section:
+                    self.assertFalse(bitmap.any())
+                    continue
+
+                # The region inside the loops of the slice by the even-odd rule
+                region = shapely.Polygon()
+                for loop in section.discrete:
+                    region = shapely.symmetric_difference(region, shapely.Polygon(loop))
+
+                expected = shapely.contains_xy(region, x, y)
+                self.assertTrue(expected.any())
+
+                # Pixel centres lying on the boundary may be set either way
+                differ = bitmap != expected
+                distance = shapely.distance(region.boundary, shapely.points(x[differ], y[differ]))
+                self.assertTrue(np.all(distance < 1e-9))
+
+    def test_stack(self):
+        bitmaps = self.part.getBitmapSlices(self.z, self.resolution)
+
+        # Each bitmap is the same when sliced on its own, or stored in a file
+        for i, z in enumerate(self.z):
+            np.testing.assert_array_equal(self.part.getBitmapSlices([z], self.resolution)[0], bitmaps[i])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'bitmaps.npy')
+            self.part.getBitmapSlices(self.z, self.resolution, filename=filename)
+            np.testing.assert_array_equal(np.load(filename, mmap_mode='r'), bitmaps)
+
+
+
+class ClipperSliceTestSuite(unittest.TestCase):
+    """getClipperSlice gives the region of getVectorSlice as oriented integer paths, to within the scaling."""
+
+    SCALE_FACTOR = 1e5
+
+    @classmethod
+    def setUpClass(cls):
+        # The slices of the sponge are made up of several regions, or of regions with holes
+        cls.part = pyslm.Part('sponge')
+        cls.part.setGeometry(os.path.join(REPO_DIR, 'geometry', 'Menger_sponge_sample.stl'))
+        cls.part.dropToPlatform()
+
+        bbox = cls.part.boundingBox
+        cls.z = np.append(np.linspace(bbox[2] + 0.01, bbox[5] - 0.01, 7), bbox[5] + 1.0)
+
+    def region(self, paths: ClipperPaths):
+        # The region inside the paths by the even-odd rule, in the floating point coordinate system
+        region = shapely.Polygon()
+        for path in paths:
+            region = shapely.symmetric_difference(region, shapely.Polygon(np.asarray(path) / paths.scaleFactor))
+        return region
+
+    def test_region(self):
+        for fixPolygons in ('invalid', True):
+            for z in self.z:
+                with self.subTest(fixPolygons=fixPolygons, z=z):
+                    paths = self.part.getClipperSlice(z, fixPolygons, self.SCALE_FACTOR)
+                    polygons = self.part.getVectorSlice(z, returnCoordPaths=False, fixPolygons=fixPolygons)
+
+                    self.assertIsInstance(paths, ClipperPaths)
+                    self.assertEqual(paths.scaleFactor, self.SCALE_FACTOR)
+                    if len(polygons) == 0:
+                        self.assertEqual(len(paths), 0)
+                        continue
+
+                    expected = shapely.union_all(polygons)
+                    region = self.region(paths)
+
+                    # Truncating the coordinates moves the boundary by about a scaled unit. Pyclipper and shapely
+                    # approximate the rounded corners of the repair offset differently, but only by a fraction of that.
+                    tolerance = 2.0 / self.SCALE_FACTOR
+                    self.assertLess(shapely.symmetric_difference(region, expected).area, expected.length * tolerance)
+                    np.testing.assert_allclose(paths.boundingBox(), expected.bounds, atol=tolerance)
+
+    def test_paths(self):
+        for z in self.z[:-1]:
+            paths = self.part.getClipperSlice(z, 'invalid', self.SCALE_FACTOR)
+            self.assertGreater(len(paths), 0)
+
+            for path in paths:
+                self.assertEqual(path.dtype, np.int64)
+                np.testing.assert_array_equal(path[0], path[-1])
+
+            # Each exterior (counter-clockwise) is followed by its holes (clockwise)
+            exteriors = [pyclipper.Orientation(path[:-1].tolist()) for path in paths]
+            self.assertTrue(exteriors[0])
+            region = self.region(paths)
+            self.assertEqual(exteriors.count(True), len(getattr(region, 'geoms', [region])))
+            self.assertEqual(exteriors.count(False), sum(len(polygon.interiors)
+                                                         for polygon in getattr(region, 'geoms', [region])))
+
+    def test_batch(self):
+        for fixPolygons in ('invalid', True):
+            batch = self.part.getClipperSlices(self.z[::-1], fixPolygons, self.SCALE_FACTOR)
+            for z, paths in zip(self.z[::-1], batch):
+                expected = self.part.getClipperSlice(z, fixPolygons, self.SCALE_FACTOR)
+                self.assertEqual(len(paths), len(expected))
+                for path, expectedPath in zip(paths, expected):
+                    np.testing.assert_array_equal(path, expectedPath)
+
+
+
+class SliceTopologyTestSuite(unittest.TestCase):
+    """Reusing the loops of the previous slice gives the same slices, whichever slices came before."""
+
+    def setUp(self):
+        self.heights = np.arange(0.05, 17.0, 0.5)
+
+    def loadPart(self, reuseSliceTopology: bool) -> pyslm.Part:
+        part = pyslm.Part('nist')
+        part.setGeometry(os.path.join(REPO_DIR, 'geometry', 'nist.stl'))
+        part.reuseSliceTopology = reuseSliceTopology
+        return part
+
+    def test_region(self):
+        default, reused = self.loadPart(False), self.loadPart(True)
+
+        for z in self.heights:
+            with self.subTest(z=z):
+                expected = shapely.union_all(default.getVectorSlice(z, returnCoordPaths=False))
+                region = shapely.union_all(reused.getVectorSlice(z, returnCoordPaths=False))
+                self.assertFalse(expected.is_empty)
+                self.assertAlmostEqual(shapely.symmetric_difference(region, expected).area, 0.0, places=9)
+
+    def test_order(self):
+        # Slicing upwards reuses the loops of the slice below, downwards those above, and a new part has none to reuse
+        part = self.loadPart(True)
+        upwards = [part.getVectorSlice(z) for z in self.heights]
+        downwards = [part.getVectorSlice(z) for z in self.heights[::-1]][::-1]
+        batch = part.getVectorSlices(self.heights)
+
+        for i, z in enumerate(self.heights[::5]):
+            with self.subTest(z=z):
+                alone = self.loadPart(True).getVectorSlice(z)
+                for paths in (upwards[i * 5], downwards[i * 5], batch[i * 5]):
+                    self.assertEqual(len(paths), len(alone))
+                    for path, expectedPath in zip(paths, alone):
+                        np.testing.assert_array_equal(path, expectedPath)
+
+    def test_reuses_loops(self):
+        # Consecutive layers, most of which cut the same faces as the layer below
+        heights = np.arange(2.0, 5.0, 0.03)
+        traversals = {}
+        for reuseSliceTopology in (False, True):
+            part = self.loadPart(reuseSliceTopology)
+            with mock.patch('trimesh.graph.traversals', wraps=trimesh.graph.traversals) as traverse:
+                part.getVectorSlices(heights)
+            traversals[reuseSliceTopology] = traverse.call_count
+
+        self.assertEqual(traversals[False], len(heights))
+        self.assertLess(traversals[True], traversals[False] / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
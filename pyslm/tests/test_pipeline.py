@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+from .context import pyslm, REPO_DIR
+
+import os
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from pyslm.hatching import hatching
+from load_parameters import default_config
+from src.pipeline import pipeline
+from src.pipeline.pipeline import create_part, create_hatcher, layer_heights, select_layers, slice_layer, \
+    generate_layers, HatchAngles
+
+
+def layerKey(layer):
+    # Everything written to the XML for the geometry of a layer
+    if layer is None:
+        return None
+    return [(type(geom).__name__, getattr(geom, 'subType', ''), geom.coords.tobytes()) for geom in layer.geometry]
+
+
+class HatchAnglesTestSuite(unittest.TestCase):
+    """Layers generated serially, by worker processes or only in part match a serial run of a single hatcher."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._cwd = os.getcwd()
+        os.chdir(REPO_DIR)
+
+        # The hatch angles of this part depend on the floating point rounding of turning the angle layer by layer
+        cls.config = default_config()
+        cls.config["Part File Name"] = "Cone_1.STL"
+        cls.part = create_part(cls.config)
+        cls.heights = layer_heights(cls.part, cls.config["Layer Thickness"])
+
+        # The layers as hatched by the original serial loop, where the hatcher turns its own angle
+        hatcher = create_hatcher(cls.config, verbose=False)
+        cls.expected = []
+        for z in cls.heights:
+            geomSlice = slice_layer(cls.part, z)
+            if geomSlice == []:
+                cls.expected.append(None)
+                continue
+            layer = hatcher.hatch(geomSlice)
+            layer.z = int(z * 1000)
+            for geometry in layer.geometry:
+                geometry.mid = 1
+                geometry.bid = 1
+            cls.expected.append(layerKey(layer))
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls._cwd)
+
+    def generate(self, layerIds=None, **kwargs):
+        hatcher = create_hatcher(self.config, verbose=False)
+        return [layerKey(layer) for layer in generate_layers(self.part, hatcher, self.heights, self.config,
+                                                              layer_ids=layerIds, **kwargs)]
+
+    def test_serial(self):
+        self.assertEqual(self.generate(), self.expected)
+
+    def test_serial_hatches_once(self):
+        # Every layer of a full build is hatched as its angle is replayed, without offsetting its boundary beforehand
+        # to find out whether it is hatched
+        with mock.patch.object(hatching.Hatcher, 'hatchesBoundary', side_effect=AssertionError):
+            self.assertEqual(self.generate(), self.expected)
+
+    def test_workers(self):
+        # The workers hatch each layer from the slice that told them whether it is hatched, rather than slicing it again
+        with mock.patch.object(pipeline, '_generate_layer_in_worker', side_effect=AssertionError):
+            self.assertEqual(self.generate(workers=2), self.expected)
+
+    def test_selected_layers(self):
+        layerIds = select_layers(self.heights, layer_range=(20, 50), every=3)
+        expected = [self.expected[layerId] for layerId in layerIds]
+        self.assertEqual(self.generate(layerIds), expected)
+        self.assertEqual(self.generate(layerIds, workers=2), expected)
+
+    def test_resume(self):
+        hatcher = create_hatcher(self.config, verbose=False)
+        angles = HatchAngles(hatcher)
+        list(generate_layers(self.part, hatcher, self.heights, self.config, layer_ids=range(30), angles=angles))
+
+        layerIds = range(30, len(self.heights))
+        self.assertEqual(self.generate(layerIds, angles=HatchAngles(hatcher, 30, angles[29])), self.expected[30:])
+
+
+
+class SelectLayersTestSuite(unittest.TestCase):
+    """select_layers picks the same layers as filtering the heights and indices one by one."""
+
+    def setUp(self):
+        # Accumulated as in layer_heights, so some heights are a rounding error off a multiple of the layer thickness
+        self.heights = np.cumsum(np.full(100, 0.03))
+
+    def expected(self, zRange=None, layerRange=None, every=1):
+        layerIds = [layerId for layerId, z in enumerate(self.heights)
+                    if (zRange is None or round(zRange[0], 6) <= round(z, 6) <= round(zRange[1], 6))
+                    and (layerRange is None or layerRange[0] <= layerId <= layerRange[1])]
+        return layerIds[::every]
+
+    def test_all(self):
+        np.testing.assert_array_equal(select_layers(self.heights), np.arange(100))
+
+    def test_selection(self):
+        for zRange in (None, (0.3, 0.9), (0.03, 3.0), (1.0, 0.5)):
+            for layerRange in (None, (10, 20), (0, 99), (95, 200)):
+                for every in (1, 3):
+                    with self.subTest(zRange=zRange, layerRange=layerRange, every=every):
+                        layerIds = select_layers(self.heights, zRange, layerRange, every)
+                        self.assertEqual(layerIds.tolist(), self.expected(zRange, layerRange, every))
+
+    def test_rounded_heights(self):
+        # The ends of the z range are included despite the rounding of the heights
+        z = self.heights[9]
+        self.assertNotEqual(z, 0.3)
+        self.assertEqual(select_layers(self.heights, z_range=(0.3, 0.3)).tolist(), [9])
+
+
+if __name__ == '__main__':
+    unittest.main()
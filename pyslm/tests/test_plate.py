@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+from .context import pyslm, REPO_DIR
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from pyslm.geometry import Layer, ContourGeometry, HatchGeometry
+from load_parameters import default_config
+from src.pipeline.pipeline import create_part, create_hatcher, layer_heights, select_layers, slice_layer, \
+    generate_layers
+from src.pipeline import plate as plateModule
+from src.pipeline.plate import load_plate, create_plate, merge_layers, generate_plate_layers
+
+from .test_pipeline import layerKey
+
+
+class MergeLayersTestSuite(unittest.TestCase):
+    """merge_layers keeps the geometry of each part's layer in turn."""
+
+    def test_merge(self):
+        layers = []
+        for geomTypes in ((ContourGeometry, HatchGeometry), (HatchGeometry,)):
+            layer = Layer(0, 0)
+            layer.geometry.extend(geomType() for geomType in geomTypes)
+            layers.append(layer)
+
+        merged = merge_layers([None, layers[0], None, layers[1]], 1.2345)
+        self.assertEqual(merged.z, 1234)
+        self.assertEqual([id(geom) for geom in merged.geometry],
+                         [id(geom) for layer in layers for geom in layer.geometry])
+
+    def test_empty(self):
+        self.assertIsNone(merge_layers([None, None], 1.0))
+        self.assertIsNone(merge_layers([], 1.0))
+
+
+class BuildPlateTestSuite(unittest.TestCase):
+    """The layers of a plate are those of its parts hatched one at a time by a single hatcher, and merged."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._cwd = os.getcwd()
+        os.chdir(REPO_DIR)
+
+        cls.config = default_config()
+        cls.config["Part File Name"] = "Cone_1.STL"
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls._cwd)
+
+    def loadPlate(self, entries):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'plate.json')
+            with open(path, 'w') as f:
+                json.dump(entries, f)
+            return load_plate(path)
+
+    def generate(self, plate, buildPlate, layerIds=None, **kwargs):
+        hatcher = create_hatcher(self.config, verbose=False)
+        heights = layer_heights(buildPlate, self.config["Layer Thickness"])
+        return [layerKey(layer) for layer in generate_plate_layers(plate, buildPlate, hatcher, heights, self.config,
+                                                                    layer_ids=layerIds, **kwargs)]
+
+    def test_single_part(self):
+        # A plate of the part at its default position is the same build as the part on its own
+        plate = self.loadPlate([{"file": "Cone_1.STL"}])
+        buildPlate = create_plate(plate, self.config)
+
+        part = create_part(self.config)
+        heights = layer_heights(part, self.config["Layer Thickness"])
+        expected = [layerKey(layer) for layer in generate_layers(part, create_hatcher(self.config, verbose=False),
+                                                                  heights, self.config)]
+
+        self.assertEqual(self.generate(plate, buildPlate), expected)
+        self.assertEqual(self.generate(plate, buildPlate, workers=2), expected)
+
+    def test_parts(self):
+        # Parts of different heights, so the layers above the shorter ones only hold some of the parts
+        plate = self.loadPlate([{"file": "Cone_1.STL", "origin": [0, 0]},
+                                {"file": "Cone_1.STL", "origin": [5, 0], "rotation": [0, 0, 45], "scale": 1.5},
+                                {"file": "Cylinder_1x1__Chamfer_.01.STL", "origin": [0, 5]}])
+        buildPlate = create_plate(plate, self.config)
+        heights = layer_heights(buildPlate, self.config["Layer Thickness"])
+
+        # Every part is sliced at every layer, and the layer hatched at the angle of a hatcher that turns on each
+        # layer where any part is hatched
+        hatcher = create_hatcher(self.config, verbose=False)
+        hatchAngle = hatcher.hatchAngle
+        expected = []
+        for z in heights:
+            slices = [slice_layer(part, z) for part in buildPlate.parts]
+            if any(hatcher.hatchesBoundary(geomSlice) for geomSlice in slices):
+                hatchAngle = hatcher.advanceHatchAngle(hatchAngle)
+
+            layers = []
+            for geomSlice in slices:
+                if geomSlice == []:
+                    continue
+                layer = hatcher.hatch(geomSlice, hatchAngle)
+                for geometry in layer.geometry:
+                    geometry.mid = 1
+                    geometry.bid = 1
+                layers.append(layer)
+            expected.append(layerKey(merge_layers(layers, z)))
+
+        self.assertEqual(self.generate(plate, buildPlate, slice_batch=16), expected)
+        # The workers hatch each part from the slice that told them whether it is hatched, rather than slicing it again
+        with mock.patch.object(plateModule, '_generate_part_layer_in_worker', side_effect=AssertionError):
+            self.assertEqual(self.generate(plate, buildPlate, workers=2), expected)
+
+        layerIds = select_layers(heights, layer_range=(40, 90), every=4)
+        self.assertEqual(self.generate(plate, buildPlate, layerIds, workers=2),
+                         [expected[layerId] for layerId in layerIds])
+
+    def test_load_plate(self):
+        plate = self.loadPlate([{"file": "nut.stl"}, {"file": "nut.stl", "origin": [30, 0], "scale": 2}])
+        self.assertEqual(plate, [{"file": "nut.stl", "origin": [0.0, 0.0], "rotation": [0.0, 0.0, 90.0], "scale": 1.0},
+                                 {"file": "nut.stl", "origin": [30.0, 0.0], "rotation": [0.0, 0.0, 90.0],
+                                  "scale": 2.0}])
+
+        for entries in ([], [{"origin": [0, 0]}], [{"file": "nut.stl", "origin": [0, 0, 0]}]):
+            with self.assertRaises(ValueError):
+                self.loadPlate(entries)
+
+
+if __name__ == '__main__':
+    unittest.main()
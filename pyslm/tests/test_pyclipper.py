@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+from .context import pyslm
+
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from pyslm import pyclipper
+from pyslm.core import ClipperPaths
+from pyslm.hatching import hatching
+
+from .test_hatching import square
+
+
+def packed(coords: np.ndarray, offsets: np.ndarray) -> list:
+    # The packed paths as the nested lists of [x, y, z] points returned by the list interface
+    return [coords[start:end].tolist() for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def walk(node, parent: int = -1, nodes=None) -> list:
+    # The (contour, parent index) of every node below a PyPolyNode in depth-first order, as packed by Execute2Array
+    nodes = [] if nodes is None else nodes
+    for child in node.Childs:
+        nodes.append((child.Contour, parent))
+        walk(child, len(nodes) - 1, nodes)
+    return nodes
+
+
+def scaled(path: np.ndarray) -> np.ndarray:
+    # Without the closing point, which pyclipper doesn't take
+    return (path[:-1] * hatching.BaseHatcher.PYCLIPPER_SCALEFACTOR).astype(np.int64)
+
+
+@unittest.skipUnless(hatching.PYCLIPPER_ARRAYS, "needs the pyclipper extension built from pyslm/external/pyclipper "
+                                                "(see the README)")
+class PyclipperArrayTestSuite(unittest.TestCase):
+    """The numpy interface of the vendored pyclipper gives the same paths as its list interface."""
+
+    def setUp(self):
+        # A square with a hole holding an island, which in turn has a hole of its own, and a separate square
+        self.paths = [scaled(path) for path in (square(10.0), square(6.0, (2.0, 2.0))[::-1], square(4.0, (3.0, 3.0)),
+                                                square(1.0, (4.5, 4.5))[::-1], square(3.0, (12.0, 0.0)))]
+        self.clip = [scaled(square(8.0, (1.0, -1.0)))]
+
+        # Hatch lines across all of them, with the hatch index in z
+        y = np.arange(0.25, 10.0, 0.5) * hatching.BaseHatcher.PYCLIPPER_SCALEFACTOR
+        self.lines = [np.array([[-100000, y_, i], [1600000, y_, i]], dtype=np.int64) for i, y_ in enumerate(y)]
+
+    def pack(self, paths) -> tuple:
+        return np.vstack(paths), np.cumsum([0] + [len(path) for path in paths], dtype=np.int64)
+
+    def clipper(self, array: bool, subject, clip, closed: bool = True) -> pyclipper.Pyclipper:
+        pc = pyclipper.Pyclipper()
+        for paths, polyType, isClosed in ((subject, pyclipper.PT_SUBJECT, closed), (clip, pyclipper.PT_CLIP, True)):
+            if not paths:
+                continue
+            if array:
+                pc.AddPathsArray(*self.pack(paths), polyType, isClosed)
+            else:
+                pc.AddPaths([path.tolist() for path in paths], polyType, isClosed)
+        return pc
+
+    def offsetter(self, array: bool) -> pyclipper.PyclipperOffset:
+        pc = pyclipper.PyclipperOffset()
+        if array:
+            pc.AddPathsArray(*self.pack(self.paths), pyclipper.JT_ROUND, pyclipper.ET_CLOSEDPOLYGON)
+        else:
+            pc.AddPaths([path.tolist() for path in self.paths], pyclipper.JT_ROUND, pyclipper.ET_CLOSEDPOLYGON)
+        return pc
+
+    def assertSameTree(self, packedTree, node):
+        coords, offsets, parents = packedTree
+        nodes = walk(node)
+        self.assertEqual(packed(coords, offsets), [contour for contour, parent in nodes])
+        self.assertEqual(parents.tolist(), [parent for contour, parent in nodes])
+
+    def test_clip(self):
+        for clipType in (pyclipper.CT_INTERSECTION, pyclipper.CT_DIFFERENCE, pyclipper.CT_UNION):
+            with self.subTest(clipType=clipType):
+                expected = self.clipper(False, self.paths, self.clip).Execute(clipType)
+                self.assertGreater(len(expected), 0)
+
+                # The paths added from arrays give the same solution
+                self.assertEqual(self.clipper(True, self.paths, self.clip).Execute(clipType), expected)
+
+                # ExecuteArray takes the paths from the tree of the solution, so they may come in a different order
+                coords, offsets = self.clipper(True, self.paths, self.clip).ExecuteArray(clipType)
+                self.assertEqual(coords.dtype, np.int64)
+                self.assertEqual(coords.shape[1], 3)
+                self.assertEqual(sorted(packed(coords, offsets)), sorted(expected))
+
+                self.assertSameTree(self.clipper(True, self.paths, self.clip).Execute2Array(clipType),
+                                    self.clipper(False, self.paths, self.clip).Execute2(clipType))
+
+    def test_nesting(self):
+        # The square, its island and the hole in the island are each nested in the one before
+        coords, offsets, parents = self.clipper(True, self.paths, []).Execute2Array(pyclipper.CT_UNION)
+        self.assertEqual(sorted(parents.tolist()), [-1, -1, 0, 1, 2])
+
+    def test_open_paths(self):
+        expected = self.clipper(False, self.lines, self.paths, closed=False).Execute2(pyclipper.CT_INTERSECTION)
+        tree = self.clipper(True, self.lines, self.paths, closed=False).Execute2Array(pyclipper.CT_INTERSECTION)
+        self.assertSameTree(tree, expected)
+
+        # The hatch index in z is carried through to the clipped lines
+        coords, offsets, parents = tree
+        self.assertGreater(len(parents), len(self.lines))
+        self.assertTrue(set(coords[:, 2]) <= set(range(len(self.lines))))
+
+    def test_offset(self):
+        # Far enough inwards, the rings around the holes vanish and only the separate square is left
+        for offset in (0.5, -0.2, -0.6, -1.2):
+            with self.subTest(offset=offset):
+                delta = offset * hatching.BaseHatcher.PYCLIPPER_SCALEFACTOR
+                expected = self.offsetter(False).Execute(delta)
+                self.assertGreater(len(expected), 0)
+
+                coords, offsets = self.offsetter(True).ExecuteArray(delta)
+                self.assertEqual(sorted(packed(coords, offsets)), sorted(expected))
+
+                self.assertSameTree(self.offsetter(True).Execute2Array(delta), self.offsetter(False).Execute2(delta))
+
+    def test_invalid_arrays(self):
+        coords, offsets = self.pack(self.paths)
+        pc = pyclipper.Pyclipper()
+        for badCoords, badOffsets in ((coords[:, :1], offsets), (coords, offsets[1:]), (coords, offsets[:-1]),
+                                      (coords, offsets[::-1])):
+            with self.assertRaises(ValueError):
+                pc.AddPathsArray(badCoords, badOffsets, pyclipper.PT_SUBJECT, True)
+
+
+@unittest.skipUnless(hatching.PYCLIPPER_ARRAYS, "needs the pyclipper extension built from pyslm/external/pyclipper "
+                                                "(see the README)")
+class HatcherArraysTestSuite(unittest.TestCase):
+    """The hatchers offset boundaries and clip hatches the same way through either interface of pyclipper."""
+
+    def setUp(self):
+        self.boundary = [square(10.0), square(6.0, (2.0, 2.0))[::-1], square(4.0, (3.0, 3.0)),
+                         square(1.0, (4.5, 4.5))[::-1], square(3.0, (12.0, 0.0))]
+
+    def both(self, func):
+        # The result with the numpy interface, and with the list interface
+        result = func()
+        with mock.patch.object(hatching, 'PYCLIPPER_ARRAYS', False):
+            return result, func()
+
+    def test_offset_boundary(self):
+        for offset in (0.5, -0.2, -0.6, -1.2):
+            with self.subTest(offset=offset):
+                packedPaths, paths = self.both(lambda: hatching.BaseHatcher.offsetBoundary(self.boundary, offset))
+                self.assertGreater(len(paths), 0)
+                self.assertEqual(len(packedPaths), len(paths))
+                for packedPoly, poly in zip(packedPaths, paths):
+                    self.assertEqual(len(packedPoly), len(poly))
+                    for packedPath, path in zip(packedPoly, poly):
+                        np.testing.assert_array_equal(packedPath, np.asarray(path))
+
+    def test_clip_lines(self):
+        paths = hatching.BaseHatcher.offsetBoundary(self.boundary, -0.1)
+        lines = hatching.Hatcher().generateHatching(paths, 0.1, 30.0)
+        packedLines, lineList = self.both(lambda: hatching.BaseHatcher.clipLines(paths, lines))
+        np.testing.assert_array_equal(hatching.BaseHatcher.clipperToHatchArray(packedLines),
+                                      hatching.BaseHatcher.clipperToHatchArray(lineList))
+
+
+class PackPathsTestSuite(unittest.TestCase):
+    """_packPaths packs paths into the integer coordinates the list interface of pyclipper is given."""
+
+    def setUp(self):
+        self.paths = [square(10.0), square(6.0, (2.0, 2.0))[::-1], np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])]
+
+    def test_pack(self):
+        coords, offsets = hatching.BaseHatcher._packPaths(self.paths)
+        self.assertEqual(coords.dtype, np.int64)
+        self.assertEqual(offsets.tolist(), [0, 5, 10, 12])
+        self.assertEqual(packed(coords, offsets), [hatching.BaseHatcher.scaleToClipper(path[:, :2])
+                                                   for path in self.paths])
+
+    def test_clipper_paths(self):
+        paths = ClipperPaths([scaled(path) for path in self.paths[:2]], hatching.BaseHatcher.PYCLIPPER_SCALEFACTOR)
+        coords, offsets = hatching.BaseHatcher._packPaths(paths, isClipperPaths=True)
+        self.assertEqual(offsets.tolist(), [0, 4, 8])
+        np.testing.assert_array_equal(coords, np.vstack(paths))
+
+    def test_empty(self):
+        coords, offsets = hatching.BaseHatcher._packPaths([])
+        self.assertEqual(coords.shape, (0, 2))
+        self.assertEqual(offsets.tolist(), [0])
+
+
+if __name__ == '__main__':
+    unittest.main()
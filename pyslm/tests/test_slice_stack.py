@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+from .context import pyslm, REPO_DIR
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from pyslm.core import ClipperPaths
+from load_parameters import default_config
+from src.pipeline.pipeline import create_part, create_hatcher, layer_heights, part_file_path, select_layers, \
+    slice_layer, generate_layers
+from src.pipeline.slice_stack import SliceStack, write_build_slices, generate_layers_from_slices
+
+from .test_pipeline import layerKey
+
+
+class SliceStackTestSuite(unittest.TestCase):
+    """The layers hatched from a slice stack are those hatched from slicing the part."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._cwd = os.getcwd()
+        os.chdir(REPO_DIR)
+
+        cls.config = default_config()
+        cls.config["Part File Name"] = "Cone_1.STL"
+        cls.part = create_part(cls.config)
+        cls.heights = layer_heights(cls.part, cls.config["Layer Thickness"])
+
+        hatcher = create_hatcher(cls.config, verbose=False)
+        cls.expected = [layerKey(layer) for layer in generate_layers(cls.part, hatcher, cls.heights, cls.config)]
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls._cwd)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def writeStack(self, config) -> SliceStack:
+        return write_build_slices(os.path.join(self.tmp.name, 'stack'), self.part, part_file_path(config),
+                                  self.heights, config, slice_batch=16)
+
+    def generate(self, stack, layerIds=None, **kwargs):
+        hatcher = create_hatcher(self.config, verbose=False)
+        return [layerKey(layer) for layer in generate_layers_from_slices(stack, hatcher, self.config,
+                                                                          layer_ids=layerIds, **kwargs)]
+
+    def test_slices(self):
+        for clipperSlices in (False, True):
+            with self.subTest(clipperSlices=clipperSlices):
+                config = dict(self.config, **{"Clipper Slices": clipperSlices})
+                stack = self.writeStack(config)
+
+                self.assertEqual(len(stack), len(self.heights))
+                np.testing.assert_array_equal(stack.heights, self.heights)
+
+                for layerId, z in enumerate(self.heights):
+                    expected = slice_layer(self.part, z, clipper_paths=clipperSlices)
+                    paths = stack.slice(layerId)
+                    self.assertEqual(isinstance(paths, ClipperPaths), clipperSlices)
+                    self.assertEqual(len(paths), len(expected))
+                    for path, expectedPath in zip(paths, expected):
+                        np.testing.assert_array_equal(path, np.asarray(expectedPath)[:, :2])
+
+    def test_generate(self):
+        stack = SliceStack(self.writeStack(self.config).path)
+        self.assertEqual(self.generate(stack), self.expected)
+        self.assertEqual(self.generate(stack, workers=2), self.expected)
+
+        layerIds = select_layers(self.heights, layer_range=(20, 50), every=3)
+        self.assertEqual(self.generate(stack, layerIds), [self.expected[layerId] for layerId in layerIds])
+
+    def test_incomplete(self):
+        stack = self.writeStack(self.config)
+        os.remove(os.path.join(stack.path, 'meta.json'))
+
+        with self.assertRaises(ValueError):
+            SliceStack(stack.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+from .context import pyslm, REPO_DIR
+
+import os
+import tempfile
+import unittest
+
+from load_parameters import default_config
+from src.output.xml_hdf5_io_2 import XMLWriter
+from src.pipeline.pipeline import create_part, create_hatcher, create_segment_styles, create_velocity_profiles, \
+    layer_heights, select_layers, generate_layers, HatchAngles
+from src.pipeline.stages import Stage, create_stages, run_stages
+
+
+def _square(value: int) -> int:
+    return value * value
+
+
+class StageTestSuite(unittest.TestCase):
+    """A stage hands its results on in order, and never pulls more than queue_size items ahead of its consumer."""
+
+    def run_stage(self, workers: int, queue_size: int):
+        pulled = []
+        ahead = []
+
+        def items():
+            for value in range(20):
+                pulled.append(value)
+                yield value
+
+        stage = Stage('square', _square, workers, queue_size)
+        results = []
+        for result in stage.run(items()):
+            results.append(result)
+            ahead.append(len(pulled) - len(results))
+
+        return results, max(ahead), stage
+
+    def test_inline(self):
+        results, ahead, stage = self.run_stage(0, 4)
+        self.assertEqual(results, [value * value for value in range(20)])
+        self.assertEqual(ahead, 0)
+        self.assertEqual(stage.count, 20)
+
+    def test_pool(self):
+        for workers, queue_size in ((1, 1), (2, 3), (2, 6)):
+            with self.subTest(workers=workers, queue_size=queue_size):
+                results, ahead, stage = self.run_stage(workers, queue_size)
+                self.assertEqual(results, [value * value for value in range(20)])
+                self.assertLessEqual(ahead, stage.queue_size)
+                self.assertEqual(stage.count, 20)
+
+
+class RunStagesTestSuite(unittest.TestCase):
+    """The staged pipeline writes the same layer files as writing the layers of generate_layers in turn."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._cwd = os.getcwd()
+        os.chdir(REPO_DIR)
+
+        cls.config = default_config()
+        cls.config["Part File Name"] = "Cone_1.STL"
+        cls.part = create_part(cls.config)
+        cls.heights = layer_heights(cls.part, cls.config["Layer Thickness"])
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls._cwd)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def readFiles(self, outputDir: str) -> dict:
+        files = {}
+        for name in os.listdir(outputDir):
+            with open(os.path.join(outputDir, name), 'rb') as f:
+                files[name] = f.read()
+        return files
+
+    def expected(self, layerIds) -> dict:
+        outputDir = os.path.join(self.tmp.name, 'expected')
+        xmlWriter = XMLWriter(outputDir)
+        xmlWriter.prepare_output_dir()
+
+        segStyleList, vProfileList = create_segment_styles(self.config), create_velocity_profiles(self.config)
+        layerNum = 0
+        hatcher = create_hatcher(self.config, verbose=False)
+        for layer in generate_layers(self.part, hatcher, self.heights, self.config, layer_ids=layerIds):
+            if layer is None:
+                continue
+            layerNum += 1
+            xmlWriter.write_layer(layer, layerNum, segStyleList, vProfileList, self.config["Contour Default ID"],
+                                  self.config["Hatch Default ID"])
+        return self.readFiles(outputDir)
+
+    def runStages(self, workers, layerIds, queueSize: int = 4) -> dict:
+        outputDir = os.path.join(self.tmp.name, 'stages_{}_{}_{}'.format(*workers))
+        XMLWriter(outputDir).prepare_output_dir()
+
+        stages = create_stages(self.config, outputDir, workers, queueSize)
+        angles = HatchAngles(create_hatcher(self.config, verbose=False))
+        written = list(run_stages(stages, self.heights, layerIds, angles))
+
+        # The files are written in layer order, numbered consecutively over the non-empty layers
+        layerIds = [layerId for layerId, layerNum, path in written]
+        self.assertEqual(layerIds, sorted(layerIds))
+        self.assertEqual([layerNum for layerId, layerNum, path in written], list(range(1, len(written) + 1)))
+        return self.readFiles(outputDir)
+
+    def test_inline(self):
+        layerIds = list(range(len(self.heights)))
+        self.assertEqual(self.runStages((0, 0, 0), layerIds), self.expected(layerIds))
+
+    def test_pool(self):
+        layerIds = list(range(len(self.heights)))
+        self.assertEqual(self.runStages((2, 1, 1), layerIds, queueSize=2), self.expected(layerIds))
+
+    def test_selected_layers(self):
+        layerIds = select_layers(self.heights, layer_range=(20, 60), every=3)
+        self.assertEqual(self.runStages((1, 1, 0), layerIds), self.expected(layerIds))
+
+
+if __name__ == '__main__':
+    unittest.main()
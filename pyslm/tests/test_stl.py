@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+from .context import pyslm, REPO_DIR
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import trimesh
+
+from pyslm.stl import isBinarySTL, readBinarySTL
+
+
+class ReadBinarySTLTestSuite(unittest.TestCase):
+    """readBinarySTL reads the same mesh from a binary STL file as trimesh does."""
+
+    FILES = ['Cone_1.STL', 'Cylinder_1x1__Chamfer_.01.STL', 'nut.stl', 'Menger_sponge_sample.stl']
+
+    def paths(self):
+        for name in self.FILES:
+            yield os.path.join(REPO_DIR, 'geometry', name)
+
+    def loadTrimesh(self, path: str) -> trimesh.Trimesh:
+        return trimesh.load_mesh(path, process=False)
+
+    def test_is_binary(self):
+        for path in self.paths():
+            self.assertTrue(isBinarySTL(path))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'box.stl')
+            trimesh.creation.box().export(path, file_type='stl_ascii')
+            self.assertFalse(isBinarySTL(path))
+            with self.assertRaises(ValueError):
+                readBinarySTL(path)
+
+    def test_unmerged(self):
+        for path in self.paths():
+            with self.subTest(path=path):
+                vertices, faces = readBinarySTL(path, mergeVertices=False)
+                mesh = self.loadTrimesh(path)
+
+                self.assertEqual(faces.shape, mesh.faces.shape)
+                np.testing.assert_array_equal(vertices[faces], mesh.triangles)
+
+    def test_merged(self):
+        for path in self.paths():
+            with self.subTest(path=path):
+                vertices, faces = readBinarySTL(path)
+                mesh = self.loadTrimesh(path)
+                mesh.merge_vertices()
+
+                # Same triangles, with each vertex stored once
+                np.testing.assert_array_equal(vertices[faces], mesh.triangles)
+                self.assertEqual(len(vertices), len(mesh.vertices))
+                self.assertEqual(len(np.unique(vertices, axis=0)), len(vertices))
+
+    def test_part_geometry(self):
+        # Without fixGeometry, setGeometry reads binary STL files with readBinarySTL rather than trimesh
+        path = os.path.join(REPO_DIR, 'geometry', 'Cone_1.STL')
+        part = pyslm.Part('cone')
+        part.setGeometry(path, fixGeometry=False)
+
+        reference = pyslm.Part('reference')
+        mesh = self.loadTrimesh(path)
+        mesh.merge_vertices()
+        reference.setGeometryByMesh(mesh)
+
+        np.testing.assert_array_equal(part.geometry.triangles, reference.geometry.triangles)
+        for z in (0.1, 0.5, 1.5):
+            paths, referencePaths = part.getVectorSlice(z), reference.getVectorSlice(z)
+            self.assertTrue(paths)
+            self.assertEqual(len(paths), len(referencePaths))
+            for path, referencePath in zip(paths, referencePaths):
+                np.testing.assert_array_equal(path, referencePath)
+
+
+if __name__ == '__main__':
+    unittest.main()
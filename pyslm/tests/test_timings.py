@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+from .context import pyslm, REPO_DIR
+
+import json
+import os
+import tempfile
+import unittest
+
+from load_parameters import default_config
+from src.output.xml_hdf5_io_2 import XMLWriter
+from src.pipeline.cache import hatcher_params
+from src.pipeline.pipeline import create_part, create_hatcher, create_segment_styles, create_velocity_profiles, \
+    layer_heights, select_layers, generate_layers
+from src.pipeline.timings import LayerTimings
+
+from .test_pipeline import layerKey
+
+
+class LayerTimingsTestSuite(unittest.TestCase):
+    """A timed run writes one record per layer, and leaves the instances it instrumented as they were once closed."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._cwd = os.getcwd()
+        os.chdir(REPO_DIR)
+
+        cls.config = default_config()
+        cls.config["Part File Name"] = "Cone_1.STL"
+        cls.heights = layer_heights(create_part(cls.config), cls.config["Layer Thickness"])
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls._cwd)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'XMLOutput_timings.jsonl')
+        self.xmlWriter = XMLWriter(os.path.join(self.tmp.name, 'XMLOutput'))
+        self.xmlWriter.prepare_output_dir()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def generate(self, part, hatcher, layerIds, timings=None):
+        # As main.py does with --timings, each layer is sliced on its own
+        segStyleList, vProfileList = create_segment_styles(self.config), create_velocity_profiles(self.config)
+        layers = []
+        layerNum = 0
+        for layerId, layer in zip(layerIds, generate_layers(part, hatcher, self.heights, self.config,
+                                                            layer_ids=layerIds, slice_batch=1)):
+            layers.append(layerKey(layer))
+            if layer is None:
+                if timings is not None:
+                    timings.end_layer(layerId, self.heights[layerId])
+                continue
+
+            layerNum += 1
+            self.xmlWriter.write_layer(layer, layerNum, segStyleList, vProfileList,
+                                       self.config["Contour Default ID"], self.config["Hatch Default ID"])
+            if timings is not None:
+                timings.end_layer(layerId, self.heights[layerId], layerNum)
+        return layers
+
+    def test_records(self):
+        layerIds = select_layers(self.heights, layer_range=(0, 40), every=4)
+        part, hatcher = create_part(self.config), create_hatcher(self.config, verbose=False)
+        expected = self.generate(part, hatcher, layerIds)
+
+        timings = LayerTimings(self.path)
+        timings.instrument(part, hatcher, self.xmlWriter)
+        self.assertEqual(self.generate(part, hatcher, layerIds, timings), expected)
+        timings.close()
+
+        with open(self.path) as f:
+            records = [json.loads(line) for line in f]
+
+        self.assertEqual([record['layer_id'] for record in records], list(layerIds))
+        layerNums = [record['layer_num'] for record in records if record['layer_num'] is not None]
+        self.assertEqual(layerNums, list(range(1, len(layerNums) + 1)))
+        for record, layer in zip(records, expected):
+            with self.subTest(layer_id=record['layer_id']):
+                self.assertGreaterEqual(record['time'], 0.0)
+                if layer is None:
+                    self.assertIsNone(record['layer_num'])
+                    continue
+                for stage in ('hatch', 'offsetBoundaryLevels', 'write_layer', 'make_traj_list'):
+                    self.assertEqual(record['stages'][stage]['calls'], 1)
+                self.assertIn('vertices_out', record['stages']['hatch'])
+
+        # Every layer below the last one selected is sliced, one at a time
+        self.assertEqual(sum(record['stages']['getVectorSlices']['calls'] for record in records), layerIds[-1] + 1)
+
+    def test_close(self):
+        part, hatcher, xmlWriter = create_part(self.config), create_hatcher(self.config, verbose=False), self.xmlWriter
+        attributes = [dict(vars(obj)) for obj in (part, hatcher, hatcher.hatchSortMethod, xmlWriter)]
+        params = hatcher_params(hatcher)
+
+        timings = LayerTimings(self.path)
+        timings.instrument(part, hatcher, xmlWriter)
+        self.assertIn('hatch', vars(hatcher))
+        self.assertNotEqual(hatcher_params(hatcher), params)
+        timings.close()
+
+        self.assertEqual([dict(vars(obj)) for obj in (part, hatcher, hatcher.hatchSortMethod, xmlWriter)], attributes)
+        self.assertEqual(hatcher_params(hatcher), params)
+
+        # Appending keeps the layers recorded by an earlier run
+        with open(self.path, 'w') as f:
+            f.write('{"layer_id": 0}\n')
+        timings = LayerTimings(self.path, append=True)
+        timings.end_layer(1, 0.03)
+        timings.close()
+        with open(self.path) as f:
+            self.assertEqual([json.loads(line)['layer_id'] for line in f], [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
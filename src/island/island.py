@@ -147,6 +147,8 @@ class BasicIslandHatcherRandomOrder(Hatcher):
                       (s, c, 0),
                       (0, 0, 1.0)])
 
+        coords = self.hatchesWithinExtent(paths, coords, R, bboxCentre)
+
         # Apply the rotation matrix and translate to bounding box centre
         coords = np.matmul(R, coords.T)
         coords = coords.T + np.hstack([bboxCentre, 0.0])
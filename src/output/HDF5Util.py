@@ -26,7 +26,14 @@ class HDF5Util:
         files = glob.glob(self.inputDir+'/*.xml')
         import sys 
         for i in tqdm(range(len(files)), desc="XML -> HDF5", unit="layers", file=sys.stdout, smoothing=0):
-            self.HDF5Layer(files[i], self.file, i).exec()
+            self.convertLayer(files[i], i)
+
+    # Converts a single layer file as soon as it has been written, rather than waiting for the whole directory
+    def convertLayer(self, xmlPath: str, layerNum: int):
+        self.HDF5Layer(xmlPath, self.file, layerNum).exec()
+
+    def close(self):
+        self.file.close()
 
     # Handles one file 
     class HDF5Layer:
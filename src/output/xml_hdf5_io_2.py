@@ -1,5 +1,4 @@
 
-import pandas as pd
 import numpy as np
 from lxml.etree import Element, SubElement, xmlfile, tostring
 import xml.etree.ElementTree as et
@@ -12,7 +11,6 @@ import os
 from os.path import basename
 from xml.sax.saxutils import unescape
 from pyslm.geometry.geometry import ScanMode, BuildStyle, Layer,Model ## Directed import to version of pyslm included in scan-gen package
-import h5py
 import glob
 from src.output.alsamTypes import SegmentStyle,Wobble,VelocityProfile,Traveler
 from tqdm import tqdm # Progress bar 
@@ -55,7 +53,7 @@ class XMLWriter():
     #TODO: write fails when directory does not exist. Need to add function that creates a new directory when new write starts.
     def write_layer(self,layer:Layer, layer_num: int,SegmentStyleList:list[SegmentStyle],velocityProfileList:list[VelocityProfile], defaultContourSegmentStyleID, defaultHatchSegmentStyleID):
         #create new file at end of directory provided for the layer
-        with open(os.path.join(self.out , 'scan_' + str(layer_num) + '.xml'),'wb') as layerFile:
+        with open(self.layer_path(layer_num),'wb') as layerFile:
             #write to file the layer
             with xmlfile(layerFile) as xf:
               with xf.element('Layer'):
@@ -245,21 +243,44 @@ class XMLWriter():
     
     def output_xml(self, layers: List[Layer], segmentStyleList:list[SegmentStyle],vProfileList:list[VelocityProfile], defaultContourSegmentStyleID: str, defaultHatchSegmentStyleID: str):
         
-        # Create/wipe folder
-        if not os.path.exists(self.out):
-            os.makedirs(self.out)
-        else:
-            for f in glob.glob(self.out+'\*'):
-                os.remove(f)  
+        self.prepare_output_dir()
         
         # TODO: Rewrite UI to parse tqdm output instead of the previous print statements here 
         import sys
         for i in tqdm(range(0, len(layers)), desc='Output -> XML', unit="layers", file=sys.stdout, smoothing=0):
-            xml_path = os.path.join(self.out , 'scan_' + str(i+1) + '.xml')
             self.write_layer(layers[i],i+1,segmentStyleList,vProfileList, defaultContourSegmentStyleID, defaultHatchSegmentStyleID)
             
         return
 
+    """
+    Creates the output directory, or wipes it if it already exists, so no layer files of a previous (e.g. longer) run
+    are left next to the new ones. 
+    
+    output_xml does this itself; call it directly when writing layers one at a time with write_layer
+    """
+    def prepare_output_dir(self):
+        # Create/wipe folder
+        if not os.path.exists(self.out):
+            os.makedirs(self.out)
+        else:
+            for f in glob.glob(os.path.join(self.out, '*')):
+                if os.path.isfile(f):
+                    os.remove(f)
+
+    # Path of the file write_layer creates for the given layer number
+    def layer_path(self, layer_num: int) -> str:
+        return os.path.join(self.out , 'scan_' + str(layer_num) + '.xml')
+
+    """
+    Removes the layer files numbered above layer_num, e.g. those a run wrote after its last checkpoint before it was
+    interrupted, so a resumed run starts from a consistent output directory
+    """
+    def remove_layers_after(self, layer_num: int):
+        for f in glob.glob(os.path.join(self.out, 'scan_*.xml')):
+            num = os.path.basename(f)[len('scan_'):-len('.xml')]
+            if num.isdigit() and int(num) > layer_num:
+                os.remove(f)
+
     """
     Outputs zipped scn file of XML layer files
     
@@ -352,6 +373,7 @@ class HDF5Writer():
                     scan_mode: ScanMode):
         params = self.parameters(layer_paths, layer_power, layer_speed, 
                                  layer_num, scan_mode)
+        import h5py # Only needed for HDF5 output, so not imported up front
         with h5py.File(self.out + "/" + file_name, "a") as f:
             grp = f.create_group(str(layer_num))
             grp.create_dataset('points', data=params[3])
@@ -413,6 +435,7 @@ class HDF5Writer():
         
         
         #Writing to HDF5 file for all the layers
+        import h5py # Only needed for HDF5 output, so not imported up front
         with h5py.File(self.out + "/" + file_name, "a") as f:
             f.create_dataset("/data_layer_times", data=data_layer_times, dtype='d')
             f.create_dataset("/file_layer_times", data=file_layer_times, dtype='d')
@@ -496,6 +519,7 @@ def hdf5_to_xml(in_path: str, out_dir: str):
     layers_segstyles = []
     seg_style = ''
     
+    import h5py # Only needed for HDF5 output, so not imported up front
     with h5py.File(in_path, "r") as f:
 
         # List all groups
@@ -0,0 +1,115 @@
+# Standard Library Imports
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from typing import Iterator, List
+
+# Local Imports
+import pyslm
+from src.output.xml_hdf5_io_2 import XMLWriter
+from src.pipeline.pipeline import part_file_path, create_part, create_hatcher, create_segment_styles, \
+    create_velocity_profiles, layer_heights, generate_layers
+from load_parameters import override_config
+
+'''
+Batch mode (see --batch in main.py): runs a list of jobs, each a set of option selections and an output folder, in
+one go. A job file looks like
+
+    [{"config": {"Part File Name": "nut.stl", "Hatch Distance": 0.1}, "output": "out/nut_0.1"},
+     {"config": {"Part File Name": "nut.stl", "Scan Strategy": "Striping"}, "output": "out/nut_stripes"}]
+
+where "config" holds the options that differ from the defaults in schema.json. The imports and the loaded parts are
+shared by all the jobs a process runs, so a batch of jobs on the same part only loads it once per worker.
+'''
+
+# Parts loaded by this process, by file path. Every job positions the part the same way (see create_part), so the
+# loaded part can be used as is by any job on the same file.
+_parts = {}
+
+
+def load_jobs(path: str) -> List[dict]:
+    """
+    Reads a job file, returning each job as {"config": <full config>, "output": <absolute output folder>}.
+    """
+    with open(path) as f:
+        jobs = json.load(f)
+
+    if not isinstance(jobs, list):
+        raise ValueError("{} must contain a JSON list of jobs".format(path))
+
+    loaded = []
+    for i, job in enumerate(jobs):
+        if "output" not in job:
+            raise ValueError("Job {} in {} has no output folder".format(i, path))
+        loaded.append({"config": override_config(job.get("config", {})), "output": os.path.abspath(job["output"])})
+
+    outputs = [job["output"] for job in loaded]
+    if len(set(outputs)) != len(outputs):
+        raise ValueError("Every job in {} needs its own output folder".format(path))
+
+    return loaded
+
+
+def _get_part(config: dict) -> pyslm.Part:
+    path = part_file_path(config)
+    if path not in _parts:
+        _parts[path] = create_part(config)
+    return _parts[path]
+
+
+def run_job(job: dict) -> dict:
+    """
+    Generates the scan paths for one job into its output folder, with the HDF5 file (if enabled) alongside the XML.
+    Returns a summary of the job; a job that fails reports its error rather than raising, so the rest of the batch
+    still runs.
+    """
+    start = time.perf_counter()
+    config, output = job["config"], job["output"]
+    try:
+        part = _get_part(config)
+        hatcher = create_hatcher(config, verbose=False)
+        segStyleList = create_segment_styles(config)
+        vProfileList = create_velocity_profiles(config)
+
+        xmlWriter = XMLWriter(output)
+        xmlWriter.prepare_output_dir()
+
+        hdf5Util = None
+        if config["Output .HDF5"]:
+            import src.output.HDF5Util as HDF5Util # Pulls in h5py, which is only needed here
+            hdf5Util = HDF5Util.HDF5Util(output, os.path.join(output, 'HDF5FromSCN.hdf5'))
+
+        layerNum = 0
+        for layer in generate_layers(part, hatcher, layer_heights(part, config["Layer Thickness"]), config):
+            # Empty slices are skipped; see generate_layer
+            if layer is None:
+                continue
+
+            layerNum += 1
+            xmlWriter.write_layer(layer, layerNum, segStyleList, vProfileList,
+                                  config["Contour Default ID"], config["Hatch Default ID"])
+            if hdf5Util is not None:
+                hdf5Util.convertLayer(xmlWriter.layer_path(layerNum), layerNum - 1)
+
+        if hdf5Util is not None:
+            hdf5Util.close()
+
+        return {"output": output, "layers": layerNum, "time": time.perf_counter() - start}
+    except Exception:
+        return {"output": output, "error": traceback.format_exc(), "time": time.perf_counter() - start}
+
+
+def run_batch(jobs: List[dict], workers: int = 1) -> Iterator[dict]:
+    """
+    Runs the jobs, up to `workers` at a time, yielding the summary of each job as it finishes.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield run_job(job)
+        return
+
+    # The pool's processes live for the whole batch, so each keeps the parts it has loaded for later jobs
+    with multiprocessing.Pool(min(workers, len(jobs))) as pool:
+        yield from pool.imap_unordered(run_job, jobs)
@@ -0,0 +1,322 @@
+# Standard Library Imports
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple, Union
+
+# Third-Party Imports
+import numpy as np
+
+# Local Imports
+import pyslm
+from pyslm.geometry import Layer, ContourGeometry, HatchGeometry, PointsGeometry
+from pyslm.hatching import BaseHatcher
+from pyslm.hatching.sorting import BaseSort
+
+'''
+An on-disk cache of hatched layers. Slicing and hatching only depend on the part geometry, its transform, the layer
+and the hatcher's parameters; segment styles and velocity profiles only come in when the XML is written. So when only
+those change, every layer can be loaded from here and just re-serialized.
+
+Each entry is named by a hash of everything that affects the layer's geometry (see build_digest), so entries for
+different parts/parameters can share one cache directory. The least recently used entries are evicted once the
+directory grows past its size limit.
+'''
+
+# Bump this whenever a change to slicing/hatching alters the geometry produced, so stale entries are never reused
+CACHE_VERSION = "2"
+
+HATCHED_FLAGS_VERSION = 1
+
+# Hatcher options added since the cache was introduced, with their defaults. They are only included in the hatcher
+# parameters when they aren't the default, so the entries cached before they were added stay valid
+_OPTIONAL_HATCHER_PARAMS = {'_hatchClipMethod': 'clipper', '_hatchExtent': 'bbox'}
+
+_GEOMETRY_TYPES = {ContourGeometry: 'contour', HatchGeometry: 'hatch', PointsGeometry: 'points'}
+_GEOMETRY_CLASSES = {name: cls for cls, name in _GEOMETRY_TYPES.items()}
+
+
+def file_digest(path: str) -> str:
+    """ SHA-256 of a file's contents """
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def hatcher_params(hatcher: BaseHatcher) -> list:
+    """
+    The parameters (i.e. state) of a hatcher as a list of (name, repr(value)) pairs.
+    """
+    # Every attribute of the hatcher (and its sort method) is treated as affecting the geometry. The sort method's
+    # hatch angle is excluded as the hatcher overwrites it for every layer, as is the hatcher's record of whether the
+    # last layer it hatched was filled (see Hatcher.layerHatched).
+    params = [('type', type(hatcher).__name__)]
+    for name, value in sorted(vars(hatcher).items()):
+        if name == '_layerHatched':
+            continue
+        if name in _OPTIONAL_HATCHER_PARAMS and value == _OPTIONAL_HATCHER_PARAMS[name]:
+            continue
+        if isinstance(value, BaseSort):
+            sortParams = sorted((k, repr(v)) for k, v in vars(value).items() if k != '_hatchAngle')
+            params.append((name, type(value).__name__, sortParams))
+        else:
+            params.append((name, repr(value)))
+    return params
+
+
+def build_digest(part_path: str, part: pyslm.Part, hatcher: BaseHatcher, fix_polygons: Union[bool, str] = True,
+                 clipper_paths: bool = False) -> str:
+    """
+    Hash of everything shared by all layers of a build that affects their geometry: the STL contents, the part
+    transform (origin/rotation/scale), the hatcher parameters and how the part is sliced.
+    """
+    h = hashlib.sha256()
+    h.update(CACHE_VERSION.encode())
+    h.update(file_digest(part_path).encode())
+    for array in (part.origin, part.rotation, part.scaleFactor):
+        h.update(repr(np.asarray(array, dtype=np.float64).tolist()).encode())
+    h.update(repr(hatcher_params(hatcher)).encode())
+    # The slicing options are only included when they aren't the default, so existing cache entries stay valid
+    if fix_polygons is not True:
+        h.update(repr(fix_polygons).encode())
+    if getattr(part, 'reuseSliceTopology', False):
+        h.update(b'reuseSliceTopology')
+    if clipper_paths:
+        h.update(b'clipperPaths')
+    return h.hexdigest()
+
+
+def save_layer(path: str, layer: Optional[Layer]):
+    """ Saves a layer (or None, for an empty slice) to a .npz file """
+    arrays = {'empty': np.array(layer is None)}
+    if layer is not None:
+        arrays['z'] = np.array(layer.z)
+        arrays['types'] = np.array([_GEOMETRY_TYPES[type(geom)] for geom in layer.geometry])
+        arrays['subTypes'] = np.array([getattr(geom, 'subType', '') for geom in layer.geometry])
+        arrays['ids'] = np.array([(geom.mid, geom.bid) for geom in layer.geometry]).reshape(-1, 2)
+        for i, geom in enumerate(layer.geometry):
+            arrays['coords_' + str(i)] = geom.coords
+
+    # Written under a temporary name first so an interrupted run never leaves a truncated entry behind
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_layer(path: str) -> Optional[Layer]:
+    """ Loads a layer saved by save_layer """
+    with np.load(path) as data:
+        if data['empty']:
+            return None
+
+        layer = Layer(0, 0)
+        layer.z = int(data['z'])
+        for i, (geomType, subType, ids) in enumerate(zip(data['types'], data['subTypes'], data['ids'])):
+            geom = _GEOMETRY_CLASSES[str(geomType)]()
+            geom.coords = data['coords_' + str(i)]
+            geom.mid, geom.bid = int(ids[0]), int(ids[1])
+            if subType:
+                geom.subType = str(subType)
+            layer.geometry.append(geom)
+
+    return layer
+
+
+def _save_hatched(path: str, hatched: bool):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, hatched=np.array(bool(hatched)))
+    os.replace(tmp_path, path)
+
+
+def _load_hatched(path: str) -> bool:
+    with np.load(path) as data:
+        return bool(data['hatched'])
+
+
+class LayerCache():
+    """
+    Cache of hatched layers for one build, stored as .npz files in cache_dir. digest comes from build_digest; each
+    layer's entry is further keyed by its z and hatch angle. Whether the layer at each z is hatched (which sets the
+    angles of the layers above it, see HatchAngles) is cached separately, so it is known without slicing the layer.
+
+    Only one process should write to a cache directory at a time.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int, digest: str):
+        self.dir = cache_dir
+        self.max_size = max_size # [bytes]
+        self.digest = digest
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.dir, exist_ok=True)
+
+        # Least recently used first; the modification time of each entry is its last use
+        entries = []
+        for entry in os.scandir(self.dir):
+            if entry.name.endswith('.npz'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        entries.sort()
+
+        self._sizes = OrderedDict((name, size) for _, name, size in entries)
+        self._size = sum(self._sizes.values())
+        self._evict()
+
+    def _name(self, *key) -> str:
+        key = ':'.join([self.digest] + [repr(float(value)) if isinstance(value, (float, np.floating)) else str(value)
+                                         for value in key])
+        return hashlib.sha256(key.encode()).hexdigest() + '.npz'
+
+    def get(self, z: float, hatch_angle: float) -> Tuple[bool, Optional[Layer]]:
+        """
+        Returns (True, layer) if the layer is cached, where layer may be None for an empty slice, or (False, None).
+        """
+        name = self._name(z, hatch_angle)
+        try:
+            layer = self._load(name, load_layer)
+        except KeyError:
+            self.misses += 1
+            return False, None
+
+        self.hits += 1
+        return True, layer
+
+    def put(self, z: float, hatch_angle: float, layer: Optional[Layer]):
+        self._save(self._name(z, hatch_angle), save_layer, layer)
+
+    def get_hatched(self, z: float) -> Optional[bool]:
+        """
+        Returns whether the layer at z is hatched, or None if that isn't cached. Doesn't count as a hit or miss.
+        """
+        try:
+            return self._load(self._name('hatched', z), _load_hatched)
+        except KeyError:
+            return None
+
+    def put_hatched(self, z: float, hatched: bool):
+        self._save(self._name('hatched', z), _save_hatched, hatched)
+
+    def _load(self, name: str, load: Callable[[str], Any]) -> Any:
+        # Raises KeyError if there is no (readable) entry called name
+        if name not in self._sizes:
+            raise KeyError(name)
+
+        path = os.path.join(self.dir, name)
+        try:
+            value = load(path)
+        except (OSError, ValueError, KeyError):
+            # Removed or damaged outside of this process; treat as a miss and let it be rewritten
+            self._forget(name)
+            raise KeyError(name)
+
+        os.utime(path)
+        self._sizes.move_to_end(name)
+        return value
+
+    def _save(self, name: str, save: Callable[[str, Any], None], value: Any):
+        path = os.path.join(self.dir, name)
+        save(path, value)
+
+        self._forget(name)
+        self._sizes[name] = os.path.getsize(path)
+        self._size += self._sizes[name]
+
+        self._evict(keep=1)
+
+    def _evict(self, keep: int = 0):
+        # Evicts the least recently used entries until the cache is within its size limit, keeping at least the
+        # `keep` most recently used (e.g. the one just written)
+        while self._size > self.max_size and len(self._sizes) > keep:
+            oldest = next(iter(self._sizes))
+            self._forget(oldest)
+            try:
+                os.remove(os.path.join(self.dir, oldest))
+            except FileNotFoundError:
+                pass
+
+    def _forget(self, name: str):
+        size = self._sizes.pop(name, None)
+        if size is not None:
+            self._size -= size
+
+    def report(self) -> str:
+        return 'Layer cache: {:d} hits, {:d} misses, {:.1f} MB in {:s}'.format(
+            self.hits, self.misses, self._size / 1024**2, self.dir)
+
+
+class HatchedFlags():
+    """
+    Whether the layer at each z of a build is hatched (which sets the angles of the layers above it, see HatchAngles),
+    saved as JSON to path (if given) whenever save is called. A later run of the same build, e.g. a preview of a few
+    layers with --layer-range or --every, then knows the angle of every layer without slicing the layers below the ones
+    it generates. digest comes from build_digest; flags saved for a different build are ignored and overwritten.
+
+    Flags that aren't stored here are looked up in the layer cache, if one is given, and new flags are added to both.
+    """
+
+    def __init__(self, path: Optional[str] = None, digest: Optional[str] = None, cache: Optional[LayerCache] = None):
+        self.path = path
+        self.digest = digest
+        self.cache = cache
+        self._flags = {}
+        self._unsaved = False
+
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = None
+            if isinstance(state, dict) and state.get('version') == HATCHED_FLAGS_VERSION \
+                    and state.get('digest') == digest:
+                self._flags = state['hatched']
+
+    def __len__(self) -> int:
+        return len(self._flags)
+
+    @staticmethod
+    def _key(z: float) -> str:
+        return repr(float(z))
+
+    def get(self, z: float) -> Optional[bool]:
+        """ Returns whether the layer at z is hatched, or None if that isn't known """
+        key = self._key(z)
+        hatched = self._flags.get(key)
+        if hatched is None and self.cache is not None:
+            hatched = self.cache.get_hatched(z)
+            if hatched is not None:
+                self._flags[key] = hatched
+                self._unsaved = True
+        return hatched
+
+    def put(self, z: float, hatched: bool):
+        self._flags[self._key(z)] = bool(hatched)
+        self._unsaved = True
+        if self.cache is not None:
+            self.cache.put_hatched(z, hatched)
+
+    def save(self):
+        if self.path is None or not self._unsaved:
+            return
+
+        state = {'version': HATCHED_FLAGS_VERSION, 'digest': self.digest, 'hatched': self._flags}
+        # Written under a temporary name first so an interrupted run never leaves a truncated file behind
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+        self._unsaved = False
+
+
+def hatched_flags(flags: Optional[HatchedFlags], cache: Optional[LayerCache]) -> HatchedFlags:
+    """
+    The flags to use for a run given these (optional) flags and layer cache: those given, or else flags that are only
+    kept in memory and the cache.
+    """
+    return flags if flags is not None else HatchedFlags(cache=cache)
@@ -0,0 +1,124 @@
+# Standard Library Imports
+import hashlib
+import json
+import os
+from typing import List, Optional
+
+# Third-Party Imports
+import numpy as np
+
+# Local Imports
+import pyslm
+from pyslm.hatching import BaseHatcher
+from src.pipeline.cache import build_digest, hatcher_params
+
+'''
+Checkpoints for resuming an interrupted scan path generation run (see --resume in main.py).
+
+Layers are written in order, so the state of a run is how far it got: every (selected) layer index below next_layer_id
+is done and the first layer_num XML files are written, along with the hatch angle after the layer below next_layer_id
+(see HatchAngles). A resumed run skips those layers and carries on numbering and turning the hatch angle from there,
+so its output is identical to a run that was never interrupted.
+'''
+
+CHECKPOINT_VERSION = 2
+
+
+def run_digest(config: dict, part_path: str, part: pyslm.Part, hatcher: BaseHatcher,
+               layer_ids: Optional[np.ndarray] = None, build: Optional[str] = None) -> str:
+    """
+    Hash of everything that affects the output of a run: the build (see build_digest), the rest of the config, e.g.
+    the segment styles and velocity profiles written to the XML, and the layers selected (if not all of them).
+    A build digest can be given instead of the part, e.g. for a build plate (see plate_digest).
+    """
+    h = hashlib.sha256()
+    h.update((build if build is not None else build_digest(part_path, part, hatcher)).encode())
+    h.update(json.dumps(config, sort_keys=True, default=repr).encode())
+    if layer_ids is not None:
+        h.update(np.asarray(layer_ids, dtype=np.int64).tobytes())
+    return h.hexdigest()
+
+
+class Checkpoint():
+    """
+    Progress of a run, saved as JSON to path every `every` layers (and whenever save is called).
+    """
+
+    def __init__(self, path: str, digest: str, num_layers: int, hatcher: BaseHatcher, every: int = 50):
+        self.path = path
+        self.digest = digest
+        self.num_layers = num_layers
+        self.hatcher = [list(param) for param in hatcher_params(hatcher)]
+        self.every = every
+
+        self.next_layer_id = 0 # Every layer index below this has been generated and written
+        self.layer_num = 0 # Number of XML files written
+        self.hatch_angle = hatcher.hatchAngle # After the layer below next_layer_id
+        self.files = []
+        self._unsaved = 0
+
+    @classmethod
+    def load(cls, path: str, digest: str, num_layers: int, hatcher: BaseHatcher, every: int = 50) -> Optional['Checkpoint']:
+        """
+        Loads the checkpoint at path, or returns None if there is none. Raises ValueError if it was written by a run
+        with a different part, config or number of layers, as its output can't be continued by this one.
+        """
+        if not os.path.exists(path):
+            return None
+
+        with open(path) as f:
+            state = json.load(f)
+
+        if state.get('version') != CHECKPOINT_VERSION or state.get('digest') != digest \
+                or state.get('num_layers') != num_layers:
+            raise ValueError("Checkpoint {:s} is from a run with a different part or config; "
+                             "run without --resume to start over".format(path))
+
+        checkpoint = cls(path, digest, num_layers, hatcher, every)
+        checkpoint.next_layer_id = state['next_layer_id']
+        checkpoint.layer_num = state['layer_num']
+        checkpoint.hatch_angle = state['hatch_angle']
+        checkpoint.files = state['files']
+        return checkpoint
+
+    def update(self, layer_id: int, hatch_angle: float, file: Optional[str] = None):
+        """
+        Records that every layer up to and including layer_id is done, with hatch_angle being the hatch angle after
+        it and file the XML written for it (None for an empty slice). Saves the checkpoint once `every` layers have
+        been done since the last save.
+        """
+        self.next_layer_id = int(layer_id) + 1
+        self.hatch_angle = float(hatch_angle)
+        if file is not None:
+            self.layer_num += 1
+            self.files.append(os.path.basename(file))
+
+        self._unsaved += 1
+        if self._unsaved >= self.every:
+            self.save()
+
+    def save(self):
+        state = {'version': CHECKPOINT_VERSION,
+                 'digest': self.digest,
+                 'num_layers': self.num_layers,
+                 'hatcher': self.hatcher,
+                 'next_layer_id': self.next_layer_id,
+                 'layer_num': self.layer_num,
+                 'hatch_angle': self.hatch_angle,
+                 'files': self.files}
+
+        # Written under a temporary name first so an interrupted run never leaves a truncated checkpoint behind
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+        self._unsaved = 0
+
+    def remove(self):
+        """ Removes the checkpoint once the run has finished """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def missing_files(self, output_dir: str) -> List[str]:
+        """ The files the checkpoint says were written but aren't in output_dir """
+        return [name for name in self.files if not os.path.exists(os.path.join(output_dir, name))]
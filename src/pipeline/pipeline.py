@@ -0,0 +1,537 @@
+# Standard Library Imports
+import multiprocessing
+from collections import deque
+from typing import Iterator, List, Optional, Tuple, Union
+
+# Third-Party Imports
+import numpy as np
+
+# Local Imports
+import pyslm
+from pyslm.geometry import Layer
+from pyslm.hatching import hatching, LinearSort
+from pyslm.hatching.islandHatcher import IslandHatcher
+from src.island.island import BasicIslandHatcherRandomOrder
+from src.output.alsamTypes import SegmentStyle, VelocityProfile, Wobble, Traveler
+from src.pipeline.cache import LayerCache, HatchedFlags, hatched_flags
+
+
+def part_file_path(config: dict) -> str:
+    """
+    Path of the STL file for the part named in the config.
+    """
+    return 'geometry/' + config["Part File Name"]
+
+
+def create_part(config: dict, mesh_cache_dir: Optional[str] = None,
+                mesh_cache_size: Optional[int] = None) -> pyslm.Part:
+    """
+    Loads and positions the part named in the config, ready for slicing. If a mesh_cache_dir is given, the repaired
+    and positioned mesh is cached there, so later runs on the same part skip repairing it (see Part.setGeometry). The
+    least recently used meshes are evicted once the cache grows past mesh_cache_size [bytes], if given.
+    """
+    part = pyslm.Part(config["Part File Name"])
+    part.setGeometry(part_file_path(config), cacheDir=mesh_cache_dir, cacheSize=mesh_cache_size)
+    part.origin = [0.0, 0.0, 0.0]
+    part.rotation = np.array([0, 0, 90])
+    part.dropToPlatform()
+    # Faster slicing of prismatic parts, at the cost of boundaries starting at different points than by default
+    part.reuseSliceTopology = config.get("Reuse Slice Topology", False)
+    return part
+
+
+def create_hatcher(config: dict, verbose: bool = True) -> hatching.Hatcher:
+    """
+    Creates the hatcher for the scan strategy chosen in the config and sets its parameters.
+    """
+    # Special scan strategies need additional attributes supplied
+    if config["Scan Strategy"] == "Island":
+        if verbose: print("Island Hatching!")
+        hatcher = IslandHatcher()
+    elif config["Scan Strategy"] == "Striping":
+        if verbose: print("Striping hatching!")
+        hatcher = hatching.StripeHatcher()
+    elif config["Scan Strategy"] == "Island Random Order":
+        if verbose: print("Island hatching in random order!")
+        hatcher = BasicIslandHatcherRandomOrder()
+    else:
+        if verbose: print("Default hatching!")
+        hatcher = hatching.Hatcher()
+
+    # Parameters used in the common hatching class used for any hatcher (default, island, striping)
+    hatcher.hatchAngle = config["Hatch Angle"] # Hatch Angle
+    hatcher.layerAngleIncrement = config["Hatch Angle Increment"] # [degrees]
+    hatcher.hatchDistance = config["Hatch Distance"] # Hatch Distance
+    hatcher.numInnerContours = config["# Inner Contours"] # Num Inner Contours
+    hatcher.numOuterContours = config["# Outer Contours"] # Num Outer Contours
+    hatcher.spotCompensation = config["Spot Compensation"] # Spot Compensation
+    hatcher.volumeOffsetHatch = config["Volume Offset Hatch"] # Volume Offset Hatch
+    hatcher.scanContourFirst = config["Contour First"] # Whether to scan contours or hatches first
+    hatcher.hatchSortMethod = LinearSort() # Which direction, essentially, to do vectors
+    hatcher.hatchClipMethod = config.get("Hatch Clip Method", "clipper") # How hatches are clipped to the boundary
+    hatcher.hatchExtent = config.get("Hatch Extent", "bbox") # Which un-clipped hatches are passed to clipping
+
+    if config["Scan Strategy"] in ("Island", "Island Random Order"):
+        hatcher.islandWidth = config["Island Width"]
+        hatcher.islandOffset = config["Island Offset"]
+        hatcher.islandOverlap = config["Island Overlap"]
+
+    elif config["Scan Strategy"] == "Striping":
+        hatcher.stripeWidth = config["Stripe Width"]
+        hatcher.stripeOffset = config["Stripe Offset"]
+        hatcher.stripeOverlap = config["Stripe Overlap"]
+
+    return hatcher
+
+
+def create_segment_styles(config: dict) -> List[SegmentStyle]:
+    """
+    Builds the SegmentStyle objects for the segment styles in the config.
+    """
+    segStyleList=[]
+    # pull segment style info from schema
+    for style in config["Segment Styles"]:
+        ## Create new SegmentStyle object that contains segment style info
+        segStyle = SegmentStyle()
+
+        # Segment Style Info
+        segStyle.id=style["id"] # TYPE: string
+        segStyle.vProfileID=style["velocityProfileID"] # TYPE: string
+        segStyle.laserMode=style["laserMode"] # TYPE: string from set {"Independent", "FollowMe"}
+
+        # Create traveler list and add traveler objects to it
+        travelers=[]
+        for item in style["travelers"]:
+            traveler=Traveler()
+            traveler.id=item["id"] # TYPE: int
+            traveler.syncDelay=item["syncDelay"]
+            traveler.power=item["power"]  # TYPE: float (Watts)
+            traveler.spotSize=item["spotSize"]  # TYPE: float (microns)
+
+            # If wobble tag exists
+            if item["wobble"] is not None:
+                #pull wobble info
+                wobble=Wobble()
+                wobble.on=item["wobble"]["on"]
+                wobble.freq=item["wobble"]["freq"]
+                wobble.shape=item["wobble"]["shape"]
+                wobble.transAmp=item["wobble"]["transAmp"]
+                wobble.longAmp=item["wobble"]["longAmp"]
+                traveler.wobble=wobble
+
+            travelers.append(traveler)
+        # Attach travelers to SegmentStyle object
+        segStyle.travelers=travelers
+        segStyleList.append(segStyle)
+
+    return segStyleList
+
+
+def create_velocity_profiles(config: dict) -> List[VelocityProfile]:
+    """
+    Builds the VelocityProfile objects for the velocity profiles in the config.
+    """
+    vProfileList=[]
+    for style in config["Velocity Profiles"]:
+        ## Create new VelocityProfile object that contains velocity profile info
+        vProfile = VelocityProfile()
+        # Velocity Profile Info
+        vProfile.id=style["id"] # TYPE: string
+        vProfile.velocity=style["velocity"] # TYPE: float (mm/s)
+        vProfile.mode=style["mode"] # TYPE: string from set {"Delay", "Auto"}
+        vProfile.laserOnDelay=style["laserOnDelay"] # TYPE: float (microseconds)
+        vProfile.laserOffDelay=style["laserOffDelay"] # TYPE: float (microseconds)
+        vProfile.jumpDelay=style["jumpDelay"] # TYPE: float (microseconds)
+        vProfile.markDelay=style["markDelay"] # TYPE: float (microseconds)
+        vProfile.polygonDelay=style["polygonDelay"] # TYPE: float (microseconds)
+
+        vProfileList.append(vProfile)
+
+    return vProfileList
+
+
+def layer_heights(part: pyslm.Part, layer_thickness: float) -> np.ndarray:
+    """
+    Returns the z position of every layer in the build. The index into this array is the layer index.
+    """
+    return np.arange(0, part.boundingBox[5], layer_thickness)
+
+
+def select_layers(heights: np.ndarray, z_range: Optional[Tuple[float, float]] = None,
+                  layer_range: Optional[Tuple[int, int]] = None, every: int = 1) -> np.ndarray:
+    """
+    Returns the indices into heights of the layers to generate: those within z_range (inclusive, [mm]) and/or the
+    layer index range (inclusive), thinned out to every `every`-th of them. The hatch angles are still replayed over the
+    layers below the selected ones (see HatchAngles), so each selected layer gets the same angle as in a full build.
+    That takes slicing every layer from the first up to the last one selected, unless it is already known which of
+    them are hatched (see HatchedFlags), e.g. from an earlier run of the whole build.
+    """
+    layer_ids = np.arange(len(heights))
+    if z_range is not None:
+        # Allow for the rounding in the layer heights, so e.g. a z of 3.0 includes a layer at 2.9999999999999996
+        zmin, zmax = z_range
+        layer_ids = layer_ids[(heights >= zmin - 1e-9) & (heights <= zmax + 1e-9)]
+    if layer_range is not None:
+        first, last = layer_range
+        layer_ids = layer_ids[(layer_ids >= first) & (layer_ids <= last)]
+    return layer_ids[::every]
+
+
+def fix_polygons_mode(config: dict) -> Union[bool, str]:
+    """
+    How slice polygons are repaired (see Part.getVectorSlice): every polygon is offset slightly, unless the config sets
+    "Repair Invalid Polygons Only", in which case only the invalid ones are.
+    """
+    return 'invalid' if config.get("Repair Invalid Polygons Only", False) else True
+
+
+def clipper_slices(config: dict) -> bool:
+    """
+    Whether the part is sliced straight into pyclipper's scaled integer paths (see Part.getClipperSlice), which the
+    hatchers use without converting them, rather than into shapely polygons. Set by "Clipper Slices" in the config.
+    """
+    return bool(config.get("Clipper Slices", False))
+
+
+def slice_layer(part: pyslm.Part, z: float, fix_polygons: Union[bool, str] = True, clipper_paths: bool = False) -> list:
+    """
+    Slices the part at z, returning the boundary paths (an empty list if the slice is empty). With clipper_paths, the
+    paths are scaled to pyclipper's integer coordinates.
+    """
+    if clipper_paths:
+        return part.getClipperSlice(z, fixPolygons=fix_polygons, scaleFactor=hatching.BaseHatcher.PYCLIPPER_SCALEFACTOR)
+    return part.getVectorSlice(z, fixPolygons=fix_polygons)
+
+
+def slice_layers(part: pyslm.Part, heights: np.ndarray, fix_polygons: Union[bool, str] = True,
+                 clipper_paths: bool = False) -> List[list]:
+    """
+    Slices the part at each of the heights in one sweep through the mesh, returning the boundary paths of each slice
+    (as slice_layer would).
+    """
+    if clipper_paths:
+        return part.getClipperSlices(heights, fixPolygons=fix_polygons,
+                                     scaleFactor=hatching.BaseHatcher.PYCLIPPER_SCALEFACTOR)
+    return part.getVectorSlices(heights, fixPolygons=fix_polygons)
+
+
+class HatchAngles():
+    """
+    The hatch angle of each layer of a build. The hatcher only turns its hatch angle on the layers it fills with
+    hatches (see Hatcher.hatchesBoundary), so the angle of a layer depends on which of the layers below it are hatched.
+    Adding the layers in order replays the angle a single hatcher would have on each layer of a serial run, so the
+    layers can then be hatched in any order or process and still come out identical.
+
+    A run that doesn't start from the first layer (e.g. when resuming) carries on from next_layer_id with the angle
+    the hatcher had after the layer below it.
+    """
+
+    def __init__(self, hatcher: hatching.Hatcher, next_layer_id: int = 0, hatch_angle: Optional[float] = None):
+        self.hatcher = hatcher
+        self.next_layer_id = next_layer_id # Every layer index below this has been added
+        self.hatch_angle = hatcher.hatchAngle if hatch_angle is None else hatch_angle # After the last layer added
+        self._angles = {}
+
+    def add(self, layer_id: int, hatched: bool) -> float:
+        """
+        Adds the next layer, which is hatched or not, returning its hatch angle.
+        """
+        if layer_id != self.next_layer_id:
+            raise ValueError("Layer {} was added out of order, expected layer {}".format(layer_id, self.next_layer_id))
+
+        if hatched:
+            self.hatch_angle = self.hatcher.advanceHatchAngle(self.hatch_angle)
+        self._angles[layer_id] = self.hatch_angle
+        self.next_layer_id += 1
+        return self.hatch_angle
+
+    def __getitem__(self, layer_id: int) -> float:
+        """ The hatch angle of a layer that was added, which is also the hatcher's angle after that layer """
+        return self._angles[layer_id]
+
+    def next_hatch_angle(self) -> float:
+        """ The hatch angle of the next layer to be added, if it is hatched """
+        return self.hatcher.advanceHatchAngle(self.hatch_angle)
+
+
+def layer_hatched(hatcher: hatching.Hatcher, geom_slice: list) -> bool:
+    """
+    Whether hatch_layer fills the slice with hatches, and so turns the hatch angle for the layers above it. This
+    offsets the boundary just to find out, so is only for layers whose angle is needed before they are hatched (or that
+    aren't hatched at all); see hatch_next_layer otherwise.
+    """
+    return hatcher.hatchesBoundary(geom_slice)
+
+
+def hatch_layer(hatcher: hatching.Hatcher, hatch_angle: float, z: float, geom_slice: list,
+                config: dict) -> Optional[Layer]:
+    """
+    Hatches the boundary paths of a single slice at the given hatch angle (see HatchAngles). Returns None if the slice
+    is empty.
+
+    The hatcher's own angle is left unchanged, so layers can be hatched in any order or in separate processes and
+    still give the same result.
+    """
+    # pyslm doesn't error out if Trimesh returns an empty slice, so we have to check
+    # This generally only occurs at the very beginning or end of the part
+    if geom_slice == []:
+        return None
+
+    layer = hatcher.hatch(geom_slice, hatch_angle)  # Hatch layer
+
+    # The layer height is set in integer increment of microns to ensure no rounding error during manufacturing
+    layer.z = int(z*1000)
+    for geometry in layer.geometry:
+        geometry.mid = 1
+        geometry.bid = 1
+
+    return layer
+
+
+def hatch_next_layer(hatcher: hatching.Hatcher, angles: HatchAngles, z: float, geom_slice: list,
+                     config: dict) -> Tuple[Optional[Layer], bool]:
+    """
+    Hatches the slice of the next layer to be added to angles at the angle the layer has if it is hatched, returning
+    the layer and whether it was hatched (see Hatcher.layerHatched), which is then added to angles. A layer that
+    isn't hatched has no hatches for the angle to affect, so this gives the same layer as finding out whether it is
+    hatched first (see layer_hatched), without offsetting the boundary twice.
+    """
+    layer = hatch_layer(hatcher, angles.next_hatch_angle(), z, geom_slice, config)
+    return layer, layer is not None and hatcher.layerHatched
+
+
+def generate_layer(part: pyslm.Part, hatcher: hatching.Hatcher, hatch_angle: float, z: float,
+                   config: dict) -> Optional[Layer]:
+    """
+    Slices and hatches a single layer at the given hatch angle. Returns None if the slice is empty.
+    """
+    geom_slice = slice_layer(part, z, fix_polygons_mode(config), clipper_slices(config))
+    return hatch_layer(hatcher, hatch_angle, z, geom_slice, config)
+
+
+# Per-process state for the worker pool, set up once by _init_worker so the part isn't reloaded for every layer
+_worker_part = None
+_worker_hatcher = None
+_worker_config = None
+
+def _init_worker(config: dict, mesh_cache_dir: Optional[str] = None, mesh_cache_size: Optional[int] = None):
+    global _worker_part, _worker_hatcher, _worker_config
+    _worker_config = config
+    _worker_part = create_part(config, mesh_cache_dir, mesh_cache_size)
+    _worker_hatcher = create_hatcher(config, verbose=False)
+
+# Each job also returns the number of slice polygons it repaired, which are added up in the main process
+
+def _slice_layers_in_worker(job: Tuple[List[float], List[bool]]) -> Tuple[List[bool], List[Optional[list]], int]:
+    # Finds out whether the layer at each height is hatched, returning the slices marked to be kept for hatching
+    heights, keep = job
+    repaired = _worker_part.numRepairedPolygons
+    slices = slice_layers(_worker_part, heights, fix_polygons_mode(_worker_config), clipper_slices(_worker_config))
+    hatched = [layer_hatched(_worker_hatcher, geom_slice) for geom_slice in slices]
+    kept = [geom_slice if k else None for geom_slice, k in zip(slices, keep)]
+    return hatched, kept, _worker_part.numRepairedPolygons - repaired
+
+def _hatch_layer_in_worker(job: Tuple[float, float, list]) -> Tuple[Optional[Layer], int]:
+    hatch_angle, z, geom_slice = job
+    return hatch_layer(_worker_hatcher, hatch_angle, z, geom_slice, _worker_config), 0
+
+def _generate_layer_in_worker(job: Tuple[float, float]) -> Tuple[Optional[Layer], int]:
+    hatch_angle, z = job
+    repaired = _worker_part.numRepairedPolygons
+    layer = generate_layer(_worker_part, _worker_hatcher, hatch_angle, z, _worker_config)
+    return layer, _worker_part.numRepairedPolygons - repaired
+
+
+def pool_chunks(items: list, workers: int, max_size: int) -> List[list]:
+    """
+    Splits the items into consecutive chunks of at most max_size, small enough to spread them across the workers.
+    """
+    size = max(1, min(max_size, -(-len(items) // max(workers, 1))))
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+class _Ready():
+    # Stands in for an AsyncResult when a layer is already available (e.g. from the cache)
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+def generate_layers(part: pyslm.Part, hatcher: hatching.Hatcher, heights: np.ndarray, config: dict,
+                    workers: int = 1, max_in_flight: Optional[int] = None,
+                    cache: Optional[LayerCache] = None,
+                    layer_ids: Optional[np.ndarray] = None,
+                    slice_batch: int = 64,
+                    mesh_cache_dir: Optional[str] = None,
+                    mesh_cache_size: Optional[int] = None,
+                    angles: Optional[HatchAngles] = None,
+                    flags: Optional[HatchedFlags] = None) -> Iterator[Optional[Layer]]:
+    """
+    Generates the layer at each height in order (or only those with the given indices, see select_layers), yielding
+    None for empty slices. Layers are generated lazily as the
+    caller consumes them, so they can be written out one at a time without holding the whole build in memory.
+
+    The hatch angle of each layer is replayed in angles (see HatchAngles), which is created if not given. Every layer
+    from angles.next_layer_id up to the last one generated is added to it, so the layers below the selected ones are
+    still sliced to find out whether they are hatched, unless that is known from flags or the cache (see
+    HatchedFlags). Whether each layer that is sliced is hatched is added to both.
+
+    With workers > 1 the layers are spread across a pool of processes, each of which loads its own copy of the part
+    and hatcher from the config (using the mesh cache in mesh_cache_dir, limited to mesh_cache_size, if given). The
+    layers are sliced a chunk at a time to find out which are hatched, keeping the slices of the selected layers. Once
+    the layers of a chunk are added to angles, its selected layers are hatched from those slices, while the chunks
+    above are still being sliced; results are yielded in layer order, so the output is identical to a serial run. Each
+    layer is sliced once, and the slice polygons repaired by the workers are added to part.numRepairedPolygons.
+    At most max_in_flight layers (default: 2 per worker) are queued or finished-but-unconsumed at any time, and at most
+    one chunk per worker is sliced ahead of them, which bounds memory when the consumer (e.g. the XML writer) is slower
+    than the workers.
+
+    If a cache is given, layers found in it are not sliced or hatched at all, and newly generated layers are added.
+
+    A serial run slices slice_batch layers at a time in a single sweep through the mesh (see Part.getVectorSlices).
+    """
+    if layer_ids is None:
+        layer_ids = range(len(heights))
+    layer_ids = [int(layer_id) for layer_id in layer_ids]
+    if angles is None:
+        angles = HatchAngles(hatcher)
+    flags = hatched_flags(flags, cache)
+    if len(layer_ids) == 0:
+        return
+
+    selected = set(layer_ids)
+    span = list(range(angles.next_layer_id, layer_ids[-1] + 1))
+
+    def slice_at(batch: List[int], indices: List[int]) -> dict:
+        if not indices:
+            return {}
+        sliced = slice_layers(part, [heights[batch[i]] for i in indices], fix_polygons_mode(config),
+                              clipper_slices(config))
+        return dict(zip(indices, sliced))
+
+    if workers <= 1:
+        # The layers are sliced a batch at a time (see slice_layers), which only holds a batch's boundaries in memory
+        for start in range(0, len(span), slice_batch):
+            batch = span[start:start + slice_batch]
+            hatched = [flags.get(heights[layer_id]) for layer_id in batch]
+
+            # Whether a layer is hatched takes slicing it, unless that is known
+            slices = slice_at(batch, [i for i, flag in enumerate(hatched) if flag is None])
+
+            # The layers are added to angles in order. A selected layer not known to be hatched is hatched as it is
+            # added (see hatch_next_layer), and one that is known to be is looked up in the cache at its angle
+            layers = {}
+            for i, layer_id in enumerate(batch):
+                z = heights[layer_id]
+                if hatched[i] is None:
+                    if layer_id in selected:
+                        layers[i], hatched[i] = hatch_next_layer(hatcher, angles, z, slices[i], config)
+                    else:
+                        hatched[i] = layer_hatched(hatcher, slices[i])
+                    angles.add(layer_id, hatched[i])
+                    flags.put(z, hatched[i])
+                    if cache is not None and layer_id in selected:
+                        # It can't be looked up without its angle, which takes hatching it
+                        cache.misses += 1
+                        cache.put(z, angles[layer_id], layers[i])
+                    continue
+
+                hatch_angle = angles.add(layer_id, hatched[i])
+                if layer_id in selected:
+                    hit, layer = cache.get(z, hatch_angle) if cache is not None else (False, None)
+                    if hit:
+                        layers[i] = layer
+
+            missed = [i for i, layer_id in enumerate(batch) if layer_id in selected and i not in layers]
+            slices.update(slice_at(batch, missed))
+            for i in missed:
+                layer_id = batch[i]
+                layers[i] = hatch_layer(hatcher, angles[layer_id], heights[layer_id], slices[i], config)
+                if cache is not None:
+                    cache.put(heights[layer_id], angles[layer_id], layers[i])
+
+            for i, layer_id in enumerate(batch):
+                if layer_id in selected:
+                    yield layers[i]
+        return
+
+    if max_in_flight is None:
+        max_in_flight = 2 * workers
+
+    # Results are collected in submission order; a new layer is only submitted once the oldest has been handed over
+    in_flight = deque()
+
+    def take_oldest():
+        z, hatch_angle, hit, result = in_flight.popleft()
+        layer, repaired = result.get()
+        part.numRepairedPolygons += repaired
+        # The cache is only ever written from this process
+        if cache is not None and not hit:
+            cache.put(z, hatch_angle, layer)
+        return layer
+
+    hatched = {layer_id: flags.get(heights[layer_id]) for layer_id in span}
+    # Chunks of layers whose slicing was submitted, but which haven't been added to angles yet
+    pending = deque()
+
+    def submit_chunk(chunk: List[int]):
+        # Only the layers not known to be hatched are sliced, keeping the slices of the selected ones
+        unknown = [layer_id for layer_id in chunk if hatched[layer_id] is None]
+        result = None
+        if unknown:
+            job = ([heights[layer_id] for layer_id in unknown], [layer_id in selected for layer_id in unknown])
+            result = pool.apply_async(_slice_layers_in_worker, (job,))
+        pending.append((chunk, unknown, result))
+
+    def add_oldest_chunk() -> Iterator[Optional[Layer]]:
+        # Adds the layers of the oldest chunk to angles and submits its selected layers, yielding the layers taken to
+        # make room for them
+        chunk, unknown, result = pending.popleft()
+        slices = {}
+        if result is not None:
+            chunk_hatched, kept, repaired = result.get()
+            part.numRepairedPolygons += repaired
+            for layer_id, flag, geom_slice in zip(unknown, chunk_hatched, kept):
+                hatched[layer_id] = flag
+                flags.put(heights[layer_id], flag)
+                if geom_slice is not None:
+                    slices[layer_id] = geom_slice
+
+        for layer_id in chunk:
+            hatch_angle = angles.add(layer_id, hatched[layer_id])
+            if layer_id not in selected:
+                continue
+
+            if len(in_flight) >= max_in_flight:
+                yield take_oldest()
+
+            z = heights[layer_id]
+            if layer_id in slices:
+                # It can't have been cached without whether it is hatched, so it is hatched from the slice
+                if cache is not None:
+                    cache.misses += 1
+                in_flight.append((z, hatch_angle, False,
+                                  pool.apply_async(_hatch_layer_in_worker, ((hatch_angle, z, slices.pop(layer_id)),))))
+                continue
+
+            hit, layer = cache.get(z, hatch_angle) if cache is not None else (False, None)
+            if hit:
+                in_flight.append((z, hatch_angle, True, _Ready((layer, 0))))
+            else:
+                in_flight.append((z, hatch_angle, False, pool.apply_async(_generate_layer_in_worker, ((hatch_angle, z),))))
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(config, mesh_cache_dir, mesh_cache_size)) as pool:
+        # Whether each layer is hatched sets the angles of those above it, so the chunks are added in order. Slicing
+        # the next few chunks ahead keeps the workers busy while the layers of the oldest are hatched
+        for chunk in pool_chunks(span, workers, slice_batch):
+            submit_chunk(chunk)
+            if len(pending) > workers:
+                yield from add_oldest_chunk()
+
+        while pending:
+            yield from add_oldest_chunk()
+
+        while in_flight:
+            yield take_oldest()
@@ -0,0 +1,380 @@
+# Standard Library Imports
+import hashlib
+import json
+import multiprocessing
+from collections import deque
+from typing import Iterator, List, Optional, Tuple
+
+# Third-Party Imports
+import numpy as np
+
+# Local Imports
+import pyslm
+from pyslm.geometry import Layer
+from pyslm.hatching import hatching
+from src.pipeline.pipeline import part_file_path, create_hatcher, fix_polygons_mode, clipper_slices, slice_layer, \
+    slice_layers, hatch_layer, hatch_next_layer, layer_hatched, pool_chunks, HatchAngles
+from src.pipeline.cache import LayerCache, HatchedFlags, hatched_flags, build_digest
+
+'''
+Build plate mode (see --plate in main.py): many parts, each with its own position, rotation and scale, sliced and
+hatched together so every layer of the plate is written as a single Layer. A plate file looks like
+
+    [{"file": "nut.stl", "origin": [0, 0]},
+     {"file": "nut.stl", "origin": [30, 0], "rotation": [0, 0, 45]},
+     {"file": "Cone_1.STL", "origin": [0, 40], "scale": 2.0}]
+
+where "file" is in the geometry folder, "origin" is the (x, y) position of the part's origin [mm], "rotation" its
+rotation about the x, y and z axes [degrees] (default [0, 0, 90], as for a single part) and "scale" its scale factor
+(default 1). Every part is dropped onto the platform.
+
+Each part is sliced and hatched on its own, only at the layers its z-extent covers, and the geometry of all the parts
+at a layer is merged in the order they are listed in the plate file.
+'''
+
+
+def load_plate(path: str) -> List[dict]:
+    """
+    Reads a plate file, returning each part as {"file", "origin", "rotation", "scale"} with the defaults filled in.
+    """
+    with open(path) as f:
+        entries = json.load(f)
+
+    if not isinstance(entries, list) or len(entries) == 0:
+        raise ValueError("{} must contain a JSON list of at least one part".format(path))
+
+    plate = []
+    for i, entry in enumerate(entries):
+        if "file" not in entry:
+            raise ValueError("Part {} in {} has no file".format(i, path))
+
+        origin = [float(x) for x in entry.get("origin", [0.0, 0.0])]
+        if len(origin) != 2:
+            raise ValueError("The origin of part {} in {} must be its (x, y) position".format(i, path))
+
+        plate.append({"file": entry["file"],
+                      "origin": origin,
+                      "rotation": [float(x) for x in entry.get("rotation", [0.0, 0.0, 90.0])],
+                      "scale": float(entry.get("scale", 1.0))})
+
+    return plate
+
+
+class BuildPlate():
+    """
+    The parts of a plate, with an index of their z-extents for finding the parts a layer passes through.
+    """
+
+    def __init__(self, parts: List[pyslm.Part]):
+        self.parts = parts
+
+        bounds = np.array([part.boundingBox for part in parts]).reshape(-1, 6)
+        self.boundingBox = np.hstack([bounds[:, :3].min(axis=0), bounds[:, 3:].max(axis=0)])
+
+        # Parts sorted by the bottom of their z-extent, so the parts starting below a layer are a prefix of them
+        self._order = np.argsort(bounds[:, 2], kind='stable')
+        self._z_min = bounds[self._order, 2]
+        self._z_max = bounds[:, 5]
+
+    def parts_at(self, z: float) -> np.ndarray:
+        """
+        Indices of the parts whose z-extent covers z, in plate order. Every other part has an empty slice there (see
+        Part.getTrimeshSlice), so is skipped.
+        """
+        started = self._order[:np.searchsorted(self._z_min, z, side='right')]
+        return np.sort(started[self._z_max[started] >= z])
+
+    @property
+    def numRepairedPolygons(self) -> int:
+        return sum(part.numRepairedPolygons for part in self.parts)
+
+
+def create_plate(plate: List[dict], config: dict, mesh_cache_dir: Optional[str] = None,
+                 mesh_cache_size: Optional[int] = None) -> BuildPlate:
+    """
+    Loads and positions every part on the plate (see load_plate). Each file is only read once, however many copies of
+    it the plate holds.
+    """
+    parts = []
+    loaded = {}
+    for i, entry in enumerate(plate):
+        part = pyslm.Part("{}_{}".format(entry["file"], i))
+        path = part_file_path({"Part File Name": entry["file"]})
+        if path in loaded:
+            # The copies share the untransformed mesh, which is never modified once loaded
+            part.setGeometryByMesh(loaded[path]._geometry)
+        else:
+            part.setGeometry(path, cacheDir=mesh_cache_dir, cacheSize=mesh_cache_size)
+            loaded[path] = part
+
+        part.scaleFactor = entry["scale"]
+        part.rotation = np.array(entry["rotation"])
+        part.origin = [entry["origin"][0], entry["origin"][1], 0.0]
+        part.dropToPlatform()
+        part.reuseSliceTopology = config.get("Reuse Slice Topology", False)
+        parts.append(part)
+
+    return BuildPlate(parts)
+
+
+def plate_digest(plate: List[dict], build_plate: BuildPlate, hatcher: hatching.Hatcher, config: dict) -> str:
+    """
+    Hash of everything shared by all layers of the plate that affects their geometry (see build_digest), for use in
+    place of a single part's build digest by the layer cache and checkpoints.
+    """
+    h = hashlib.sha256()
+    for entry, part in zip(plate, build_plate.parts):
+        h.update(build_digest(part_file_path({"Part File Name": entry["file"]}), part, hatcher,
+                              fix_polygons_mode(config), clipper_slices(config)).encode())
+    return h.hexdigest()
+
+
+def merge_layers(layers: List[Optional[Layer]], z: float) -> Optional[Layer]:
+    """
+    Merges the layers of the parts at z into one, keeping the geometry of each in turn. Returns None if every part's
+    slice is empty.
+    """
+    layers = [layer for layer in layers if layer is not None]
+    if len(layers) == 0:
+        return None
+
+    merged = Layer(0, 0)
+    merged.z = int(z*1000)
+    for layer in layers:
+        merged.geometry.extend(layer.geometry)
+    return merged
+
+
+# Per-process state for the worker pool, set up once by _init_plate_worker so the parts aren't reloaded for every layer
+_worker_plate = None
+_worker_hatcher = None
+_worker_config = None
+
+def _init_plate_worker(plate: List[dict], config: dict, mesh_cache_dir: Optional[str] = None,
+                       mesh_cache_size: Optional[int] = None):
+    global _worker_plate, _worker_hatcher, _worker_config
+    _worker_config = config
+    _worker_plate = create_plate(plate, config, mesh_cache_dir, mesh_cache_size)
+    _worker_hatcher = create_hatcher(config, verbose=False)
+
+# Each job also returns the number of slice polygons it repaired, which are added up in the main process
+
+def _slice_part_layers_in_worker(job: Tuple[int, List[float], List[bool]]) \
+        -> Tuple[List[bool], List[Optional[list]], int]:
+    # Finds out whether the part is hatched at each height, returning the slices marked to be kept for hatching
+    part_id, heights, keep = job
+    part = _worker_plate.parts[part_id]
+    repaired = part.numRepairedPolygons
+    slices = slice_layers(part, heights, fix_polygons_mode(_worker_config), clipper_slices(_worker_config))
+    hatched = [layer_hatched(_worker_hatcher, geom_slice) for geom_slice in slices]
+    kept = [geom_slice if k else None for geom_slice, k in zip(slices, keep)]
+    return hatched, kept, part.numRepairedPolygons - repaired
+
+def _hatch_part_layer_in_worker(job: Tuple[float, float, list]) -> Tuple[Optional[Layer], int]:
+    hatch_angle, z, geom_slice = job
+    return hatch_layer(_worker_hatcher, hatch_angle, z, geom_slice, _worker_config), 0
+
+def _generate_part_layer_in_worker(job: Tuple[int, float, float]) -> Tuple[Optional[Layer], int]:
+    part_id, hatch_angle, z = job
+    part = _worker_plate.parts[part_id]
+    repaired = part.numRepairedPolygons
+    geom_slice = slice_layer(part, z, fix_polygons_mode(_worker_config), clipper_slices(_worker_config))
+    layer = hatch_layer(_worker_hatcher, hatch_angle, z, geom_slice, _worker_config)
+    return layer, part.numRepairedPolygons - repaired
+
+
+def generate_plate_layers(plate: List[dict], build_plate: BuildPlate, hatcher: hatching.Hatcher, heights: np.ndarray,
+                          config: dict, workers: int = 1, max_in_flight: Optional[int] = None,
+                          cache: Optional[LayerCache] = None,
+                          layer_ids: Optional[np.ndarray] = None,
+                          slice_batch: int = 64,
+                          mesh_cache_dir: Optional[str] = None,
+                          mesh_cache_size: Optional[int] = None,
+                          angles: Optional[HatchAngles] = None,
+                          flags: Optional[HatchedFlags] = None) -> Iterator[Optional[Layer]]:
+    """
+    Generates the merged layer of the plate at each height in order (or only those with the given indices), yielding
+    None where no part is sliced. This is the build plate counterpart of generate_layers, and takes the same options.
+
+    Every part of a layer is hatched at the same angle, which turns on each layer where any of the parts is hatched.
+
+    A serial run slices each part at all the heights of a batch that it covers in a single sweep (see slice_layers).
+    With workers > 1, the layers are sliced a chunk at a time to find out which are hatched, as for generate_layers,
+    with each part's slices of a chunk a separate job for the pool. Each part's slice at each selected layer is then
+    hatched as a separate job, so the parts of a layer are hatched in parallel; at most max_in_flight layers (default:
+    2 per worker) are in progress at once. Each part is sliced once at each layer, and the slice polygons repaired by
+    the workers are added to the count of each part.
+    """
+    if layer_ids is None:
+        layer_ids = range(len(heights))
+    layer_ids = [int(layer_id) for layer_id in layer_ids]
+    if angles is None:
+        angles = HatchAngles(hatcher)
+    flags = hatched_flags(flags, cache)
+    if len(layer_ids) == 0:
+        return
+
+    selected = set(layer_ids)
+    span = list(range(angles.next_layer_id, layer_ids[-1] + 1))
+
+    def slice_at(batch: List[int], indices: List[int]) -> dict:
+        # Each part is sliced at the layers of the batch it covers, in one sweep through its mesh
+        active = {i: build_plate.parts_at(heights[batch[i]]) for i in indices}
+        slices = {i: {} for i in indices}
+        for part_id, part in enumerate(build_plate.parts):
+            covered = [i for i in indices if part_id in active[i]]
+            if covered:
+                sliced = slice_layers(part, [heights[batch[i]] for i in covered], fix_polygons_mode(config),
+                                      clipper_slices(config))
+                for i, geom_slice in zip(covered, sliced):
+                    slices[i][part_id] = geom_slice
+        return slices
+
+    if workers <= 1:
+        for start in range(0, len(span), slice_batch):
+            batch = span[start:start + slice_batch]
+            hatched = [flags.get(heights[layer_id]) for layer_id in batch]
+
+            slices = slice_at(batch, [i for i, flag in enumerate(hatched) if flag is None])
+
+            # As for generate_layers, a selected layer not known to be hatched is hatched as it is added to angles.
+            # Every part is hatched at the angle the layer has if any of them is hatched.
+            layers = {}
+            for i, layer_id in enumerate(batch):
+                z = heights[layer_id]
+                if hatched[i] is None:
+                    if layer_id in selected:
+                        hatchedParts = [hatch_next_layer(hatcher, angles, z, geom_slice, config)
+                                        for part_id, geom_slice in sorted(slices[i].items())]
+                        layers[i] = merge_layers([layer for layer, flag in hatchedParts], z)
+                        hatched[i] = any(flag for layer, flag in hatchedParts)
+                    else:
+                        hatched[i] = any(layer_hatched(hatcher, geom_slice) for geom_slice in slices[i].values())
+                    angles.add(layer_id, hatched[i])
+                    flags.put(z, hatched[i])
+                    if cache is not None and layer_id in selected:
+                        # It can't be looked up without its angle, which takes hatching it
+                        cache.misses += 1
+                        cache.put(z, angles[layer_id], layers[i])
+                    continue
+
+                hatch_angle = angles.add(layer_id, hatched[i])
+                if layer_id in selected:
+                    hit, layer = cache.get(z, hatch_angle) if cache is not None else (False, None)
+                    if hit:
+                        layers[i] = layer
+
+            missed = [i for i, layer_id in enumerate(batch) if layer_id in selected and i not in layers]
+            slices.update(slice_at(batch, missed))
+            for i in missed:
+                layer_id = batch[i]
+                z = heights[layer_id]
+                layers[i] = merge_layers([hatch_layer(hatcher, angles[layer_id], z, geom_slice, config)
+                                          for part_id, geom_slice in sorted(slices[i].items())], z)
+                if cache is not None:
+                    cache.put(z, angles[layer_id], layers[i])
+
+            for i, layer_id in enumerate(batch):
+                if layer_id in selected:
+                    yield layers[i]
+        return
+
+    if max_in_flight is None:
+        max_in_flight = 2 * workers
+
+    # Layers are collected in order; a new layer is only submitted once the oldest has been handed over
+    in_flight = deque()
+
+    def take_oldest():
+        z, hatch_angle, hit, results = in_flight.popleft()
+        if hit:
+            return results
+
+        layers = []
+        for part_id, result in results:
+            layer, repaired = result.get()
+            build_plate.parts[part_id].numRepairedPolygons += repaired
+            layers.append(layer)
+
+        layer = merge_layers(layers, z)
+        # The cache is only ever written from this process
+        if cache is not None:
+            cache.put(z, hatch_angle, layer)
+        return layer
+
+    hatched = {layer_id: flags.get(heights[layer_id]) for layer_id in span}
+    # Chunks of layers whose slicing was submitted, but which haven't been added to angles yet
+    pending = deque()
+
+    def submit_chunk(chunk: List[int]):
+        # Each part is sliced at the layers of the chunk it covers that aren't known to be hatched, keeping its slices
+        # of the selected ones
+        unknown = [layer_id for layer_id in chunk if hatched[layer_id] is None]
+        results = []
+        for part_id in range(len(build_plate.parts)):
+            covered = [layer_id for layer_id in unknown if part_id in build_plate.parts_at(heights[layer_id])]
+            if covered:
+                job = (part_id, [heights[layer_id] for layer_id in covered], [layer_id in selected for layer_id in covered])
+                results.append((part_id, covered, pool.apply_async(_slice_part_layers_in_worker, (job,))))
+        pending.append((chunk, unknown, results))
+
+    def add_oldest_chunk() -> Iterator[Optional[Layer]]:
+        # Adds the layers of the oldest chunk to angles and submits its selected layers, yielding the layers taken to
+        # make room for them
+        chunk, unknown, results = pending.popleft()
+        for layer_id in unknown:
+            hatched[layer_id] = False
+
+        slices = {layer_id: {} for layer_id in unknown if layer_id in selected}
+        for part_id, covered, result in results:
+            part_hatched, kept, repaired = result.get()
+            build_plate.parts[part_id].numRepairedPolygons += repaired
+            for layer_id, flag, geom_slice in zip(covered, part_hatched, kept):
+                hatched[layer_id] = hatched[layer_id] or flag
+                if geom_slice is not None:
+                    slices[layer_id][part_id] = geom_slice
+
+        for layer_id in unknown:
+            flags.put(heights[layer_id], hatched[layer_id])
+
+        for layer_id in chunk:
+            hatch_angle = angles.add(layer_id, hatched[layer_id])
+            if layer_id not in selected:
+                continue
+
+            if len(in_flight) >= max_in_flight:
+                yield take_oldest()
+
+            z = heights[layer_id]
+            if layer_id in slices:
+                # It can't have been cached without whether it is hatched, so it is hatched from the slices
+                if cache is not None:
+                    cache.misses += 1
+                results = [(part_id, pool.apply_async(_hatch_part_layer_in_worker, ((hatch_angle, z, geom_slice),)))
+                           for part_id, geom_slice in sorted(slices.pop(layer_id).items())]
+                in_flight.append((z, hatch_angle, False, results))
+                continue
+
+            hit, layer = cache.get(z, hatch_angle) if cache is not None else (False, None)
+            if hit:
+                in_flight.append((z, hatch_angle, True, layer))
+            else:
+                results = [(part_id, pool.apply_async(_generate_part_layer_in_worker,
+                                                      ((int(part_id), hatch_angle, z),)))
+                           for part_id in build_plate.parts_at(z)]
+                in_flight.append((z, hatch_angle, False, results))
+
+    initargs = (plate, config, mesh_cache_dir, mesh_cache_size)
+    with multiprocessing.Pool(workers, initializer=_init_plate_worker, initargs=initargs) as pool:
+        # Whether each layer is hatched sets the angles of those above it, so the chunks are added in order, slicing
+        # the next few ahead (see generate_layers)
+        for chunk in pool_chunks(span, workers, slice_batch):
+            submit_chunk(chunk)
+            if len(pending) > workers:
+                yield from add_oldest_chunk()
+
+        while pending:
+            yield from add_oldest_chunk()
+
+        while in_flight:
+            yield take_oldest()
@@ -0,0 +1,307 @@
+# Standard Library Imports
+import hashlib
+import json
+import multiprocessing
+import os
+from collections import deque
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# Third-Party Imports
+import numpy as np
+
+# Local Imports
+import pyslm
+from pyslm.core import ClipperPaths
+from pyslm.geometry import Layer
+from pyslm.hatching import hatching
+from src.pipeline.pipeline import create_hatcher, fix_polygons_mode, clipper_slices, slice_layers, hatch_layer, \
+    hatch_next_layer, layer_hatched, pool_chunks, HatchAngles
+from src.pipeline.cache import LayerCache, HatchedFlags, hatched_flags, file_digest, hatcher_params
+
+'''
+Slice stacks (see --write-slices and --from-slices in main.py): the boundaries of every layer of a build, saved so
+that later runs, e.g. of a hatching parameter study, can skip slicing the part. A stack is a folder holding
+
+    meta.json          the part, layer thickness, slicing options and a digest of them
+    heights.npy        (layers,) z-position of each layer [mm]
+    layer_offsets.npy  (layers + 1,) index of the first path of each layer into path_offsets
+    path_offsets.npy   (paths + 1,) index of the first point of each path into coords
+    coords.npy         (points, 2) coordinates of every path, one after the other
+
+so the paths of layer i are coords[path_offsets[j]:path_offsets[j + 1]] for j in
+range(layer_offsets[i], layer_offsets[i + 1]). The coordinates are floats [mm], or pyclipper's scaled integers when
+the part was sliced with "Clipper Slices". The coordinates are memory-mapped when a stack is loaded, so each layer is
+only read from disk as it is hatched.
+'''
+
+STACK_VERSION = 1
+
+
+def stack_digest(part_path: str, part: pyslm.Part, heights: np.ndarray, config: dict) -> str:
+    """
+    Hash of everything that affects the slices of a build: the STL contents, the part transform, the layer heights
+    and the slicing options.
+    """
+    h = hashlib.sha256()
+    h.update(str(STACK_VERSION).encode())
+    h.update(file_digest(part_path).encode())
+    for array in (part.origin, part.rotation, part.scaleFactor, heights):
+        h.update(repr(np.asarray(array, dtype=np.float64).tolist()).encode())
+    h.update(repr((fix_polygons_mode(config), clipper_slices(config), part.reuseSliceTopology)).encode())
+    return h.hexdigest()
+
+
+def slice_build(part: pyslm.Part, heights: np.ndarray, config: dict, slice_batch: int = 64) -> Iterator[list]:
+    """
+    Slices the part at each of the heights in turn (see slice_layers), slice_batch layers at a time.
+    """
+    for start in range(0, len(heights), slice_batch):
+        yield from slice_layers(part, heights[start:start + slice_batch], fix_polygons_mode(config),
+                                clipper_slices(config))
+
+
+def write_slice_stack(path: str, heights: np.ndarray, slices: Iterable[list], layer_thickness: float, digest: str,
+                      part_name: str = '', clipper_scale: Optional[float] = None):
+    """
+    Writes the slices at each of the heights to a slice stack in the folder path. The metadata is written last, so
+    a stack that was not written completely is never loaded.
+    """
+    os.makedirs(path, exist_ok=True)
+    meta_path = os.path.join(path, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    layer_offsets = [0]
+    path_offsets = [0]
+    coords = []
+    for geom_slice in slices:
+        for boundary in geom_slice:
+            boundary = np.asarray(boundary)[:, :2]
+            coords.append(boundary)
+            path_offsets.append(path_offsets[-1] + len(boundary))
+        layer_offsets.append(len(path_offsets) - 1)
+
+    if len(layer_offsets) != len(heights) + 1:
+        raise ValueError("Expected {} slices but got {}".format(len(heights), len(layer_offsets) - 1))
+
+    dtype = np.float64 if clipper_scale is None else np.int64
+    coords = np.vstack(coords).astype(dtype) if coords else np.empty((0, 2), dtype=dtype)
+
+    np.save(os.path.join(path, 'heights.npy'), np.asarray(heights, dtype=np.float64))
+    np.save(os.path.join(path, 'layer_offsets.npy'), np.array(layer_offsets, dtype=np.int64))
+    np.save(os.path.join(path, 'path_offsets.npy'), np.array(path_offsets, dtype=np.int64))
+    np.save(os.path.join(path, 'coords.npy'), coords)
+
+    meta = {'version': STACK_VERSION,
+            'part': part_name,
+            'layer_thickness': float(layer_thickness),
+            'clipper_scale': clipper_scale,
+            'digest': digest}
+
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+
+def write_build_slices(path: str, part: pyslm.Part, part_path: str, heights: np.ndarray, config: dict,
+                       slice_batch: int = 64) -> 'SliceStack':
+    """
+    Slices the part at every height with the options in the config and writes the slices to a slice stack in the
+    folder path, returning the stack loaded from there.
+    """
+    clipper_scale = hatching.BaseHatcher.PYCLIPPER_SCALEFACTOR if clipper_slices(config) else None
+    write_slice_stack(path, heights, slice_build(part, heights, config, slice_batch), config["Layer Thickness"],
+                      stack_digest(part_path, part, heights, config), config["Part File Name"], clipper_scale)
+    return SliceStack(path)
+
+
+class SliceStack():
+    """
+    A slice stack loaded from the folder path, with the coordinates memory-mapped.
+    """
+
+    def __init__(self, path: str):
+        meta_path = os.path.join(path, 'meta.json')
+        if not os.path.exists(meta_path):
+            raise ValueError("{} is not a (completely written) slice stack".format(path))
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+        if meta.get('version') != STACK_VERSION:
+            raise ValueError("Slice stack {} was written by a different version; write it again".format(path))
+
+        self.path = path
+        self.part = meta['part']
+        self.layer_thickness = meta['layer_thickness']
+        self.clipper_scale = meta['clipper_scale']
+        self.digest = meta['digest']
+
+        self.heights = np.load(os.path.join(path, 'heights.npy'))
+        self._layer_offsets = np.load(os.path.join(path, 'layer_offsets.npy'))
+        self._path_offsets = np.load(os.path.join(path, 'path_offsets.npy'))
+        self._coords = np.load(os.path.join(path, 'coords.npy'), mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self.heights)
+
+    def slice(self, layer_id: int) -> list:
+        """
+        The boundary paths of a layer, as returned by slice_layer when the stack was written (an empty list if the
+        slice is empty). The paths are read-only views of the memory-mapped coordinates.
+        """
+        first, last = self._layer_offsets[layer_id], self._layer_offsets[layer_id + 1]
+        bounds = self._path_offsets[first:last + 1]
+        paths = [self._coords[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+        if self.clipper_scale is not None:
+            return ClipperPaths(paths, self.clipper_scale)
+
+        return paths
+
+    def build_digest(self, hatcher: hatching.Hatcher) -> str:
+        """
+        Hash of everything shared by all layers hatched from this stack that affects their geometry, for use in place
+        of the part's build digest by the layer cache and checkpoints.
+        """
+        h = hashlib.sha256()
+        h.update(self.digest.encode())
+        h.update(repr(hatcher_params(hatcher)).encode())
+        return h.hexdigest()
+
+
+# Per-process state for the worker pool, set up once by _init_stack_worker
+_worker_stack = None
+_worker_hatcher = None
+_worker_config = None
+
+def _init_stack_worker(path: str, config: dict):
+    global _worker_stack, _worker_hatcher, _worker_config
+    _worker_config = config
+    _worker_stack = SliceStack(path)
+    _worker_hatcher = create_hatcher(config, verbose=False)
+
+def _layers_hatched_in_worker(layer_ids: List[int]) -> List[bool]:
+    return [layer_hatched(_worker_hatcher, _worker_stack.slice(layer_id)) for layer_id in layer_ids]
+
+def _hatch_layer_in_worker(job: Tuple[int, float]) -> Optional[Layer]:
+    layer_id, hatch_angle = job
+    return hatch_layer(_worker_hatcher, hatch_angle, _worker_stack.heights[layer_id], _worker_stack.slice(layer_id),
+                       _worker_config)
+
+
+def generate_layers_from_slices(stack: SliceStack, hatcher: hatching.Hatcher, config: dict,
+                                workers: int = 1, max_in_flight: Optional[int] = None,
+                                cache: Optional[LayerCache] = None,
+                                layer_ids: Optional[np.ndarray] = None,
+                                angles: Optional[HatchAngles] = None,
+                                flags: Optional[HatchedFlags] = None) -> Iterator[Optional[Layer]]:
+    """
+    Hatches the slices of the stack in order (or only those with the given indices), yielding None for empty slices.
+    This is the counterpart of generate_layers for a stack, and takes the same options. Each worker process loads
+    the stack itself, so only the layer indices are sent to it.
+    """
+    if layer_ids is None:
+        layer_ids = range(len(stack))
+    layer_ids = [int(layer_id) for layer_id in layer_ids]
+    if angles is None:
+        angles = HatchAngles(hatcher)
+    flags = hatched_flags(flags, cache)
+    if len(layer_ids) == 0:
+        return
+
+    selected = set(layer_ids)
+    span = list(range(angles.next_layer_id, layer_ids[-1] + 1))
+    hatched = {layer_id: flags.get(stack.heights[layer_id]) for layer_id in span}
+
+    if workers <= 1:
+        for layer_id in span:
+            z = stack.heights[layer_id]
+            if hatched[layer_id] is None:
+                # As for generate_layers, a selected layer not known to be hatched is hatched as it is added to angles
+                layer = None
+                if layer_id in selected:
+                    layer, hatched[layer_id] = hatch_next_layer(hatcher, angles, z, stack.slice(layer_id), config)
+                else:
+                    hatched[layer_id] = layer_hatched(hatcher, stack.slice(layer_id))
+                angles.add(layer_id, hatched[layer_id])
+                flags.put(z, hatched[layer_id])
+                if layer_id in selected:
+                    if cache is not None:
+                        # It can't be looked up without its angle, which takes hatching it
+                        cache.misses += 1
+                        cache.put(z, angles[layer_id], layer)
+                    yield layer
+                continue
+
+            hatch_angle = angles.add(layer_id, hatched[layer_id])
+            if layer_id not in selected:
+                continue
+
+            hit, layer = cache.get(z, hatch_angle) if cache is not None else (False, None)
+            if not hit:
+                layer = hatch_layer(hatcher, hatch_angle, z, stack.slice(layer_id), config)
+                if cache is not None:
+                    cache.put(z, hatch_angle, layer)
+            yield layer
+        return
+
+    if max_in_flight is None:
+        max_in_flight = 2 * workers
+
+    # Results are collected in submission order; a new layer is only submitted once the oldest has been handed over
+    in_flight = deque()
+
+    def take_oldest():
+        layer_id, hatch_angle, hit, result = in_flight.popleft()
+        if hit:
+            return result
+        layer = result.get()
+        # The cache is only ever written from this process
+        if cache is not None:
+            cache.put(stack.heights[layer_id], hatch_angle, layer)
+        return layer
+
+    # Chunks of layers whose flags were submitted, but which haven't been added to angles yet
+    pending = deque()
+
+    def submit_chunk(chunk: List[int]):
+        unknown = [layer_id for layer_id in chunk if hatched[layer_id] is None]
+        pending.append((chunk, unknown, pool.apply_async(_layers_hatched_in_worker, (unknown,)) if unknown else None))
+
+    def add_oldest_chunk() -> Iterator[Optional[Layer]]:
+        # Adds the layers of the oldest chunk to angles and submits its selected layers, yielding the layers taken to
+        # make room for them
+        chunk, unknown, result = pending.popleft()
+        if result is not None:
+            for layer_id, flag in zip(unknown, result.get()):
+                hatched[layer_id] = flag
+                flags.put(stack.heights[layer_id], flag)
+
+        for layer_id in chunk:
+            hatch_angle = angles.add(layer_id, hatched[layer_id])
+            if layer_id not in selected:
+                continue
+
+            if len(in_flight) >= max_in_flight:
+                yield take_oldest()
+
+            hit, layer = cache.get(stack.heights[layer_id], hatch_angle) if cache is not None else (False, None)
+            if hit:
+                in_flight.append((layer_id, hatch_angle, True, layer))
+            else:
+                in_flight.append((layer_id, hatch_angle, False,
+                                  pool.apply_async(_hatch_layer_in_worker, ((layer_id, hatch_angle),))))
+
+    with multiprocessing.Pool(workers, initializer=_init_stack_worker, initargs=(stack.path, config)) as pool:
+        # Whether each layer is hatched sets the angles of those above it, so the chunks are added in order, finding
+        # out for the next few ahead (see generate_layers)
+        for chunk in pool_chunks(span, workers, 64):
+            submit_chunk(chunk)
+            if len(pending) > workers:
+                yield from add_oldest_chunk()
+
+        while pending:
+            yield from add_oldest_chunk()
+
+        while in_flight:
+            yield take_oldest()
@@ -0,0 +1,261 @@
+# Standard Library Imports
+import multiprocessing
+import time
+from collections import deque
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+# Third-Party Imports
+import numpy as np
+
+# Local Imports
+import pyslm
+from src.output.xml_hdf5_io_2 import XMLWriter
+from src.pipeline.pipeline import create_part, create_hatcher, create_segment_styles, create_velocity_profiles, \
+    fix_polygons_mode, clipper_slices, slice_layer, hatch_layer, layer_hatched, HatchAngles
+from src.pipeline.cache import LayerCache, HatchedFlags, hatched_flags
+
+'''
+A staged version of the layer pipeline. Slicing, hatching and writing each get their own pool of worker processes,
+and every stage keeps a bounded number of layers in flight, so e.g. the XML for layer k is formatted and written while
+layer k+1 is still being sliced.
+
+Each stage hands its results downstream in layer order, so the output is identical to a serial run.
+'''
+
+
+class Stage():
+    """
+    One step of the pipeline, run on a pool of worker processes (or inline in the calling process if workers is 0).
+
+    At most queue_size items are submitted to the pool but not yet taken by the next stage; once that is reached,
+    the stage stops pulling from upstream until the oldest item is taken. The time spent inside func is recorded
+    so the stage's throughput can be reported.
+    """
+
+    def __init__(self, name: str, func: Callable, workers: int = 1, queue_size: int = 4,
+                 initializer: Optional[Callable] = None, initargs: Tuple = ()):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue_size = max(queue_size, workers, 1)
+        self.initializer = initializer
+        self.initargs = initargs
+
+        self.count = 0
+        self.busy_time = 0.0 # Total time spent inside func, summed over all workers
+        self.wall_time = 0.0
+
+    def run(self, items: Iterable) -> Iterator:
+        start = time.perf_counter()
+        try:
+            if self.workers <= 0:
+                if self.initializer is not None:
+                    self.initializer(*self.initargs)
+                for item in items:
+                    yield self._collect(_timed_call(self.func, item))
+                return
+
+            in_flight = deque()
+            with multiprocessing.Pool(self.workers, initializer=self.initializer, initargs=self.initargs) as pool:
+                for item in items:
+                    if len(in_flight) >= self.queue_size:
+                        yield self._collect(in_flight.popleft().get())
+                    in_flight.append(pool.apply_async(_timed_call, (self.func, item)))
+
+                while in_flight:
+                    yield self._collect(in_flight.popleft().get())
+        finally:
+            self.wall_time = time.perf_counter() - start
+
+    def _collect(self, timed_result: Tuple[Any, float]) -> Any:
+        result, elapsed = timed_result
+        self.count += 1
+        self.busy_time += elapsed
+        return result
+
+    def throughput(self) -> float:
+        """ Items per second the stage could sustain with all its workers busy """
+        if self.busy_time == 0:
+            return float('inf')
+        return max(self.workers, 1) * self.count / self.busy_time
+
+    def utilization(self) -> float:
+        """ Fraction of the stage's worker time spent doing work rather than waiting on other stages """
+        if self.wall_time == 0:
+            return 0.0
+        return self.busy_time / (max(self.workers, 1) * self.wall_time)
+
+    def report(self) -> str:
+        return '{:<10s} workers: {:<3d} layers: {:<6d} busy: {:8.2f} s  throughput: {:8.2f} layers/s  utilization: {:5.1f}%'.format(
+            self.name, self.workers, self.count, self.busy_time, self.throughput(), 100 * self.utilization())
+
+
+def _timed_call(func: Callable, item: Any) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = func(item)
+    return result, time.perf_counter() - start
+
+
+def report_stages(stages: List[Stage]) -> str:
+    """
+    Summarizes the throughput of each stage; the stage with the lowest throughput is the bottleneck.
+    """
+    lines = ['Pipeline stage throughput:']
+    lines += ['    ' + stage.report() for stage in stages]
+    bottleneck = min(stages, key=lambda stage: stage.throughput())
+    lines.append('    Bottleneck: {:s}'.format(bottleneck.name))
+    return '\n'.join(lines)
+
+
+# Per-process state for the stage worker pools. Each pool only sets up what its own stage needs.
+_stage_state = {}
+
+def _init_slice_stage(config: dict, mesh_cache_dir: Optional[str] = None, mesh_cache_size: Optional[int] = None):
+    _stage_state['part'] = create_part(config, mesh_cache_dir, mesh_cache_size)
+    _stage_state['fix_polygons'] = fix_polygons_mode(config)
+    _stage_state['clipper_paths'] = clipper_slices(config)
+    # Only used to find out whether each layer is hatched
+    _stage_state['hatcher'] = create_hatcher(config, verbose=False)
+
+def _init_hatch_stage(config: dict):
+    _stage_state['hatcher'] = create_hatcher(config, verbose=False)
+    _stage_state['config'] = config
+
+def _init_write_stage(config: dict, output_dir: str):
+    _stage_state['xmlWriter'] = XMLWriter(output_dir)
+    _stage_state['segStyleList'] = create_segment_styles(config)
+    _stage_state['vProfileList'] = create_velocity_profiles(config)
+    _stage_state['config'] = config
+
+# Jobs pass through the slice stage as (layer index, z, selected, hatched, cached, data), for every layer up to the
+# last one selected, as the angle of each layer depends on whether the layers below it are hatched (see HatchAngles).
+# hatched is None until it is known. Layers that were found in the cache (cached is True) carry the layer as data and
+# go through the stages untouched, so they stay in order; cached is None for layers yet to be looked up. The slice
+# stage returns each job along with the number of slice polygons it repaired. Between the hatch and write stages, jobs
+# are (layer index, z, hatch angle, cached, data) for the selected layers only.
+
+def _slice_stage(job: Tuple[int, float, bool, Optional[bool], Optional[bool], Any]) \
+        -> Tuple[Tuple[int, float, bool, bool, Optional[bool], Any], int]:
+    layer_id, z, selected, hatched, cached, layer = job
+    if cached or (hatched is not None and not selected):
+        return job, 0
+
+    part = _stage_state['part']
+    repaired = part.numRepairedPolygons
+    geom_slice = slice_layer(part, z, _stage_state['fix_polygons'], _stage_state['clipper_paths'])
+    if hatched is None:
+        hatched = layer_hatched(_stage_state['hatcher'], geom_slice)
+    return (layer_id, z, selected, hatched, cached, geom_slice), part.numRepairedPolygons - repaired
+
+def _hatch_stage(job: Tuple[int, float, float, bool, Any]) -> Tuple[int, float, float, bool, Any]:
+    layer_id, z, hatch_angle, cached, geom_slice = job
+    if cached:
+        return job
+    return layer_id, z, hatch_angle, False, hatch_layer(_stage_state['hatcher'], hatch_angle, z, geom_slice,
+                                                        _stage_state['config'])
+
+def _write_stage(job) -> Tuple[int, int, str]:
+    layer_id, layer_num, layer = job
+    config = _stage_state['config']
+    xmlWriter = _stage_state['xmlWriter']
+    xmlWriter.write_layer(layer, layer_num, _stage_state['segStyleList'], _stage_state['vProfileList'],
+                          config["Contour Default ID"], config["Hatch Default ID"])
+    return layer_id, layer_num, xmlWriter.layer_path(layer_num)
+
+
+def _look_up(heights: np.ndarray, layer_ids: List[int], angles: HatchAngles, cache: Optional[LayerCache],
+             flags: HatchedFlags) -> Iterator[Tuple[int, float, bool, Optional[bool], Optional[bool], Any]]:
+    selected = set(layer_ids)
+    # As long as it is known whether every layer so far is hatched, the angles are known ahead of the slice stage,
+    # so cached layers can skip slicing too
+    ahead = HatchAngles(angles.hatcher, angles.next_layer_id, angles.hatch_angle)
+    for layer_id in range(angles.next_layer_id, layer_ids[-1] + 1 if layer_ids else 0):
+        z = heights[layer_id]
+        hatched = flags.get(z)
+        cached, layer = (None if cache is not None else False), None
+        if hatched is None:
+            ahead = None
+        elif ahead is not None:
+            hatch_angle = ahead.add(layer_id, hatched)
+            if layer_id in selected and cache is not None:
+                cached, layer = cache.get(z, hatch_angle)
+        yield layer_id, z, layer_id in selected, hatched, cached, layer
+
+
+def _assign_angles(sliced: Iterable[Tuple[Tuple[int, float, bool, bool, Optional[bool], Any], int]],
+                   angles: HatchAngles, cache: Optional[LayerCache], flags: HatchedFlags,
+                   part: Optional[pyslm.Part]) -> Iterator[Tuple[int, float, float, bool, Any]]:
+    # The angles are only ever replayed in the main process, in layer order
+    for (layer_id, z, selected, hatched, cached, data), repaired in sliced:
+        if part is not None:
+            part.numRepairedPolygons += repaired
+
+        hatch_angle = angles.add(layer_id, hatched)
+        if not cached and data is not None:
+            flags.put(z, hatched)
+        if not selected:
+            continue
+
+        if cached is None:
+            cached, layer = cache.get(z, hatch_angle)
+            if cached:
+                data = layer
+        yield layer_id, z, hatch_angle, cached, data
+
+
+def _store(hatched: Iterable[Tuple[int, float, float, bool, Any]], cache: Optional[LayerCache]) -> Iterator:
+    # The cache is only ever written from the main process
+    for layer_id, z, hatch_angle, cached, layer in hatched:
+        if cache is not None and not cached:
+            cache.put(z, hatch_angle, layer)
+        yield layer_id, layer
+
+
+def _number_layers(layers: Iterable[Tuple[int, Any]], layer_num: int = 0) -> Iterator[Tuple[int, int, Any]]:
+    # Output files are numbered consecutively over the non-empty layers only, following on from layer_num
+    for layer_id, layer in layers:
+        if layer is None:
+            continue
+        layer_num += 1
+        yield layer_id, layer_num, layer
+
+
+def create_stages(config: dict, output_dir: str, workers: Tuple[int, int, int] = (1, 1, 1),
+                  queue_size: int = 4, mesh_cache_dir: Optional[str] = None,
+                  mesh_cache_size: Optional[int] = None) -> List[Stage]:
+    """
+    Creates the slice, hatch and write stages with the given number of worker processes each. The slice stage loads
+    the part using the mesh cache in mesh_cache_dir (limited to mesh_cache_size), if given.
+    """
+    slice_workers, hatch_workers, write_workers = workers
+    return [Stage('slice', _slice_stage, slice_workers, queue_size, _init_slice_stage,
+                  (config, mesh_cache_dir, mesh_cache_size)),
+            Stage('hatch', _hatch_stage, hatch_workers, queue_size, _init_hatch_stage, (config,)),
+            Stage('write', _write_stage, write_workers, queue_size, _init_write_stage, (config, output_dir))]
+
+
+def run_stages(stages: List[Stage], heights: np.ndarray, layer_ids: Iterable[int], angles: HatchAngles,
+               progress: Optional[Callable[[Iterable], Iterable]] = None,
+               cache: Optional[LayerCache] = None, layer_num: int = 0,
+               part: Optional[pyslm.Part] = None,
+               flags: Optional[HatchedFlags] = None) -> Iterator[Tuple[int, int, str]]:
+    """
+    Runs the layers with the given indices into heights through the slice, hatch and write stages, yielding the layer
+    index, layer number and path of each XML file in order as it is written. The hatch angles are replayed in angles
+    from angles.next_layer_id on (see generate_layers), so the layers below the selected ones are sliced too, unless
+    flags or the cache know whether they are hatched (see HatchedFlags). The
+    optional progress wrapper (e.g. tqdm) is applied to the hatched layers, one item per selected layer. If a cache is
+    given, cached layers skip slicing and hatching and new ones are added. Layer numbers follow on from layer_num, the
+    number of layer files already written (e.g. when resuming). The slice polygons repaired by the slice stage are
+    added to part.numRepairedPolygons, if a part is given.
+    """
+    slicer, hatcher, writer = stages
+    layer_ids = [int(layer_id) for layer_id in layer_ids]
+    flags = hatched_flags(flags, cache)
+
+    sliced = slicer.run(_look_up(heights, layer_ids, angles, cache, flags))
+    hatched = _store(hatcher.run(_assign_angles(sliced, angles, cache, flags, part)), cache)
+    if progress is not None:
+        hatched = progress(hatched)
+
+    yield from writer.run(_number_layers(hatched, layer_num))
@@ -0,0 +1,141 @@
+# Standard Library Imports
+import json
+import time
+from typing import Any, Callable, Optional
+
+# Third-Party Imports
+import numpy as np
+
+# Local Imports
+import pyslm
+from pyslm.geometry import Layer
+from pyslm.hatching import BaseHatcher
+from src.output.xml_hdf5_io_2 import XMLWriter
+
+'''
+Per-layer timing of the individual steps of slicing, hatching and writing (see --timings in main.py).
+
+The steps are timed by wrapping the methods of the part, hatcher and XML writer instances used for the run, so
+nothing in pyslm or the writer changes and a run without --timings pays nothing at all. Closing the timings restores
+the original methods. Everything recorded between
+two calls of end_layer belongs to one layer, so the layers have to be generated one at a time in this process.
+
+Each line of the output is one layer:
+    {"layer_id": 12, "z": 0.36, "layer_num": 12, "time": 0.021,
+     "stages": {"clipLines": {"calls": 1, "time": 0.004, "vectors_in": 310, "vectors_out": 298, ...}, ...}}
+'''
+
+
+def _count_vertices(paths: Any) -> int:
+    # Boundary paths come as (n,2) arrays or lists of points, nested in lists to varying depths
+    if paths is None or len(paths) == 0:
+        return 0
+    if isinstance(paths, np.ndarray) and paths.ndim <= 2:
+        return 1 if paths.ndim == 1 else paths.shape[0]
+    if np.isscalar(paths[0]):
+        return 1
+    return sum(_count_vertices(path) for path in paths)
+
+
+def _layer_vertices(layer: Layer) -> int:
+    return sum(len(geom.coords) for geom in layer.geometry)
+
+
+class LayerTimings():
+    """
+    Records the time spent in each step of a layer and writes one JSON line per layer to path.
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self.file = open(path, 'a' if append else 'w')
+        self.stages = {}
+        self.layer_start = time.perf_counter()
+        self._wrapped = [] # (obj, attr, the attribute the instance had before, if any) for every wrapped method
+
+    def instrument(self, part: pyslm.Part, hatcher: BaseHatcher, xmlWriter: XMLWriter):
+        """
+        Starts timing the steps of slicing the part, hatching with the hatcher and writing with the XML writer.
+        """
+        self._wrap(part, 'getVectorSlice', 'getVectorSlice',
+                   lambda args, result: {'vertices_out': _count_vertices(result)})
+        self._wrap(part, 'getTrimeshSlice', 'getTrimeshSlice',
+                   lambda args, result: {'vertices_out': 0 if result is None else len(result.vertices)})
+        self._wrap(part, 'getVectorSlices', 'getVectorSlices',
+                   lambda args, result: {'vertices_out': _count_vertices(result)})
+        self._wrap(part, 'getTrimeshSlices', 'getTrimeshSlices',
+                   lambda args, result: {'vertices_out': sum(len(s.vertices) for s in result if not isinstance(s, list))})
+        self._wrap(part, 'getClipperSlice', 'getClipperSlice',
+                   lambda args, result: {'vertices_out': _count_vertices(result)})
+        self._wrap(part, 'getClipperSlices', 'getClipperSlices',
+                   lambda args, result: {'vertices_out': _count_vertices(result)})
+
+        self._wrap(hatcher, 'hatch', 'hatch',
+                   lambda args, result: {'vertices_out': _layer_vertices(result)})
+        self._wrap(hatcher, 'offsetBoundary', 'offsetBoundary',
+                   lambda args, result: {'vertices_in': _count_vertices(args[0]),
+                                         'vertices_out': _count_vertices(result)})
+        self._wrap(hatcher, 'offsetBoundaryLevels', 'offsetBoundaryLevels',
+                   lambda args, result: {'vertices_in': _count_vertices(args[0]),
+                                         'vertices_out': _count_vertices(result)})
+        self._wrap(hatcher, 'clipLines', 'clipLines',
+                   lambda args, result: {'vertices_in': _count_vertices(args[0]),
+                                         'vectors_in': len(args[1]) // 2,
+                                         'vectors_out': 0 if result is None else len(result)})
+        self._wrap(hatcher, 'clipLinesScanline', 'clipLinesScanline',
+                   lambda args, result: {'vertices_in': _count_vertices(args[0]),
+                                         'vectors_in': len(args[1]) // 2,
+                                         'vectors_out': len(result)})
+        if hatcher.hatchSortMethod:
+            self._wrap(hatcher.hatchSortMethod, 'sort', 'hatchSortMethod.sort',
+                       lambda args, result: {'vectors_in': len(args[0])})
+
+        self._wrap(xmlWriter, 'write_layer', 'write_layer', lambda args, result: {})
+        self._wrap(xmlWriter, 'make_traj_list', 'make_traj_list',
+                   lambda args, result: {'vertices_in': _layer_vertices(args[0])})
+
+    def _wrap(self, obj: Any, attr: str, stage: str, counts: Callable[[tuple, Any], dict]):
+        # Shadows the method with a timed version on this instance only; calls through self.<attr> pick it up
+        func = getattr(obj, attr)
+        self._wrapped.append((obj, attr, vars(obj).get(attr)))
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            self.record(stage, time.perf_counter() - start, counts(args, result))
+            return result
+
+        setattr(obj, attr, timed)
+
+    def record(self, stage: str, elapsed: float, counts: Optional[dict] = None):
+        """ Adds one call of a step to the current layer """
+        stats = self.stages.setdefault(stage, {'calls': 0, 'time': 0.0})
+        stats['calls'] += 1
+        stats['time'] += elapsed
+        for name, count in (counts or {}).items():
+            stats[name] = stats.get(name, 0) + count
+
+    def end_layer(self, layer_id: int, z: float, layer_num: Optional[int] = None):
+        """
+        Writes out everything recorded since the previous layer as the given layer. layer_num is the number of its
+        XML file, or None for an empty slice.
+        """
+        now = time.perf_counter()
+        line = {'layer_id': int(layer_id), 'z': float(z), 'layer_num': layer_num,
+                'time': now - self.layer_start, 'stages': self.stages}
+        self.file.write(json.dumps(line) + '\n')
+
+        self.stages = {}
+        self.layer_start = now
+
+    def close(self):
+        """ Closes the output file and restores the methods wrapped by instrument """
+        self.file.close()
+
+        # In reverse, so a method wrapped twice ends up as it was before the first wrap
+        for obj, attr, previous in reversed(self._wrapped):
+            if previous is None:
+                delattr(obj, attr)
+            else:
+                setattr(obj, attr, previous)
+        self._wrapped = []